@@ -1,11 +1,24 @@
+import argparse
+import sys
 import streamlit as st
 import pandas as pd
-import numpy as np
 import random
-import datetime
 import plotly.graph_objects as go
 import plotly.express as px
 
+from data.sources import get_data_source
+from data.request_store import get_request_store
+from utils.cache import figure_from_json
+from utils.charts import create_heatmap_data, create_sensitivity_surface, create_waste_reduction_chart
+from utils.jobs import (FAILED, JOB_POLL_SECONDS, SIMULATOR_DATASET, backtest_job, get_job_runner, forecast_job,
+                        safety_stock_job, sensitivity_job)
+from utils.scenarios import (DEFAULT_SEASONALITY_STRENGTH, MARKET_TRENDS, PROMOTION_STEPS, SEASONALITY_STEPS,
+                             SIMULATOR_PRODUCTS)
+from utils.forecasting import set_forecast_workers
+from utils.warmup import start_warmup
+from utils.metrics import calculate_expiry_risk, calculate_warehouse_utilization, calculate_stock_turnover
+from utils.backtest import forecast_accuracy_kpi
+
 # Set page config
 st.set_page_config(
     page_title="Danone StockQuest",
@@ -434,221 +447,6 @@ def display_customized_dataframe(df, height=None):
 
 # ---- MOCK DATA FUNCTIONS ----
 
-def create_mock_sales_data():
-    # Create date range for the past year
-    end_date = datetime.datetime.now().date()
-    start_date = end_date - datetime.timedelta(days=365)
-    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-    
-    # Products
-    products = [
-        'Activia Yogurt', 'Alpro Soya', 'Danone Greek', 'Evian Water', 
-        'Actimel Probiotic', 'Volvic Water', 'Oykos Yogurt', 'Danette Dessert'
-    ]
-    
-    # Countries
-    countries = [
-        'France', 'Germany', 'UK', 'Spain', 'Italy', 
-        'Netherlands', 'Belgium', 'Poland', 'Sweden'
-    ]
-    
-    # Create dataframe structure
-    data = []
-    
-    # Add seasonal patterns and trends
-    for date in date_range:
-        day_of_year = date.dayofyear
-        month = date.month
-        
-        # Weekend effect
-        weekend_factor = 0.8 if date.dayofweek >= 5 else 1.0
-        
-        # Seasonal factor (higher in summer for water, higher in winter for yogurt)
-        season_factor = {}
-        for product in products:
-            if 'Water' in product:
-                # Water sales peak in summer
-                seasonal_component = np.sin(np.pi * day_of_year / 183) * 0.3 + 1
-            elif 'Yogurt' in product or 'Greek' in product:
-                # Yogurt sales higher in winter
-                seasonal_component = -np.sin(np.pi * day_of_year / 183) * 0.25 + 1
-            else:
-                # Other products have milder seasonality
-                seasonal_component = np.sin(np.pi * day_of_year / 183) * 0.15 + 1
-            
-            season_factor[product] = max(0.7, seasonal_component)
-        
-        # Special events/promotions (random spikes)
-        for country in countries:
-            for product in products:
-                # Base sales (different by country and product)
-                country_factor = 0.8 + 0.4 * (countries.index(country) / len(countries))
-                product_popularity = 0.7 + 0.6 * (products.index(product) / len(products))
-                
-                base_sales = int(np.random.normal(500, 50) * country_factor * product_popularity)
-                
-                # Apply seasonal and weekend factors
-                adjusted_sales = int(base_sales * season_factor[product] * weekend_factor)
-                
-                # Random promotions (sales spikes)
-                if np.random.random() < 0.02:  # 2% chance of promotion
-                    promotion_factor = np.random.uniform(1.5, 2.5)
-                    adjusted_sales = int(adjusted_sales * promotion_factor)
-                
-                # Add some random noise
-                final_sales = max(0, int(adjusted_sales * np.random.normal(1, 0.1)))
-                
-                # Add row to data
-                data.append({
-                    'date': date,
-                    'country': country,
-                    'product': product,
-                    'sales': final_sales,
-                    'year': date.year,
-                    'month': date.month,
-                    'day': date.day,
-                    'dayofweek': date.dayofweek
-                })
-    
-    # Convert to dataframe
-    df = pd.DataFrame(data)
-    
-    return df
-
-def create_mock_inventory_data():
-    # Products
-    products = [
-        'Activia Yogurt', 'Alpro Soya', 'Danone Greek', 'Evian Water', 
-        'Actimel Probiotic', 'Volvic Water', 'Oykos Yogurt', 'Danette Dessert'
-    ]
-    
-    # Warehouses
-    warehouses = [
-        'Paris-North', 'Berlin-Central', 'London-East', 'Madrid-South', 
-        'Rome-Central', 'Amsterdam-West', 'Brussels-Central', 'Warsaw-East'
-    ]
-    
-    # Create dataframe structure
-    data = []
-    
-    for warehouse in warehouses:
-        for product in products:
-            # Randomize inventory levels and capacities
-            current_stock = random.randint(500, 10000)
-            max_capacity = random.randint(max(current_stock, 8000), 15000)
-            min_required = random.randint(300, 1000)
-            
-            # Determine stock status
-            if current_stock < min_required:
-                status = "Low"
-            elif current_stock > 0.9 * max_capacity:
-                status = "Overstocked"
-            else:
-                status = "Optimal"
-            
-            # Shelf life - different by product type
-            if 'Yogurt' in product or 'Greek' in product:
-                shelf_life_days = random.randint(14, 28)
-            elif 'Water' in product:
-                shelf_life_days = random.randint(180, 365)
-            else:
-                shelf_life_days = random.randint(30, 90)
-            
-            # Calculate expiry risk based on stock and shelf life
-            expiry_risk = random.randint(0, 100) if shelf_life_days < 30 else random.randint(0, 20)
-            
-            data.append({
-                'warehouse': warehouse,
-                'product': product,
-                'current_stock': current_stock,
-                'max_capacity': max_capacity,
-                'min_required': min_required,
-                'status': status,
-                'shelf_life_days': shelf_life_days,
-                'expiry_risk': expiry_risk,
-                'restock_days': random.randint(1, 7),
-                'demand_trend': random.choice(["Increasing", "Steady", "Decreasing"])
-            })
-    
-    # Convert to dataframe
-    df = pd.DataFrame(data)
-    
-    return df
-
-def create_mock_country_requests():
-    countries = [
-        'France', 'Germany', 'UK', 'Spain', 'Italy', 
-        'Netherlands', 'Belgium', 'Poland', 'Sweden', 
-        'Denmark', 'Finland', 'Greece', 'Portugal', 'Ireland'
-    ]
-    
-    request_types = [
-        "New product development for local market",
-        "Packaging redesign for sustainability",
-        "Increased production capacity",
-        "Marketing campaign support",
-        "Supply chain optimization",
-        "Local sourcing initiative",
-        "Flavor adaptation for local taste",
-        "Reduced sugar reformulation",
-        "Plant-based product line expansion",
-        "Seasonal promotional SKUs",
-        "On-the-go format development",
-        "Family pack size introduction",
-        "Organic certification process",
-        "Distribution channel expansion"
-    ]
-    
-    data = []
-    
-    # Create sample country requests with priority scores
-    for i in range(30):  # 30 sample requests
-        country = random.choice(countries)
-        request = random.choice(request_types)
-        
-        # Calculate mock scores
-        market_size = random.randint(1, 10)
-        growth_potential = random.randint(1, 10)
-        technical_feasibility = random.randint(1, 10)
-        strategic_alignment = random.randint(1, 10)
-        cost_estimate = random.randint(1, 10)
-        
-        # Calculate priority score (higher is higher priority)
-        priority_score = (market_size * 2 + growth_potential * 3 + 
-                         technical_feasibility * 1.5 + strategic_alignment * 2.5 - 
-                         cost_estimate * 1.5)
-        
-        # Normalize to 0-100 scale
-        priority_score = max(0, min(100, int(priority_score / 0.19)))
-        
-        # Assign priority level based on score
-        if priority_score >= 70:
-            priority = 1  # High
-        elif priority_score >= 40:
-            priority = 2  # Medium
-        else:
-            priority = 3  # Low
-        
-        # Add submission date (random date in past 3 months)
-        days_ago = random.randint(1, 90)
-        submission_date = datetime.datetime.now() - datetime.timedelta(days=days_ago)
-        
-        data.append({
-            'country': country,
-            'request_type': request,
-            'priority_score': priority_score,
-            'priority': priority,
-            'market_size': market_size,
-            'growth_potential': growth_potential,
-            'technical_feasibility': technical_feasibility,
-            'strategic_alignment': strategic_alignment,
-            'cost_estimate': cost_estimate,
-            'submission_date': submission_date.strftime('%Y-%m-%d'),
-            'status': random.choice(['New', 'In Review', 'Approved', 'In Progress', 'Completed', 'On Hold'])
-        })
-    
-    return pd.DataFrame(data).sort_values(by='priority_score', ascending=False)
-
 def create_score_breakdown(country, request_type):
     # Create a radar chart of the score dimensions
     categories = ['Market Size', 'Growth Potential', 'Technical Feasibility', 
@@ -696,310 +494,141 @@ def create_score_breakdown(country, request_type):
     
     return fig
 
-def create_forecast_scenario(product, trend=None):
-    # Create date range for future 12 months
-    start_date = datetime.datetime.now().date()
-    future_date = start_date + datetime.timedelta(days=365)
-    date_range = pd.date_range(start=start_date, end=future_date, freq='MS')  # Monthly
-    
-    # Set baseline based on product
-    if 'Water' in product:
-        baseline = 15000
-        seasonality = 'summer'
-    elif 'Yogurt' in product or 'Greek' in product:
-        baseline = 12000
-        seasonality = 'winter'
-    else:
-        baseline = 10000
-        seasonality = 'balanced'
-    
-    # Create three scenarios
-    baseline_data = []
-    optimistic_data = []
-    pessimistic_data = []
-    
-    # Apply trends if specified
-    trend_factor = 1.0
-    if trend == 'increasing':
-        trend_growth = 0.03  # 3% monthly growth
-    elif trend == 'decreasing':
-        trend_growth = -0.02  # 2% monthly decline
-    else:
-        trend_growth = 0.005  # 0.5% growth (slight growth)
-    
-    for i, date in enumerate(date_range):
-        month = date.month
-        
-        # Apply seasonality
-        if seasonality == 'summer':
-            # Peak in summer (June-August)
-            seasonal_factor = 1 + 0.3 * np.sin(np.pi * (month - 3) / 6)
-        elif seasonality == 'winter':
-            # Peak in winter (December-February)
-            seasonal_factor = 1 + 0.3 * np.sin(np.pi * (month - 9) / 6)
-        else:
-            # Milder seasonality
-            seasonal_factor = 1 + 0.15 * np.sin(np.pi * month / 6)
-        
-        # Apply trend
-        trend_factor *= (1 + trend_growth)
-        
-        # Calculate values for each scenario
-        baseline_value = int(baseline * seasonal_factor * trend_factor)
-        optimistic_value = int(baseline_value * (1 + 0.1 + 0.01 * i))  # Increasingly optimistic
-        pessimistic_value = int(baseline_value * (1 - 0.08 - 0.005 * i))  # Increasingly pessimistic
-        
-        # Add to data lists
-        baseline_data.append(baseline_value)
-        optimistic_data.append(optimistic_value)
-        pessimistic_data.append(pessimistic_value)
-    
-    # Create plot
-    fig = go.Figure()
-    
-    # Add trace for each scenario
-    fig.add_trace(go.Scatter(
-        x=date_range, 
-        y=baseline_data,
-        mode='lines+markers',
-        name='Baseline Forecast',
-        line=dict(color='#0056a3', width=3),
-        marker=dict(size=8)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=date_range, 
-        y=optimistic_data,
-        mode='lines+markers',
-        name='Optimistic Scenario',
-        line=dict(color='#00AA00', width=2, dash='dot'),
-        marker=dict(size=7)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=date_range, 
-        y=pessimistic_data,
-        mode='lines+markers',
-        name='Pessimistic Scenario',
-        line=dict(color='#AA0000', width=2, dash='dot'),
-        marker=dict(size=7)
-    ))
-    
-    # Customize layout
-    fig.update_layout(
-        title=f"{product} - 12 Month Forecast",
-        title_font=dict(family="VT323, monospace", size=24),
-        xaxis_title="Month",
-        yaxis_title="Projected Sales Units",
-        legend=dict(
-            font=dict(family="Space Mono, monospace", size=10),
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        height=400,
-        margin=dict(l=20, r=20, t=70, b=40),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(
-            family="Space Mono, monospace",
-            size=12,
-            color="#000000"
-        ),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(0,0,0,0.1)'
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(0,0,0,0.1)'
-        )
-    )
-    
-    return fig
+# ---- MAIN APP FUNCTION ----
 
-def create_waste_reduction_chart():
-    # Create monthly data points for a year
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    
-    # Baseline waste (without optimization)
-    baseline_waste = [380, 410, 395, 420, 450, 430, 
-                     470, 460, 440, 410, 390, 420]
-    
-    # Optimized waste (with AI predictions)
-    optimized_waste = [380, 370, 330, 300, 280, 250, 
-                      240, 230, 210, 200, 190, 180]
-    
-    # Calculate savings
-    savings = [baseline_waste[i] - optimized_waste[i] for i in range(len(months))]
-    
-    # Cumulative savings
-    cumulative_savings = [sum(savings[:i+1]) for i in range(len(savings))]
-    
-    # Create plot
-    fig = go.Figure()
-    
-    # Add both waste lines
-    fig.add_trace(go.Scatter(
-        x=months, 
-        y=baseline_waste,
-        mode='lines+markers',
-        name='Baseline Waste',
-        line=dict(color='#AA0000', width=3),
-        marker=dict(size=8)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=months, 
-        y=optimized_waste,
-        mode='lines+markers',
-        name='Optimized Waste',
-        line=dict(color='#00AA00', width=3),
-        marker=dict(size=8)
-    ))
-    
-    # Add savings bar chart
-    fig.add_trace(go.Bar(
-        x=months,
-        y=savings,
-        name='Monthly Savings',
-        marker_color='#0056a3',
-        opacity=0.7,
-        yaxis='y2'
-    ))
-    
-    # Configure layout with two y-axes
-    fig.update_layout(
-        title="Waste Reduction Simulation",
-        title_font=dict(family="VT323, monospace", size=24),
-        xaxis_title="Month",
-        yaxis=dict(
-            title="Waste Units",
-            titlefont=dict(color="#AA0000"),
-            tickfont=dict(color="#AA0000")
-        ),
-        yaxis2=dict(
-            title="Units Saved",
-            titlefont=dict(color="#0056a3"),
-            tickfont=dict(color="#0056a3"),
-            anchor="x",
-            overlaying="y",
-            side="right"
-        ),
-        legend=dict(
-            font=dict(family="Space Mono, monospace", size=10),
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        height=400,
-        margin=dict(l=20, r=80, t=70, b=40),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(
-            family="Space Mono, monospace",
-            size=12,
-            color="#000000"
-        ),
-        bargap=0.15,
-        barmode='group'
+def configure_from_command_line():
+    """Apply options passed after `--`, e.g. `streamlit run app.py -- --forecast-workers 4`"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--forecast-workers', type=int, default=None)
+    args, _ = parser.parse_known_args(sys.argv[1:])
+    
+    if args.forecast_workers is not None:
+        set_forecast_workers(args.forecast_workers)
+
+def _accuracy_backtest():
+    """The forecast accuracy KPI, or None and the background job backtesting the sales history for it"""
+    forecast_accuracy = forecast_accuracy_kpi()
+    if forecast_accuracy is not None:
+        return forecast_accuracy, None
+    return None, get_job_runner().submit(backtest_job, versioned=SIMULATOR_DATASET)
+
+def _render_forecast_accuracy():
+    """Forecast Accuracy stat card, a placeholder while its backtest runs. Returns whether its value is final."""
+    forecast_accuracy, job = _accuracy_backtest()
+    if forecast_accuracy is None:
+        display_stat_card("Forecast Accuracy", "n/a" if job.status == FAILED else "…", None, "🎯")
+        return job.done
+    display_stat_card("Forecast Accuracy", f"{forecast_accuracy['accuracy']}%", forecast_accuracy['change'], "🎯")
+    return True
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _poll_forecast_accuracy():
+    """Refresh only the Forecast Accuracy card while its backtest runs"""
+    if _render_forecast_accuracy():
+        # The stored run is found on one full rerun, which renders the card without polling
+        st.rerun()
+
+def _simulation_jobs(product, trend, promotion, seasonality):
+    """The simulator's background jobs for one set of controls, submitted unless they already exist"""
+    runner = get_job_runner()
+    # Repeated parameters reuse the finished job
+    forecast = runner.submit(
+        forecast_job,
+        versioned=SIMULATOR_DATASET,
+        product=product,
+        trend=trend,
+        promotion=promotion,
+        seasonality=seasonality
     )
-    
-    return fig
+    # The surface covers every slider setting, so it only recomputes for a new product or trend
+    sensitivity = runner.submit(sensitivity_job, versioned=SIMULATOR_DATASET, product=product, trend=trend)
+    # The replenishment plan also reads inventory, so it follows every dataset
+    safety_stock = runner.submit(safety_stock_job, product=product)
+    return forecast, sensitivity, safety_stock
 
-def create_heatmap_data():
-    # Create a sample heatmap of country x product demand
-    countries = [
-        'France', 'Germany', 'UK', 'Spain', 'Italy', 
-        'Netherlands', 'Belgium', 'Poland', 'Sweden'
-    ]
-    
-    products = [
-        'Activia Yogurt', 'Alpro Soya', 'Danone Greek', 'Evian Water', 
-        'Actimel Probiotic', 'Volvic Water', 'Oykos Yogurt', 'Danette Dessert'
-    ]
-    
-    # Create a matrix of demand values
-    demand_values = []
-    for country in countries:
-        country_values = []
-        for product in products:
-            # Generate realistic but random values
-            # Some countries prefer certain products
-            if 'Water' in product and country in ['France', 'Italy', 'Spain']:
-                base_value = random.randint(70, 100)
-            elif 'Yogurt' in product and country in ['Germany', 'Poland', 'Sweden']:
-                base_value = random.randint(70, 100)
-            elif 'Soya' in product and country in ['UK', 'Netherlands', 'Belgium']:
-                base_value = random.randint(70, 100)
-            else:
-                base_value = random.randint(30, 70)
-            
-            country_values.append(base_value)
-        demand_values.append(country_values)
+def _render_simulation_results(product, trend, promotion, seasonality):
+    """Forecast chart, summary and sensitivity surface of the simulator controls. Returns whether their jobs finished."""
+    forecast, sensitivity, safety_stock = _simulation_jobs(product, trend, promotion, seasonality)
+    forecast.wait(0.1)
+    
+    if forecast.status == 'done':
+        st.plotly_chart(figure_from_json(forecast.result['figure']), use_container_width=True)
+    elif forecast.status == 'failed':
+        st.error(f"Forecast failed: {forecast.error}")
+    else:
+        st.progress(forecast.progress, text=forecast.message)
+    
+    # Summary of forecast
+    if trend == "increasing":
+        trend_text = "significant growth"
+        risk_level = "Low"
+        risk_color = "#00AA00"
+    elif trend == "decreasing":
+        trend_text = "declining demand"
+        risk_level = "High"
+        risk_color = "#AA0000"
+    else:
+        trend_text = "steady demand"
+        risk_level = "Medium"
+        risk_color = "#FFAA00"
+    
+    projection_text = ""
+    if forecast.status == 'done':
+        summary = forecast.result['summary']
+        projection_text = (f"<p>Projected 12-month sales: <strong>{summary['total']:,} units</strong> "
+                           f"(peak in {summary['peak_month']}, lowest in {summary['lowest_month']})</p>")
+    
+    if safety_stock.status == 'done':
+        safety_stock_text = f"{safety_stock.result:,} units"
+    elif safety_stock.status == 'failed':
+        safety_stock_text = "unavailable"
+    else:
+        safety_stock_text = "…"
+    
+    st.markdown(f"""
+    <div style="background-color: white; border: 3px solid #0056a3; padding: 15px; margin: 15px 0; box-shadow: 5px 5px 0px 0px rgba(0,0,0,0.5);">
+        <h4 style="margin-top: 0; font-family: 'VT323', monospace; color: #0056a3;">FORECAST SUMMARY</h4>
+        <p>The AI forecasting model predicts <strong>{trend_text}</strong> for {product} over the next 12 months.</p>
+        {projection_text}
+        <p>Risk of stockout: <span style="color: {risk_color}; font-weight: bold;">{risk_level}</span></p>
+        <p>Recommended safety stock: <strong>{safety_stock_text}</strong> across all warehouses</p>
+        <p>With optimized ordering based on this forecast, estimated waste reduction: <strong>{random.randint(15, 35)}%</strong></p>
+    </div>
+    """, unsafe_allow_html=True)
     
-    # Create heatmap using plotly
-    fig = go.Figure(data=go.Heatmap(
-        z=demand_values,
-        x=products,
-        y=countries,
-        colorscale=[
-            [0, '#E9F5FF'],  # Light blue for low values
-            [0.5, '#0056a3'],  # Medium blue for mid values
-            [1, '#00254d']  # Dark blue for high values
-        ],
-        showscale=True,
-        colorbar=dict(
-            title="Demand Index",
-            titleside="right",
-            titlefont=dict(family="VT323, monospace", size=16),
-            tickfont=dict(family="Space Mono, monospace", size=12),
+    sensitivity.wait(0.1)
+    
+    if sensitivity.status == 'done':
+        st.plotly_chart(
+            create_sensitivity_surface(
+                product,
+                sensitivity.result,
+                current=(promotion, seasonality),
+                value_label="Peak Monthly Demand (P95)"
+            ),
+            use_container_width=True
         )
-    ))
-    
-    fig.update_layout(
-        title="Product Demand by Country",
-        title_font=dict(family="VT323, monospace", size=24),
-        xaxis=dict(
-            title="Product",
-            tickfont=dict(family="VT323, monospace", size=12),
-            titlefont=dict(family="VT323, monospace", size=16),
-        ),
-        yaxis=dict(
-            title="Country",
-            tickfont=dict(family="VT323, monospace", size=12),
-            titlefont=dict(family="VT323, monospace", size=16),
-        ),
-        height=500,
-        margin=dict(l=50, r=50, t=70, b=70),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-    )
-    
-    for i, country in enumerate(countries):
-        for j, product in enumerate(products):
-            fig.add_annotation(
-                x=product,
-                y=country,
-                text=str(demand_values[i][j]),
-                showarrow=False,
-                font=dict(
-                    family="Space Mono, monospace",
-                    size=10,
-                    color="white" if demand_values[i][j] > 50 else "black"
-                )
-            )
+    elif sensitivity.status == 'failed':
+        st.error(f"Sensitivity analysis failed: {sensitivity.error}")
+    else:
+        st.progress(sensitivity.progress, text=sensitivity.message)
     
-    return fig
+    return forecast.done and sensitivity.done and safety_stock.done
 
-# ---- MAIN APP FUNCTION ----
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _poll_simulation_results(product, trend, promotion, seasonality):
+    """Refresh only the simulator results while their jobs run"""
+    if _render_simulation_results(product, trend, promotion, seasonality):
+        # Every job finished: one full rerun renders the results without polling
+        st.rerun()
 
 def main():
+    # Command line options
+    configure_from_command_line()
+    
+    # Simulator warm-up: starts once per server process, later reruns return immediately
+    start_warmup()
+    
     # Add custom CSS
     add_custom_css()
     
@@ -1021,10 +650,19 @@ def main():
         # Key performance indicators
         st.markdown("<p>Current supply chain performance metrics:</p>", unsafe_allow_html=True)
         
+        # Get inventory data and the pre-aggregated sales cubes
+        data_source = get_data_source()
+        inventory_df = data_source.load_inventory()
+        stock_turnover = calculate_stock_turnover(data_source.load_sales_cubes(), inventory_df)
+        
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            display_stat_card("Forecast Accuracy", "92.4%", 3.5, "🎯")
+            _, backtest = _accuracy_backtest()
+            if backtest is None or backtest.done:
+                _render_forecast_accuracy()
+            else:
+                _poll_forecast_accuracy()
         
         with col2:
             display_stat_card("On-Shelf Availability", "97.8%", 1.2, "🛒")
@@ -1033,15 +671,13 @@ def main():
             display_stat_card("Waste Reduction", "32%", 8.5, "♻️")
         
         with col4:
-            display_stat_card("Stock Turnover", "14.3", -2.1, "🔄")
+            display_stat_card("Stock Turnover", f"{stock_turnover['turnover']}", stock_turnover['change_pct'], "🔄")
         
         pixel_divider()
         
         # Supply status
         st.markdown("<h3>INVENTORY STATUS</h3>", unsafe_allow_html=True)
         
-        inventory_df = create_mock_inventory_data()
-        
         # Calculate stock status distribution
         stock_status = inventory_df['status'].value_counts().reset_index()
         stock_status.columns = ['Status', 'Count']
@@ -1087,13 +723,13 @@ def main():
             st.plotly_chart(fig, use_container_width=True)
             
             # Calculate expiry risk
-            expiry_risk = inventory_df[inventory_df['expiry_risk'] > 30]
+            expiry_risk = calculate_expiry_risk(inventory_df, threshold=30, top_n=5)
             
-            st.markdown(f"<h4>High Expiry Risk Items: {len(expiry_risk)}</h4>", unsafe_allow_html=True)
+            st.markdown(f"<h4>High Expiry Risk Items: {expiry_risk['count']}</h4>", unsafe_allow_html=True)
             
-            if not expiry_risk.empty:
+            if expiry_risk['count']:
                 # Show top 5 highest risk items
-                top_risk = expiry_risk.sort_values('expiry_risk', ascending=False).head(5)
+                top_risk = expiry_risk['top_items']
                 
                 for _, item in top_risk.iterrows():
                     display_health_stats(
@@ -1104,15 +740,9 @@ def main():
         with col2:
             st.markdown("<h4>Stock Levels by Warehouse</h4>", unsafe_allow_html=True)
             
-            # Create a grouped bar chart of stock levels by warehouse
-            warehouse_summary = inventory_df.groupby('warehouse').agg({
-                'current_stock': 'sum',
-                'max_capacity': 'sum'
-            }).reset_index()
-            
-            # Calculate utilization percentage
-            warehouse_summary['utilization'] = (warehouse_summary['current_stock'] / 
-                                               warehouse_summary['max_capacity'] * 100).round(1)
+            # Create a grouped bar chart of stock levels by warehouse,
+            # with utilization percentage
+            warehouse_summary = calculate_warehouse_utilization(inventory_df)
             
             fig = go.Figure()
             
@@ -1208,8 +838,8 @@ def main():
         # Country prioritization
         st.markdown("<h2>COUNTRY REQUEST PRIORITIZATION</h2>", unsafe_allow_html=True)
         
-        # Create mock country requests data
-        requests_df = create_mock_country_requests()
+        # Country requests are served from the indexed request store
+        request_store = get_request_store()
         
         col1, col2 = st.columns([2, 1])
         
@@ -1217,7 +847,7 @@ def main():
             st.markdown("<h3>TOP PRIORITY REQUESTS</h3>", unsafe_allow_html=True)
             
             # Display top 5 priority requests
-            top_requests = requests_df.head(5)
+            top_requests = request_store.top_requests(5)
             
             for _, request in top_requests.iterrows():
                 display_priority_item(
@@ -1231,7 +861,7 @@ def main():
             st.markdown("<h3>REQUEST STATS</h3>", unsafe_allow_html=True)
             
             # Count by priority
-            priority_counts = requests_df['priority'].value_counts().sort_index()
+            priority_counts = request_store.count_by('priority').reindex([1, 2, 3], fill_value=0)
             
             # Create simple bar chart
             fig = px.bar(
@@ -1262,7 +892,7 @@ def main():
             st.plotly_chart(fig, use_container_width=True)
             
             # Count by status
-            status_counts = requests_df['status'].value_counts()
+            status_counts = request_store.count_by('status').sort_values(ascending=False)
             
             # Create horizontal bars for status
             statuses = status_counts.index.tolist()
@@ -1291,11 +921,30 @@ def main():
         # Country-product heatmap
         st.markdown("<h3>PRODUCT DEMAND BY COUNTRY</h3>", unsafe_allow_html=True)
         
-        heatmap_fig = create_heatmap_data()
+        heatmap_fig = create_heatmap_data(get_data_source().load_sales_cubes().demand_index())
         st.plotly_chart(heatmap_fig, use_container_width=True)
         
         with st.expander("View All Country Requests"):
-            # Display full table with request status
+            filter_col1, filter_col2 = st.columns(2)
+            
+            with filter_col1:
+                country_filter = st.selectbox(
+                    "Country:",
+                    ["All"] + request_store.count_by('country').index.tolist()
+                )
+            
+            with filter_col2:
+                status_filter = st.selectbox(
+                    "Status:",
+                    ["All"] + request_store.count_by('status').index.tolist()
+                )
+            
+            # Display full table with request status, highest priority first
+            requests_df = request_store.requests(
+                country=None if country_filter == "All" else country_filter,
+                status=None if status_filter == "All" else status_filter,
+                limit=1000
+            )
             display_df = requests_df[['country', 'request_type', 'priority_score', 
                                      'submission_date', 'status']]
             display_df.columns = ['Country', 'Request Type', 'Priority Score', 
@@ -1312,33 +961,27 @@ def main():
         with col1:
             st.markdown("<h3>Simulation Controls</h3>", unsafe_allow_html=True)
             
-            selected_product = st.selectbox(
-                "Select Product:",
-                [
-                    'Activia Yogurt', 'Alpro Soya', 'Danone Greek', 
-                    'Evian Water', 'Actimel Probiotic', 'Volvic Water'
-                ]
-            )
+            selected_product = st.selectbox("Select Product:", SIMULATOR_PRODUCTS)
             
             selected_trend = st.radio(
                 "Market Trend:",
-                ["increasing", "steady", "decreasing"]
+                list(MARKET_TRENDS)
             )
             
             promotion_impact = st.slider(
                 "Promotion Impact (%)",
-                min_value=0,
-                max_value=50,
+                min_value=PROMOTION_STEPS[0],
+                max_value=PROMOTION_STEPS[-1],
                 value=20,
-                step=5
+                step=PROMOTION_STEPS[1] - PROMOTION_STEPS[0]
             )
             
             seasonality_strength = st.slider(
                 "Seasonality Strength",
-                min_value=1,
-                max_value=10,
-                value=5,
-                step=1
+                min_value=SEASONALITY_STEPS[0],
+                max_value=SEASONALITY_STEPS[-1],
+                value=DEFAULT_SEASONALITY_STRENGTH,
+                step=SEASONALITY_STEPS[1] - SEASONALITY_STEPS[0]
             )
             
             run_simulation = st.button("RUN SIMULATION")
@@ -1347,38 +990,12 @@ def main():
             st.markdown("<h3>12-Month Forecast</h3>", unsafe_allow_html=True)
             
             if run_simulation or selected_product:
-                # Display loading message
-                with st.spinner("Generating AI forecast..."):
-                    import time
-                    time.sleep(1)  # Simulate processing time
-                
-                # Create and display forecast
-                forecast_fig = create_forecast_scenario(selected_product, selected_trend)
-                st.plotly_chart(forecast_fig, use_container_width=True)
-                
-                # Summary of forecast
-                if selected_trend == "increasing":
-                    trend_text = "significant growth"
-                    risk_level = "Low"
-                    risk_color = "#00AA00"
-                elif selected_trend == "decreasing":
-                    trend_text = "declining demand"
-                    risk_level = "High"
-                    risk_color = "#AA0000"
+                controls = (selected_product, selected_trend, promotion_impact, seasonality_strength)
+                # While jobs run, only the results panel refreshes, until they have all finished
+                if all(job.done for job in _simulation_jobs(*controls)):
+                    _render_simulation_results(*controls)
                 else:
-                    trend_text = "steady demand"
-                    risk_level = "Medium"
-                    risk_color = "#FFAA00"
-                
-                st.markdown(f"""
-                <div style="background-color: white; border: 3px solid #0056a3; padding: 15px; margin: 15px 0; box-shadow: 5px 5px 0px 0px rgba(0,0,0,0.5);">
-                    <h4 style="margin-top: 0; font-family: 'VT323', monospace; color: #0056a3;">FORECAST SUMMARY</h4>
-                    <p>The AI forecasting model predicts <strong>{trend_text}</strong> for {selected_product} over the next 12 months.</p>
-                    <p>Risk of stockout: <span style="color: {risk_color}; font-weight: bold;">{risk_level}</span></p>
-                    <p>Recommended safety stock: <strong>{random.randint(500, 2000)} units</strong></p>
-                    <p>With optimized ordering based on this forecast, estimated waste reduction: <strong>{random.randint(15, 35)}%</strong></p>
-                </div>
-                """, unsafe_allow_html=True)
+                    _poll_simulation_results(*controls)
         
         pixel_divider()
         
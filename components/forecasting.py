@@ -1,9 +1,108 @@
 import streamlit as st
 import pandas as pd
-import time
+import random
 
 from utils.styling import pixel_divider
-from utils.charts import create_forecast_scenario
+from utils.cache import figure_from_json
+from utils.charts import create_sensitivity_surface
+from utils.jobs import (JOB_POLL_SECONDS, SIMULATOR_DATASET, get_job_runner, forecast_job, safety_stock_job,
+                        sensitivity_job)
+from utils.scenarios import (DEFAULT_SEASONALITY_STRENGTH, MARKET_TRENDS, PROMOTION_STEPS, SEASONALITY_STEPS,
+                             SIMULATOR_PRODUCTS)
+
+def _simulation_jobs(product, trend, promotion, seasonality):
+    """The simulator's background jobs for one set of controls, submitted unless they already exist"""
+    runner = get_job_runner()
+    # Repeated parameters reuse the finished job
+    forecast = runner.submit(
+        forecast_job,
+        versioned=SIMULATOR_DATASET,
+        product=product,
+        trend=trend,
+        promotion=promotion,
+        seasonality=seasonality
+    )
+    # The surface covers every slider setting, so it only recomputes for a new product or trend
+    sensitivity = runner.submit(sensitivity_job, versioned=SIMULATOR_DATASET, product=product, trend=trend)
+    # The replenishment plan also reads inventory, so it follows every dataset
+    safety_stock = runner.submit(safety_stock_job, product=product)
+    return forecast, sensitivity, safety_stock
+
+def _render_simulation_results(product, trend, promotion, seasonality):
+    """Forecast chart, summary and sensitivity surface of the simulator controls. Returns whether their jobs finished."""
+    forecast, sensitivity, safety_stock = _simulation_jobs(product, trend, promotion, seasonality)
+    forecast.wait(0.1)
+    
+    if forecast.status == 'done':
+        st.plotly_chart(figure_from_json(forecast.result['figure']), use_container_width=True)
+    elif forecast.status == 'failed':
+        st.error(f"Forecast failed: {forecast.error}")
+    else:
+        st.progress(forecast.progress, text=forecast.message)
+    
+    # Summary of forecast
+    if trend == "increasing":
+        trend_text = "significant growth"
+        risk_level = "Low"
+        risk_color = "#00AA00"
+    elif trend == "decreasing":
+        trend_text = "declining demand"
+        risk_level = "High"
+        risk_color = "#AA0000"
+    else:
+        trend_text = "steady demand"
+        risk_level = "Medium"
+        risk_color = "#FFAA00"
+    
+    projection_text = ""
+    if forecast.status == 'done':
+        summary = forecast.result['summary']
+        projection_text = (f"<p>Projected 12-month sales: <strong>{summary['total']:,} units</strong> "
+                           f"(peak in {summary['peak_month']}, lowest in {summary['lowest_month']})</p>")
+    
+    if safety_stock.status == 'done':
+        safety_stock_text = f"{safety_stock.result:,} units"
+    elif safety_stock.status == 'failed':
+        safety_stock_text = "unavailable"
+    else:
+        safety_stock_text = "…"
+    
+    st.markdown(f"""
+    <div style="background-color: white; border: 3px solid #0056a3; padding: 15px; margin: 15px 0; box-shadow: 5px 5px 0px 0px rgba(0,0,0,0.5);">
+        <h4 style="margin-top: 0; font-family: 'VT323', monospace; color: #0056a3;">FORECAST SUMMARY</h4>
+        <p>The AI forecasting model predicts <strong>{trend_text}</strong> for {product} over the next 12 months.</p>
+        {projection_text}
+        <p>Risk of stockout: <span style="color: {risk_color}; font-weight: bold;">{risk_level}</span></p>
+        <p>Recommended safety stock: <strong>{safety_stock_text}</strong> across all warehouses</p>
+        <p>With optimized ordering based on this forecast, estimated waste reduction: <strong>{random.randint(15, 35)}%</strong></p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    sensitivity.wait(0.1)
+    
+    if sensitivity.status == 'done':
+        st.plotly_chart(
+            create_sensitivity_surface(
+                product,
+                sensitivity.result,
+                current=(promotion, seasonality),
+                value_label="Peak Monthly Demand (P95)"
+            ),
+            use_container_width=True
+        )
+    elif sensitivity.status == 'failed':
+        st.error(f"Sensitivity analysis failed: {sensitivity.error}")
+    else:
+        st.progress(sensitivity.progress, text=sensitivity.message)
+    
+    return forecast.done and sensitivity.done and safety_stock.done
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _poll_simulation_results(product, trend, promotion, seasonality):
+    """Refresh only the simulator results while their jobs run"""
+    if _render_simulation_results(product, trend, promotion, seasonality):
+        # Every job finished: one full rerun renders the results without polling
+        st.rerun()
 
 def render_forecasting_tab():
     """Render the Demand Forecast Simulator tab"""
@@ -15,33 +114,27 @@ def render_forecasting_tab():
     with col1:
         st.markdown("<h3>Simulation Controls</h3>", unsafe_allow_html=True)
         
-        selected_product = st.selectbox(
-            "Select Product:",
-            [
-                'Activia Yogurt', 'Alpro Soya', 'Danone Greek', 
-                'Evian Water', 'Actimel Probiotic', 'Volvic Water'
-            ]
-        )
+        selected_product = st.selectbox("Select Product:", SIMULATOR_PRODUCTS)
         
         selected_trend = st.radio(
             "Market Trend:",
-            ["increasing", "steady", "decreasing"]
+            list(MARKET_TRENDS)
         )
         
         promotion_impact = st.slider(
             "Promotion Impact (%)",
-            min_value=0,
-            max_value=50,
+            min_value=PROMOTION_STEPS[0],
+            max_value=PROMOTION_STEPS[-1],
             value=20,
-            step=5
+            step=PROMOTION_STEPS[1] - PROMOTION_STEPS[0]
         )
         
         seasonality_strength = st.slider(
             "Seasonality Strength",
-            min_value=1,
-            max_value=10,
-            value=5,
-            step=1
+            min_value=SEASONALITY_STEPS[0],
+            max_value=SEASONALITY_STEPS[-1],
+            value=DEFAULT_SEASONALITY_STRENGTH,
+            step=SEASONALITY_STEPS[1] - SEASONALITY_STEPS[0]
         )
         
         run_simulation = st.button("RUN SIMULATION")
@@ -50,38 +143,12 @@ def render_forecasting_tab():
         st.markdown("<h3>12-Month Forecast</h3>", unsafe_allow_html=True)
         
         if run_simulation or selected_product:
-            # Display loading message
-            with st.spinner("Generating AI forecast..."):
-                time.sleep(1)  # Simulate processing time
-            
-            # Create and display forecast
-            forecast_fig = create_forecast_scenario(selected_product, selected_trend)
-            st.plotly_chart(forecast_fig, use_container_width=True)
-            
-            # Summary of forecast
-            if selected_trend == "increasing":
-                trend_text = "significant growth"
-                risk_level = "Low"
-                risk_color = "#00AA00"
-            elif selected_trend == "decreasing":
-                trend_text = "declining demand"
-                risk_level = "High"
-                risk_color = "#AA0000"
+            controls = (selected_product, selected_trend, promotion_impact, seasonality_strength)
+            # While jobs run, only the results panel refreshes, until they have all finished
+            if all(job.done for job in _simulation_jobs(*controls)):
+                _render_simulation_results(*controls)
             else:
-                trend_text = "steady demand"
-                risk_level = "Medium"
-                risk_color = "#FFAA00"
-            
-            import random
-            st.markdown(f"""
-            <div style="background-color: white; border: 3px solid #0056a3; padding: 15px; margin: 15px 0; box-shadow: 5px 5px 0px 0px rgba(0,0,0,0.5);">
-                <h4 style="margin-top: 0; font-family: 'VT323', monospace; color: #0056a3;">FORECAST SUMMARY</h4>
-                <p>The AI forecasting model predicts <strong>{trend_text}</strong> for {selected_product} over the next 12 months.</p>
-                <p>Risk of stockout: <span style="color: {risk_color}; font-weight: bold;">{risk_level}</span></p>
-                <p>Recommended safety stock: <strong>{random.randint(500, 2000)} units</strong></p>
-                <p>With optimized ordering based on this forecast, estimated waste reduction: <strong>{random.randint(15, 35)}%</strong></p>
-            </div>
-            """, unsafe_allow_html=True)
+                _poll_simulation_results(*controls)
     
     pixel_divider()
     
@@ -186,4 +253,5 @@ def render_forecasting_tab():
                 </div>
             </div>
         </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+        """, unsafe_allow_html=True)
+    
@@ -1,17 +1,17 @@
 import streamlit as st
-import pandas as pd
 
 from utils.styling import display_priority_item, pixel_divider, display_progress_bar, display_customized_dataframe
 from utils.charts import create_score_breakdown, create_heatmap_data
-from data.sample_data import create_mock_country_requests
+from data.request_store import get_request_store
+from data.sources import get_data_source
 
 def render_prioritization_tab():
     """Render the Country Request Prioritization tab"""
     # Country prioritization
     st.markdown("<h2>COUNTRY REQUEST PRIORITIZATION</h2>", unsafe_allow_html=True)
     
-    # Create mock country requests data
-    requests_df = create_mock_country_requests()
+    # Country requests are served from the indexed request store
+    request_store = get_request_store()
     
     col1, col2 = st.columns([2, 1])
     
@@ -19,7 +19,7 @@ def render_prioritization_tab():
         st.markdown("<h3>TOP PRIORITY REQUESTS</h3>", unsafe_allow_html=True)
         
         # Display top 5 priority requests
-        top_requests = requests_df.head(5)
+        top_requests = request_store.top_requests(5)
         
         for _, request in top_requests.iterrows():
             display_priority_item(
@@ -33,7 +33,7 @@ def render_prioritization_tab():
         st.markdown("<h3>REQUEST STATS</h3>", unsafe_allow_html=True)
         
         # Count by priority
-        priority_counts = requests_df['priority'].value_counts().sort_index()
+        priority_counts = request_store.count_by('priority').reindex([1, 2, 3], fill_value=0)
         
         # Create simple bar chart
         import plotly.express as px
@@ -65,7 +65,7 @@ def render_prioritization_tab():
         st.plotly_chart(fig, use_container_width=True)
         
         # Count by status
-        status_counts = requests_df['status'].value_counts()
+        status_counts = request_store.count_by('status').sort_values(ascending=False)
         
         # Create horizontal bars for status
         statuses = status_counts.index.tolist()
@@ -94,11 +94,30 @@ def render_prioritization_tab():
     # Country-product heatmap
     st.markdown("<h3>PRODUCT DEMAND BY COUNTRY</h3>", unsafe_allow_html=True)
     
-    heatmap_fig = create_heatmap_data()
+    heatmap_fig = create_heatmap_data(get_data_source().load_sales_cubes().demand_index())
     st.plotly_chart(heatmap_fig, use_container_width=True)
     
     with st.expander("View All Country Requests"):
-        # Display full table with request status
+        filter_col1, filter_col2 = st.columns(2)
+        
+        with filter_col1:
+            country_filter = st.selectbox(
+                "Country:",
+                ["All"] + request_store.count_by('country').index.tolist()
+            )
+        
+        with filter_col2:
+            status_filter = st.selectbox(
+                "Status:",
+                ["All"] + request_store.count_by('status').index.tolist()
+            )
+        
+        # Display full table with request status, highest priority first
+        requests_df = request_store.requests(
+            country=None if country_filter == "All" else country_filter,
+            status=None if status_filter == "All" else status_filter,
+            limit=1000
+        )
         display_df = requests_df[['country', 'request_type', 'priority_score', 
                                  'submission_date', 'status']]
         display_df.columns = ['Country', 'Request Type', 'Priority Score', 
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+# Aggregation grains and the pandas period frequency of each
+GRAINS = {
+    'daily': 'D',
+    'weekly': 'W-SUN',
+    'monthly': 'M'
+}
+
+def _dimension_codes(values):
+    """Integer codes and labels of a (categorical or plain) dimension column"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), list(values.cat.categories)
+    codes, labels = pd.factorize(values)
+    return codes, list(labels)
+
+class SalesCubes:
+    """Sales totals as dense country x product x period cubes, one int64 array per grain"""
+
+    def __init__(self, countries, products, cubes, periods, start_date, end_date):
+        self.countries = countries
+        self.products = products
+        self.cubes = cubes
+        self.periods = periods
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def cube(self, grain='monthly'):
+        """The (countries, products, periods) array for a grain"""
+        if grain not in self.cubes:
+            raise ValueError(f"Unknown grain '{grain}', expected one of {list(GRAINS)}")
+        return self.cubes[grain]
+
+    def _last(self, grain, last_periods):
+        cube = self.cube(grain)
+        return cube if last_periods is None else cube[:, :, -last_periods:]
+
+    def complete_periods(self, grain='monthly'):
+        """Boolean mask of the periods fully covered by the history (the edges may be partial)"""
+        periods = self.periods[grain]
+        return ((periods.start_time >= self.start_date) &
+                (periods.end_time.normalize() <= self.end_date))
+
+    def series(self, grain='monthly', product=None, country=None, complete_only=False):
+        """Sales per period, for one product and/or country or for the total"""
+        cube = self.cube(grain)
+        if country is not None:
+            cube = cube[self.countries.index(country)][None]
+        if product is not None:
+            cube = cube[:, self.products.index(product)][:, None]
+
+        series = pd.Series(
+            cube.sum(axis=(0, 1)),
+            index=self.periods[grain].to_timestamp(),
+            name='sales'
+        )
+
+        return series[self.complete_periods(grain)] if complete_only else series
+
+    def frame(self, grain='monthly'):
+        """Long country, product, period, sales frame of a cube"""
+        cube = self.cube(grain)
+        n_countries, n_products, n_periods = cube.shape
+
+        return pd.DataFrame({
+            'country': pd.Categorical.from_codes(
+                np.repeat(np.arange(n_countries), n_products * n_periods), categories=self.countries),
+            'product': pd.Categorical.from_codes(
+                np.tile(np.repeat(np.arange(n_products), n_periods), n_countries), categories=self.products),
+            'period': np.tile(self.periods[grain].to_timestamp(), n_countries * n_products),
+            'sales': cube.ravel()
+        })
+
+    def totals(self, grain='monthly', last_periods=None):
+        """Country x product totals over the last ``last_periods`` periods (all when None)"""
+        return pd.DataFrame(
+            self._last(grain, last_periods).sum(axis=2),
+            index=pd.Index(self.countries, name='country'),
+            columns=pd.Index(self.products, name='product')
+        )
+
+    def demand_index(self, last_months=12):
+        """Country x product demand index (0-100): each product's sales relative to its best country"""
+        totals = self.totals('monthly', last_periods=last_months)
+        best = totals.max(axis=0).replace(0, np.nan)
+        return (totals / best * 100).fillna(0).round().astype(int)
+
+    def total_sales(self, last_days=None):
+        """Total units sold, over the last ``last_days`` days when given"""
+        return int(self._last('daily', last_days).sum())
+
+def build_sales_cubes(sales_df, grains=None):
+    """Aggregate a (wide or compact) sales frame into country x product x period cubes with one bincount per grain"""
+    grains = list(GRAINS) if grains is None else grains
+
+    country_codes, countries = _dimension_codes(sales_df['country'])
+    product_codes, products = _dimension_codes(sales_df['product'])
+    n_countries, n_products = len(countries), len(products)
+
+    dates = pd.DatetimeIndex(sales_df['date'])
+    sales = sales_df['sales'].to_numpy()
+    series_codes = country_codes.astype(np.int64) * n_products + product_codes
+
+    cubes, periods = {}, {}
+    for grain in grains:
+        ordinals = dates.to_period(GRAINS[grain]).asi8
+        first = int(ordinals.min())
+        period_codes = ordinals - first
+        n_periods = int(period_codes.max()) + 1
+
+        totals = np.bincount(
+            series_codes * n_periods + period_codes,
+            weights=sales,
+            minlength=n_countries * n_products * n_periods
+        )
+
+        cubes[grain] = totals.round().astype(np.int64).reshape(n_countries, n_products, n_periods)
+        periods[grain] = pd.period_range(
+            pd.Period(ordinal=first, freq=GRAINS[grain]), periods=n_periods, freq=GRAINS[grain])
+
+    return SalesCubes(countries, products, cubes, periods, dates.min().normalize(), dates.max().normalize())
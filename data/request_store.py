@@ -0,0 +1,142 @@
+import os
+
+import pandas as pd
+
+from data.sources import SQLiteStore, get_data_source
+from data.storage import DEFAULT_DATA_DIR
+from utils.cache import process_singleton
+from utils.metrics import PRIORITY_CRITERIA, calculate_priority_scores
+
+# SQLite database holding the country request backlog
+DEFAULT_REQUEST_DB = os.environ.get('STOCKQUEST_REQUEST_DB', os.path.join(DEFAULT_DATA_DIR, 'requests.db'))
+
+REQUEST_COLUMNS = [
+    'country', 'request_type', 'priority_score', 'priority',
+    *PRIORITY_CRITERIA, 'submission_date', 'status'
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS country_requests (
+    request_id INTEGER PRIMARY KEY,
+    country TEXT NOT NULL,
+    request_type TEXT NOT NULL,
+    priority_score INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    market_size INTEGER,
+    growth_potential INTEGER,
+    technical_feasibility INTEGER,
+    strategic_alignment INTEGER,
+    cost_estimate INTEGER,
+    submission_date TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_requests_priority_score
+    ON country_requests (priority_score DESC);
+CREATE INDEX IF NOT EXISTS idx_requests_country
+    ON country_requests (country, priority_score DESC);
+CREATE INDEX IF NOT EXISTS idx_requests_status
+    ON country_requests (status, priority_score DESC);
+CREATE INDEX IF NOT EXISTS idx_requests_submission_date
+    ON country_requests (submission_date);
+"""
+
+# Columns count_by() may group on
+GROUPABLE_COLUMNS = ['country', 'status', 'priority', 'request_type']
+
+class RequestStore(SQLiteStore):
+    """Country request backlog in an indexed SQLite table"""
+
+    schema = SCHEMA
+
+    def __init__(self, path=None, pool_size=4):
+        super().__init__(DEFAULT_REQUEST_DB if path is None else path, pool_size=pool_size)
+
+    def add_requests(self, requests_df):
+        """Insert requests, scoring any that have no priority score yet. Returns the row count."""
+        df = requests_df.copy()
+
+        if 'priority_score' not in df.columns or 'priority' not in df.columns:
+            scores = calculate_priority_scores(df)
+            df['priority_score'] = scores['score']
+            df['priority'] = scores['level']
+
+        for name, default in PRIORITY_CRITERIA.items():
+            if name not in df.columns:
+                df[name] = default
+
+        df['submission_date'] = pd.to_datetime(df['submission_date']).dt.strftime('%Y-%m-%d')
+
+        rows = df[REQUEST_COLUMNS].astype(object).itertuples(index=False, name=None)
+
+        with self.pool.connection() as conn:
+            conn.executemany(
+                f"INSERT INTO country_requests ({', '.join(REQUEST_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(REQUEST_COLUMNS))})",
+                rows
+            )
+            conn.commit()
+
+        return len(df)
+
+    def count(self):
+        """Number of stored requests"""
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM country_requests').fetchone()[0]
+
+    def _select(self, where, params, limit=None, order_by='priority_score DESC'):
+        sql = f"SELECT request_id, {', '.join(REQUEST_COLUMNS)} FROM country_requests"
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' ORDER BY {order_by}'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params = [*params, int(limit)]
+
+        with self.pool.connection() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def requests(self, country=None, status=None, since=None, limit=None):
+        """Requests matching the filters, highest priority first"""
+        where, params = [], []
+        if country is not None:
+            where.append('country = ?')
+            params.append(country)
+        if status is not None:
+            where.append('status = ?')
+            params.append(status)
+        if since is not None:
+            where.append('submission_date >= ?')
+            params.append(pd.Timestamp(since).strftime('%Y-%m-%d'))
+
+        return self._select(where, params, limit=limit)
+
+    def top_requests(self, n=5, country=None, status=None):
+        """The n highest priority requests, optionally within one country or status"""
+        return self.requests(country=country, status=status, limit=n)
+
+    def count_by(self, column):
+        """Number of requests per value of ``column``"""
+        if column not in GROUPABLE_COLUMNS:
+            raise ValueError(f"Cannot group requests by '{column}'")
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT {column}, COUNT(*) FROM country_requests GROUP BY {column}'
+            ).fetchall()
+
+        return pd.Series(dict(rows), name='count', dtype='int64').sort_index()
+
+    def update_status(self, request_id, status):
+        """Move a request to a new workflow status"""
+        with self.pool.connection() as conn:
+            conn.execute('UPDATE country_requests SET status = ? WHERE request_id = ?',
+                         (status, int(request_id)))
+            conn.commit()
+
+@process_singleton
+def get_request_store():
+    """The process-wide request store, seeded from the data source when empty"""
+    store = RequestStore()
+    if store.count() == 0:
+        store.add_requests(get_data_source().load_country_requests())
+    return store
@@ -1,158 +1,286 @@
 import pandas as pd
 import numpy as np
-import random
 import datetime
 
-def create_mock_sales_data():
-    """Generate mock sales data for demonstration purposes"""
-    # Create date range for the past year
-    end_date = datetime.datetime.now().date()
-    start_date = end_date - datetime.timedelta(days=365)
-    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-    
-    # Products
-    products = [
-        'Activia Yogurt', 'Alpro Soya', 'Danone Greek', 'Evian Water', 
-        'Actimel Probiotic', 'Volvic Water', 'Oykos Yogurt', 'Danette Dessert'
-    ]
+from data.schema import categorical_codes, sales_dtype
+from utils.metrics import PRIORITY_CRITERIA, calculate_priority_scores
+
+PRODUCTS = [
+    'Activia Yogurt', 'Alpro Soya', 'Danone Greek', 'Evian Water', 
+    'Actimel Probiotic', 'Volvic Water', 'Oykos Yogurt', 'Danette Dessert'
+]
+
+COUNTRIES = [
+    'France', 'Germany', 'UK', 'Spain', 'Italy', 
+    'Netherlands', 'Belgium', 'Poland', 'Sweden'
+]
+
+# Countries that can submit requests (a superset of the sales countries)
+REQUEST_COUNTRIES = COUNTRIES + ['Denmark', 'Finland', 'Greece', 'Portugal', 'Ireland']
+
+WAREHOUSES = [
+    'Paris-North', 'Berlin-Central', 'London-East', 'Madrid-South', 
+    'Rome-Central', 'Amsterdam-West', 'Brussels-Central', 'Warsaw-East'
+]
+
+REQUEST_STATUSES = ['New', 'In Review', 'Approved', 'In Progress', 'Completed', 'On Hold']
+
+def scale_names(base_names, n, separator=' '):
+    """Return n unique names, numbering repeats of the base names once they run out"""
+    if n <= len(base_names):
+        return list(base_names[:n])
     
-    # Countries
-    countries = [
-        'France', 'Germany', 'UK', 'Spain', 'Italy', 
-        'Netherlands', 'Belgium', 'Poland', 'Sweden'
+    return [
+        f"{base_names[i % len(base_names)]}{separator}{i // len(base_names) + 1}"
+        for i in range(n)
     ]
+
+def product_family(products):
+    """Classify product names into 'water', 'yogurt' or 'other' families"""
+    names = pd.Series(products, dtype=object).astype(str)
     
-    # Create dataframe structure
-    data = []
+    is_water = names.str.contains('Water', regex=False).to_numpy()
+    is_yogurt = (names.str.contains('Yogurt', regex=False) |
+                 names.str.contains('Greek', regex=False)).to_numpy()
     
-    # Add seasonal patterns and trends
-    for date in date_range:
-        day_of_year = date.dayofyear
-        month = date.month
-        
-        # Weekend effect
-        weekend_factor = 0.8 if date.dayofweek >= 5 else 1.0
+    return np.select([is_water, is_yogurt], ['water', 'yogurt'], default='other')
+
+def _seasonal_amplitude(products):
+    """Seasonal sine amplitude per product (summer peak for water, winter for yogurt)"""
+    family = product_family(products)
+    
+    return np.select(
+        [family == 'water', family == 'yogurt'],
+        [0.3, -0.25],
+        default=0.15
+    )
+
+# Products favoured in some countries: (product keyword, countries)
+REGIONAL_PREFERENCES = [
+    ('Water', ['France', 'Italy', 'Spain']),
+    ('Yogurt', ['Germany', 'Poland', 'Sweden']),
+    ('Soya', ['UK', 'Netherlands', 'Belgium'])
+]
+
+def _regional_preference(countries, products):
+    """(countries, products) sales multiplier, higher where a country favours a product"""
+    # Scaled names such as 'France 2' share the preferences of their base name
+    country_names = pd.Series(countries, dtype=object).astype(str).str.replace(r' \d+$', '', regex=True)
+    product_names = pd.Series(products, dtype=object).astype(str)
+    
+    preference = np.ones((len(countries), len(products)))
+    for keyword, favoured in REGIONAL_PREFERENCES:
+        preference[np.ix_(
+            country_names.isin(favoured).to_numpy(),
+            product_names.str.contains(keyword, regex=False).to_numpy()
+        )] = 1.3
+    
+    return preference
+
+def _root_entropy(seed):
+    """Resolve a seed, SeedSequence or Generator to the entropy of a SeedSequence"""
+    if isinstance(seed, np.random.Generator):
+        return int(seed.integers(2**63))
+    if isinstance(seed, np.random.SeedSequence):
+        # generate_state honours the spawn key, so spawned children differ
+        return [int(word) for word in seed.generate_state(2, np.uint64)]
+    if seed is None:
+        return np.random.SeedSequence().entropy
+    return seed
+
+def _month_noise(entropy, month_start, start_date, end_date, n_countries, n_products):
+    """Draw the random components of one calendar month of sales from a generator keyed on (seed, year, month)"""
+    # Always the whole month, so a day's values never depend on the requested range or chunk size
+    month_days = pd.date_range(start=month_start, periods=month_start.days_in_month, freq='D')
+    rng = np.random.default_rng(
+        np.random.SeedSequence(entropy, spawn_key=(month_start.year, month_start.month))
+    )
+    shape = (len(month_days), n_countries, n_products)
+    
+    base_draw = rng.normal(500, 50, shape)
+    promoted = rng.random(shape) < 0.02  # 2% chance of promotion
+    promotion_factor = rng.uniform(1.5, 2.5, shape)
+    noise = rng.normal(1, 0.1, shape)
+    
+    in_range = (month_days >= start_date) & (month_days <= end_date)
+    
+    return (month_days[in_range], base_draw[in_range], promoted[in_range],
+            promotion_factor[in_range], noise[in_range])
+
+def _iter_month_noise(start_date, end_date, entropy, n_countries, n_products):
+    """Yield the random components for every calendar month in [start_date, end_date]"""
+    for month_start in pd.date_range(start=start_date.replace(day=1), end=end_date, freq='MS'):
+        yield _month_noise(entropy, month_start, start_date, end_date, n_countries, n_products)
+
+def _simulate_sales(date_range, countries, products, base_draw, promoted, promotion_factor, noise,
+                    compact=False):
+    """Apply the seasonal, weekend and promotion model to a (days, countries, products) cube"""
+    n_days, n_countries, n_products = len(date_range), len(countries), len(products)
+    
+    # Weekend effect, shape (days, 1, 1)
+    weekend_factor = np.where(date_range.dayofweek >= 5, 0.8, 1.0)[:, None, None]
+    
+    # Seasonal factor (higher in summer for water, higher in winter for yogurt),
+    # shape (days, 1, products)
+    day_of_year = date_range.dayofyear.to_numpy()[:, None]
+    season_factor = np.maximum(
+        0.7,
+        np.sin(np.pi * day_of_year / 183) * _seasonal_amplitude(products) + 1
+    )[:, None, :]
+    
+    # Base sales (different by country and product)
+    country_factor = 0.8 + 0.4 * (np.arange(n_countries) / n_countries)
+    product_popularity = 0.7 + 0.6 * (np.arange(n_products) / n_products)
+    
+    base_sales = np.trunc(
+        base_draw * country_factor[None, :, None] * product_popularity[None, None, :]
+        * _regional_preference(countries, products)[None, :, :]
+    )
+    
+    # Apply seasonal and weekend factors
+    adjusted_sales = np.trunc(base_sales * season_factor * weekend_factor)
+    
+    # Random promotions (sales spikes)
+    adjusted_sales = np.where(promoted, np.trunc(adjusted_sales * promotion_factor), adjusted_sales)
+    
+    # Add some random noise
+    final_sales = np.maximum(0, np.trunc(adjusted_sales * noise))
+    
+    # Flatten the (days, countries, products) cube in date, country, product order
+    dates = date_range.repeat(n_countries * n_products)
+    
+    if compact:
+        country_codes = np.arange(n_countries, dtype=categorical_codes(n_countries))
+        product_codes = np.arange(n_products, dtype=categorical_codes(n_products))
         
-        # Seasonal factor (higher in summer for water, higher in winter for yogurt)
-        season_factor = {}
-        for product in products:
-            if 'Water' in product:
-                # Water sales peak in summer
-                seasonal_component = np.sin(np.pi * day_of_year / 183) * 0.3 + 1
-            elif 'Yogurt' in product or 'Greek' in product:
-                # Yogurt sales higher in winter
-                seasonal_component = -np.sin(np.pi * day_of_year / 183) * 0.25 + 1
-            else:
-                # Other products have milder seasonality
-                seasonal_component = np.sin(np.pi * day_of_year / 183) * 0.15 + 1
-            
-            season_factor[product] = max(0.7, seasonal_component)
+        return pd.DataFrame({
+            'date': dates,
+            'country': pd.Categorical.from_codes(
+                np.tile(np.repeat(country_codes, n_products), n_days), categories=countries),
+            'product': pd.Categorical.from_codes(
+                np.tile(product_codes, n_days * n_countries), categories=products),
+            'sales': final_sales.astype(sales_dtype(final_sales)).ravel()
+        })
+    
+    return pd.DataFrame({
+        'date': dates,
+        'country': np.tile(np.repeat(np.array(countries, dtype=object), n_products), n_days),
+        'product': np.tile(np.array(products, dtype=object), n_days * n_countries),
+        'sales': final_sales.astype(np.int64).ravel(),
+        'year': dates.year,
+        'month': dates.month,
+        'day': dates.day,
+        'dayofweek': dates.dayofweek
+    })
+
+def create_mock_sales_data(days=365, end_date=None, countries=None, products=None, seed=None,
+                           compact=False):
+    """Generate mock sales data for demonstration purposes (the same seed always gives the same history)"""
+    # Create date range for the past year
+    if end_date is None:
+        end_date = datetime.datetime.now().date()
+    end_date = pd.Timestamp(end_date).normalize()
+    start_date = end_date - pd.Timedelta(days=days)
+    
+    products = list(PRODUCTS if products is None else products)
+    countries = list(COUNTRIES if countries is None else countries)
+    
+    months = list(_iter_month_noise(start_date, end_date, _root_entropy(seed),
+                                    len(countries), len(products)))
+    
+    # Stitch the monthly draws together so the frame is built in one pass
+    date_range = months[0][0].append([month[0] for month in months[1:]])
+    draws = [np.concatenate([month[i] for month in months]) for i in range(1, 5)]
+    
+    return _simulate_sales(date_range, countries, products, *draws, compact=compact)
+
+def iter_mock_sales_data(start_date, end_date, seed=None, chunk_rows=None,
+                         countries=None, products=None, compact=False):
+    """Stream mock sales data as monthly (or ``chunk_rows``) chunks, identical to ``create_mock_sales_data``"""
+    start_date = pd.Timestamp(start_date).normalize()
+    end_date = pd.Timestamp(end_date).normalize()
+    
+    products = list(PRODUCTS if products is None else products)
+    countries = list(COUNTRIES if countries is None else countries)
+    
+    month_frames = (
+        _simulate_sales(month[0], countries, products, *month[1:], compact=compact)
+        for month in _iter_month_noise(start_date, end_date, _root_entropy(seed),
+                                       len(countries), len(products))
+    )
+    
+    if chunk_rows is None:
+        yield from month_frames
+        return
+    
+    buffer = None
+    for frame in month_frames:
+        buffer = frame if buffer is None else pd.concat([buffer, frame], ignore_index=True)
         
-        # Special events/promotions (random spikes)
-        for country in countries:
-            for product in products:
-                # Base sales (different by country and product)
-                country_factor = 0.8 + 0.4 * (countries.index(country) / len(countries))
-                product_popularity = 0.7 + 0.6 * (products.index(product) / len(products))
-                
-                base_sales = int(np.random.normal(500, 50) * country_factor * product_popularity)
-                
-                # Apply seasonal and weekend factors
-                adjusted_sales = int(base_sales * season_factor[product] * weekend_factor)
-                
-                # Random promotions (sales spikes)
-                if np.random.random() < 0.02:  # 2% chance of promotion
-                    promotion_factor = np.random.uniform(1.5, 2.5)
-                    adjusted_sales = int(adjusted_sales * promotion_factor)
-                
-                # Add some random noise
-                final_sales = max(0, int(adjusted_sales * np.random.normal(1, 0.1)))
-                
-                # Add row to data
-                data.append({
-                    'date': date,
-                    'country': country,
-                    'product': product,
-                    'sales': final_sales,
-                    'year': date.year,
-                    'month': date.month,
-                    'day': date.day,
-                    'dayofweek': date.dayofweek
-                })
-    
-    # Convert to dataframe
-    df = pd.DataFrame(data)
+        while len(buffer) >= chunk_rows:
+            yield buffer.iloc[:chunk_rows].reset_index(drop=True)
+            buffer = buffer.iloc[chunk_rows:].reset_index(drop=True)
     
-    return df
+    if buffer is not None and len(buffer):
+        yield buffer
 
-def create_mock_inventory_data():
-    """Generate mock inventory data for demonstration purposes"""
-    # Products
-    products = [
-        'Activia Yogurt', 'Alpro Soya', 'Danone Greek', 'Evian Water', 
-        'Actimel Probiotic', 'Volvic Water', 'Oykos Yogurt', 'Danette Dessert'
-    ]
+def create_mock_inventory_data(n_warehouses=None, n_products=None, seed=None):
+    """Generate mock inventory data for demonstration purposes, for any number of warehouses and products"""
+    rng = np.random.default_rng(seed)
     
-    # Warehouses
-    warehouses = [
-        'Paris-North', 'Berlin-Central', 'London-East', 'Madrid-South', 
-        'Rome-Central', 'Amsterdam-West', 'Brussels-Central', 'Warsaw-East'
-    ]
+    warehouses = scale_names(WAREHOUSES, len(WAREHOUSES) if n_warehouses is None else n_warehouses, '-')
+    products = scale_names(PRODUCTS, len(PRODUCTS) if n_products is None else n_products, ' ')
+    
+    n_warehouses, n_products = len(warehouses), len(products)
+    n = n_warehouses * n_products
     
-    # Create dataframe structure
-    data = []
-    
-    for warehouse in warehouses:
-        for product in products:
-            # Randomize inventory levels and capacities
-            current_stock = random.randint(500, 10000)
-            max_capacity = random.randint(max(current_stock, 8000), 15000)
-            min_required = random.randint(300, 1000)
-            
-            # Determine stock status
-            if current_stock < min_required:
-                status = "Low"
-            elif current_stock > 0.9 * max_capacity:
-                status = "Overstocked"
-            else:
-                status = "Optimal"
-            
-            # Shelf life - different by product type
-            if 'Yogurt' in product or 'Greek' in product:
-                shelf_life_days = random.randint(14, 28)
-            elif 'Water' in product:
-                shelf_life_days = random.randint(180, 365)
-            else:
-                shelf_life_days = random.randint(30, 90)
-            
-            # Calculate expiry risk based on stock and shelf life
-            expiry_risk = random.randint(0, 100) if shelf_life_days < 30 else random.randint(0, 20)
-            
-            data.append({
-                'warehouse': warehouse,
-                'product': product,
-                'current_stock': current_stock,
-                'max_capacity': max_capacity,
-                'min_required': min_required,
-                'status': status,
-                'shelf_life_days': shelf_life_days,
-                'expiry_risk': expiry_risk,
-                'restock_days': random.randint(1, 7),
-                'demand_trend': random.choice(["Increasing", "Steady", "Decreasing"])
-            })
-    
-    # Convert to dataframe
-    df = pd.DataFrame(data)
+    # Randomize inventory levels and capacities
+    current_stock = rng.integers(500, 10001, n, dtype=np.int32)
+    max_capacity = rng.integers(np.maximum(current_stock, 8000), 15001, dtype=np.int32)
+    min_required = rng.integers(300, 1001, n, dtype=np.int32)
+    
+    # Determine stock status
+    status = np.select(
+        [current_stock < min_required, current_stock > 0.9 * max_capacity],
+        [1, 2],
+        default=0
+    ).astype(np.int8)
+    
+    # Shelf life - different by product type
+    family = np.tile(product_family(products), n_warehouses)
+    shelf_life_low = np.select([family == 'yogurt', family == 'water'], [14, 180], default=30)
+    shelf_life_high = np.select([family == 'yogurt', family == 'water'], [28, 365], default=90)
+    shelf_life_days = rng.integers(shelf_life_low, shelf_life_high + 1, dtype=np.int16)
+    
+    # Calculate expiry risk based on stock and shelf life
+    expiry_risk = rng.integers(0, np.where(shelf_life_days < 30, 101, 21), dtype=np.int16)
+    
+    restock_days = rng.integers(1, 8, n, dtype=np.int16)
+    demand_trend = rng.integers(0, 3, n, dtype=np.int8)
+    
+    df = pd.DataFrame({
+        'warehouse': pd.Categorical.from_codes(
+            np.repeat(np.arange(n_warehouses, dtype=categorical_codes(n_warehouses)), n_products),
+            categories=warehouses),
+        'product': pd.Categorical.from_codes(
+            np.tile(np.arange(n_products, dtype=categorical_codes(n_products)), n_warehouses),
+            categories=products),
+        'current_stock': current_stock,
+        'max_capacity': max_capacity,
+        'min_required': min_required,
+        'status': pd.Categorical.from_codes(status, categories=['Optimal', 'Low', 'Overstocked']),
+        'shelf_life_days': shelf_life_days,
+        'expiry_risk': expiry_risk,
+        'restock_days': restock_days,
+        'demand_trend': pd.Categorical.from_codes(
+            demand_trend, categories=["Increasing", "Steady", "Decreasing"])
+    })
     
     return df
 
-def create_mock_country_requests():
+def create_mock_country_requests(n_requests=30, seed=None, countries=None):
     """Generate mock country request data for prioritization"""
-    countries = [
-        'France', 'Germany', 'UK', 'Spain', 'Italy', 
-        'Netherlands', 'Belgium', 'Poland', 'Sweden', 
-        'Denmark', 'Finland', 'Greece', 'Portugal', 'Ireland'
-    ]
+    countries = REQUEST_COUNTRIES if countries is None else countries
     
     request_types = [
         "New product development for local market",
@@ -171,52 +299,29 @@ def create_mock_country_requests():
         "Distribution channel expansion"
     ]
     
-    data = []
+    rng = np.random.default_rng(seed)
     
-    # Create sample country requests with priority scores
-    for i in range(30):  # 30 sample requests
-        country = random.choice(countries)
-        request = random.choice(request_types)
-        
-        # Calculate mock scores
-        market_size = random.randint(1, 10)
-        growth_potential = random.randint(1, 10)
-        technical_feasibility = random.randint(1, 10)
-        strategic_alignment = random.randint(1, 10)
-        cost_estimate = random.randint(1, 10)
-        
-        # Calculate priority score (higher is higher priority)
-        priority_score = (market_size * 2 + growth_potential * 3 + 
-                         technical_feasibility * 1.5 + strategic_alignment * 2.5 - 
-                         cost_estimate * 1.5)
-        
-        # Normalize to 0-100 scale
-        priority_score = max(0, min(100, int(priority_score / 0.19)))
-        
-        # Assign priority level based on score
-        if priority_score >= 70:
-            priority = 1  # High
-        elif priority_score >= 40:
-            priority = 2  # Medium
-        else:
-            priority = 3  # Low
-        
-        # Add submission date (random date in past 3 months)
-        days_ago = random.randint(1, 90)
-        submission_date = datetime.datetime.now() - datetime.timedelta(days=days_ago)
-        
-        data.append({
-            'country': country,
-            'request_type': request,
-            'priority_score': priority_score,
-            'priority': priority,
-            'market_size': market_size,
-            'growth_potential': growth_potential,
-            'technical_feasibility': technical_feasibility,
-            'strategic_alignment': strategic_alignment,
-            'cost_estimate': cost_estimate,
-            'submission_date': submission_date.strftime('%Y-%m-%d'),
-            'status': random.choice(['New', 'In Review', 'Approved', 'In Progress', 'Completed', 'On Hold'])
-        })
+    # Calculate mock scores
+    criteria = pd.DataFrame({
+        name: rng.integers(1, 11, n_requests)
+        for name in PRIORITY_CRITERIA
+    })
+    
+    # Calculate priority score (higher is higher priority) and level
+    scores = calculate_priority_scores(criteria)
+    
+    # Add submission date (random date in past 3 months)
+    days_ago = rng.integers(1, 91, n_requests)
+    submission_date = pd.Timestamp.now() - pd.to_timedelta(days_ago, unit='D')
+    
+    df = pd.DataFrame({
+        'country': np.array(countries, dtype=object)[rng.integers(0, len(countries), n_requests)],
+        'request_type': np.array(request_types, dtype=object)[rng.integers(0, len(request_types), n_requests)],
+        'priority_score': scores['score'],
+        'priority': scores['level'],
+        **criteria,
+        'submission_date': submission_date.strftime('%Y-%m-%d'),
+        'status': np.array(REQUEST_STATUSES, dtype=object)[rng.integers(0, len(REQUEST_STATUSES), n_requests)]
+    })
     
-    return pd.DataFrame(data).sort_values(by='priority_score', ascending=False)
\ No newline at end of file
+    return df.sort_values(by='priority_score', ascending=False)
\ No newline at end of file
@@ -0,0 +1,143 @@
+import argparse
+import dataclasses
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data.sample_data import (
+    COUNTRIES, PRODUCTS, REQUEST_COUNTRIES, scale_names,
+    create_mock_inventory_data, create_mock_country_requests, iter_mock_sales_data
+)
+from data.sources import MOCK_HISTORY_DAYS, ParquetDataSource, get_data_source
+from data.storage import (
+    DEFAULT_DATA_DIR, dataset_exists, write_sales_dataset, write_inventory_dataset, write_table_dataset
+)
+
+# Fixed end of every tier's sales history, so tiers do not drift with the calendar
+TIER_END_DATE = '2025-12-31'
+
+@dataclasses.dataclass(frozen=True)
+class ScaleTier:
+    """Cardinalities of one synthetic dataset size"""
+    name: str
+    countries: int
+    products: int
+    days: int
+    warehouses: int
+    skus: int
+    requests: int
+
+    @property
+    def sales_rows(self):
+        return (self.days + 1) * self.countries * self.products
+
+    @property
+    def inventory_rows(self):
+        return self.warehouses * self.skus
+
+SCALE_TIERS = {
+    # Today's demo size and history: ~79k sales rows, 64 inventory rows, 30 requests
+    'S': ScaleTier('S', countries=9, products=8, days=MOCK_HISTORY_DAYS, warehouses=8, skus=8, requests=30),
+    # ~0.7M sales rows
+    'M': ScaleTier('M', countries=20, products=50, days=730, warehouses=100, skus=500, requests=5_000),
+    # ~6.6M sales rows
+    'L': ScaleTier('L', countries=30, products=200, days=1095, warehouses=500, skus=2_000, requests=25_000),
+    # ~37M sales rows, 10M inventory rows
+    'XL': ScaleTier('XL', countries=50, products=400, days=1825, warehouses=2_000, skus=5_000, requests=100_000),
+}
+
+def get_scale_tier(name):
+    """Look up a tier by name (case-insensitive)"""
+    try:
+        return SCALE_TIERS[name.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown scale tier '{name}', expected one of {list(SCALE_TIERS)}") from None
+
+def tier_path(name, seed=0, root=None):
+    """Directory holding the cached datasets of a tier"""
+    root = os.path.join(DEFAULT_DATA_DIR, 'tiers') if root is None else root
+    return os.path.join(root, f'{get_scale_tier(name).name}-seed{seed}')
+
+def _manifest(tier, seed):
+    return {'tier': dataclasses.asdict(tier), 'seed': seed, 'end_date': TIER_END_DATE}
+
+def _is_cached(path, tier, seed):
+    manifest_path = os.path.join(path, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path) as f:
+        if json.load(f) != _manifest(tier, seed):
+            return False
+    return all(dataset_exists(os.path.join(path, name))
+               for name in ['sales', 'inventory', 'country_requests'])
+
+def generate_tier(name, seed=0, root=None, force=False):
+    """Generate a tier's sales, inventory and request datasets on disk, reusing the cache. Returns the path."""
+    tier = get_scale_tier(name)
+    path = tier_path(name, seed=seed, root=root)
+
+    if not force and _is_cached(path, tier, seed):
+        return path
+
+    sales_seed, inventory_seed, request_seed = (
+        int(word) for word in np.random.SeedSequence(seed).generate_state(3)
+    )
+
+    countries = scale_names(COUNTRIES, tier.countries)
+    products = scale_names(PRODUCTS, tier.products)
+
+    # Streamed month by month, so even the XL tier is generated in bounded memory
+    end_date = pd.Timestamp(TIER_END_DATE)
+    write_sales_dataset(
+        iter_mock_sales_data(end_date - pd.Timedelta(days=tier.days), end_date, seed=sales_seed,
+                             countries=countries, products=products, compact=True),
+        os.path.join(path, 'sales')
+    )
+    write_inventory_dataset(
+        create_mock_inventory_data(tier.warehouses, tier.skus, seed=inventory_seed),
+        os.path.join(path, 'inventory')
+    )
+    # Requests also come from the non-selling countries, as in the demo data
+    request_countries = countries + [c for c in REQUEST_COUNTRIES if c not in COUNTRIES]
+    write_table_dataset(
+        create_mock_country_requests(tier.requests, seed=request_seed, countries=request_countries),
+        os.path.join(path, 'country_requests')
+    )
+
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump(_manifest(tier, seed), f, indent=2)
+
+    return path
+
+def load_tier(name, seed=0, root=None):
+    """A Parquet data source over a tier's datasets, generating them on first use"""
+    return ParquetDataSource(generate_tier(name, seed=seed, root=root))
+
+def add_tier_argument(parser, action):
+    """Add the ``--tier`` option shared by the benchmark CLIs, whose help reads 'Scale tier to <action>'"""
+    parser.add_argument('--tier', default=None, help=f"Scale tier to {action} (default: the configured data source)")
+
+def tier_data_source(name=None):
+    """The data source a benchmark runs on: a tier's, or the configured one when ``name`` is None"""
+    return get_data_source() if name is None else load_tier(name)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate cached synthetic datasets for a scale tier")
+    parser.add_argument('tiers', nargs='+', choices=list(SCALE_TIERS), help="Tier names")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the generated data")
+    parser.add_argument('--root', default=None, help="Cache directory (default: <data dir>/tiers)")
+    parser.add_argument('--force', action='store_true', help="Regenerate even when cached")
+    args = parser.parse_args(argv)
+
+    for name in args.tiers:
+        tier = SCALE_TIERS[name]
+        start = time.perf_counter()
+        path = generate_tier(name, seed=args.seed, root=args.root, force=args.force)
+        print(f"{name}: {tier.sales_rows:,} sales rows, {tier.inventory_rows:,} inventory rows, "
+              f"{tier.requests:,} requests -> {path} ({time.perf_counter() - start:.1f}s)")
+
+if __name__ == '__main__':
+    main()
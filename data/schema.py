@@ -0,0 +1,78 @@
+import pandas as pd
+import numpy as np
+
+# Calendar columns of the wide sales schema that can be derived from 'date'
+SALES_CALENDAR_COLUMNS = ['year', 'month', 'day', 'dayofweek']
+
+# Dtypes used for the derived calendar columns
+CALENDAR_DTYPES = {
+    'year': np.uint16,
+    'month': np.uint8,
+    'day': np.uint8,
+    'dayofweek': np.uint8
+}
+
+def sales_dtype(values):
+    """uint16 when all sales fit in it, int32 otherwise"""
+    values = np.asarray(values)
+    if values.size == 0 or (values.min() >= 0 and values.max() <= np.iinfo(np.uint16).max):
+        return np.dtype(np.uint16)
+    return np.dtype(np.int32)
+
+def categorical_codes(n_categories):
+    """Smallest signed integer dtype able to hold category codes"""
+    return np.min_scalar_type(-max(n_categories, 1))
+
+def compact_sales_frame(df, countries=None, products=None):
+    """Convert a sales frame to the compact schema: categorical dimensions, small integer sales, no calendar columns"""
+    # Passing the category order keeps separately converted chunks concatenable
+    countries = pd.unique(df['country']) if countries is None else countries
+    products = pd.unique(df['product']) if products is None else products
+
+    sales = df['sales'].to_numpy()
+
+    return pd.DataFrame({
+        'date': df['date'].to_numpy(),
+        'country': pd.Categorical(df['country'], categories=countries),
+        'product': pd.Categorical(df['product'], categories=products),
+        'sales': sales.astype(sales_dtype(sales))
+    })
+
+@pd.api.extensions.register_dataframe_accessor('calendar')
+class CalendarAccessor:
+    """Calendar columns of a frame, read from the frame when stored and otherwise derived from 'date' once"""
+
+    def __init__(self, df):
+        self._df = df
+        # Kept on the frame: pandas 3 builds a new accessor on every access instead of caching it
+        self._columns = df.__dict__.setdefault('_calendar_columns', {})
+
+    def __getitem__(self, name):
+        if name not in CALENDAR_DTYPES:
+            raise KeyError(name)
+
+        if name in self._df.columns:
+            return self._df[name]
+
+        if name not in self._columns:
+            values = getattr(self._df['date'].dt, name).to_numpy()
+            self._columns[name] = pd.Series(
+                values.astype(CALENDAR_DTYPES[name]),
+                index=self._df.index,
+                name=name
+            )
+
+        return self._columns[name]
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def frame(self, columns=None):
+        """Return the requested calendar columns as a DataFrame"""
+        columns = SALES_CALENDAR_COLUMNS if columns is None else columns
+        return pd.DataFrame({name: self[name] for name in columns})
@@ -0,0 +1,332 @@
+import abc
+import contextlib
+import glob
+import os
+import queue
+import sqlite3
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pandas.api.types import union_categoricals
+
+from data.sample_data import create_mock_sales_data, create_mock_inventory_data, create_mock_country_requests
+from data.cubes import build_sales_cubes
+from data.schema import compact_sales_frame
+from data.storage import (
+    COMPLETE_MARKER, SALES_FILE_SCHEMA, SALES_PARTITION_SCHEMA,
+    dataset_exists, dataset_files, read_sales_dataset, read_table_dataset, _mmap_filesystem
+)
+from utils.cache import process_singleton
+
+# Days of history the mock source generates (three seasons for the forecast model)
+MOCK_HISTORY_DAYS = 3 * 365
+
+# Datasets every source provides
+DATASETS = ['sales', 'inventory', 'country_requests']
+
+# Configuration for get_data_source(), e.g. "mock", "csv:/extracts",
+# "parquet:/warehouse/stockquest" or "sqlite:/data/stockquest.db"
+DATA_SOURCE_ENV = 'STOCKQUEST_DATA_SOURCE'
+
+def _append_rows(df, new_rows):
+    """Concatenate frames, widening categorical columns to the union of their categories"""
+    new_rows = new_rows.copy()
+    df = df.copy(deep=False)
+
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype) and column in new_rows.columns:
+            combined = union_categoricals([df[column], new_rows[column].astype('category')])
+            df[column] = pd.Categorical(df[column], categories=combined.categories)
+            new_rows[column] = pd.Categorical(new_rows[column], categories=combined.categories)
+
+    return pd.concat([df, new_rows], ignore_index=True)
+
+class DataSource(abc.ABC):
+    """Base class for the datasets the app reads, re-read only when their change stamp moves"""
+
+    def __init__(self):
+        self._frames = {}
+        self._stamps = {}
+        self._lock = threading.RLock()
+        self._cubes = None
+        # Load counts per dataset and in total; they only move when data changes, so they can key caches
+        self._versions = {}
+        self.version = 0
+
+    def load_sales(self):
+        """Daily sales history"""
+        return self._load('sales')
+
+    def load_inventory(self):
+        """Current stock per warehouse x product"""
+        return self._load('inventory')
+
+    def load_country_requests(self):
+        """Country requests awaiting prioritization"""
+        return self._load('country_requests')
+
+    def dataset_version(self, name):
+        """Number of times one dataset has been (re)loaded; 0 before its first load"""
+        return self._versions.get(name, 0)
+
+    def load_sales_cubes(self):
+        """Country x product x period sales cubes, rebuilt only when the sales history changes"""
+        with self._lock:
+            sales = self.load_sales()
+            if self._cubes is None or self._cubes[0] is not sales:
+                self._cubes = (sales, build_sales_cubes(sales))
+            return self._cubes[1]
+
+    def refresh(self):
+        """Re-check every loaded dataset and pick up changes. Returns the names that changed."""
+        with self._lock:
+            previous = dict(self._stamps)
+            for name in list(self._frames):
+                self._load(name)
+            return [name for name in previous if previous[name] != self._stamps[name]]
+
+    def _load(self, name):
+        if name not in DATASETS:
+            raise KeyError(f"Unknown dataset '{name}'")
+
+        with self._lock:
+            stamp = self._stamp(name)
+
+            if name in self._frames and stamp is not None and stamp == self._stamps[name]:
+                return self._frames[name]
+
+            increment = None
+            if name in self._frames:
+                increment = self._read_increment(name, self._stamps[name], stamp)
+
+            if increment is None:
+                frame = self._read(name)
+            else:
+                frame = _append_rows(self._frames[name], increment)
+
+            self._frames[name] = frame
+            self._stamps[name] = stamp
+            self._versions[name] = self._versions.get(name, 0) + 1
+            self.version += 1
+
+            return frame
+
+    @abc.abstractmethod
+    def _stamp(self, name):
+        """Cheap fingerprint of a dataset's current state (None means always re-read)"""
+
+    @abc.abstractmethod
+    def _read(self, name):
+        """Read a whole dataset"""
+
+    def _read_increment(self, name, old_stamp, new_stamp):
+        """Rows added since ``old_stamp``, or None when a full re-read is needed"""
+        return None
+
+class MockDataSource(DataSource):
+    """Generated demo data, created once per process"""
+
+    def __init__(self, seed=None):
+        super().__init__()
+        self.seed = seed
+
+    def _stamp(self, name):
+        return 'mock'
+
+    def _read(self, name):
+        if name == 'sales':
+            return create_mock_sales_data(days=MOCK_HISTORY_DAYS, seed=self.seed, compact=True)
+        if name == 'inventory':
+            return create_mock_inventory_data()
+        return create_mock_country_requests()
+
+class CSVDataSource(DataSource):
+    """CSV extracts in a directory, as ``<name>.csv`` files or ``<name>/`` directories read incrementally"""
+
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+
+    def _files(self, name):
+        single = os.path.join(self.root, f'{name}.csv')
+        if os.path.exists(single):
+            return [single]
+        return sorted(glob.glob(os.path.join(self.root, name, '*.csv')))
+
+    def _stamp(self, name):
+        files = self._files(name)
+        if not files:
+            raise FileNotFoundError(f"No CSV extract for '{name}' in {self.root}")
+        return tuple((path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in files)
+
+    def _read_files(self, name, files):
+        frames = [pd.read_csv(path) for path in files]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+        if name == 'sales':
+            df['date'] = pd.to_datetime(df['date'])
+            df = compact_sales_frame(df)
+
+        return df
+
+    def _read(self, name):
+        return self._read_files(name, [entry[0] for entry in self._stamp(name)])
+
+    def _read_increment(self, name, old_stamp, new_stamp):
+        old, new = set(old_stamp), set(new_stamp)
+        if not old <= new:
+            return None
+        return self._read_files(name, sorted(entry[0] for entry in new - old))
+
+class ParquetDataSource(DataSource):
+    """Datasets written by ``data.storage`` under ``<root>/<name>``, with new sales partitions read incrementally"""
+
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _stamp(self, name):
+        path = self._path(name)
+        if not dataset_exists(path):
+            raise FileNotFoundError(f"No dataset for '{name}' in {self.root}")
+        if name == 'sales':
+            return tuple(dataset_files(path))
+        return os.stat(os.path.join(path, COMPLETE_MARKER)).st_mtime_ns
+
+    def _read(self, name):
+        if name == 'sales':
+            return read_sales_dataset(self._path(name))
+        return read_table_dataset(self._path(name))
+
+    def _read_increment(self, name, old_stamp, new_stamp):
+        if name != 'sales':
+            return None
+
+        old, new = set(old_stamp), set(new_stamp)
+        if not old <= new:
+            return None
+
+        added = ds.dataset(
+            sorted(file for file, _ in new - old),
+            schema=pa.schema(list(SALES_FILE_SCHEMA) + list(SALES_PARTITION_SCHEMA)),
+            format='parquet',
+            partitioning=ds.partitioning(SALES_PARTITION_SCHEMA, flavor='hive'),
+            partition_base_dir=self._path(name),
+            filesystem=_mmap_filesystem()
+        )
+        df = added.to_table(columns=['date', 'country', 'product', 'sales']).to_pandas()
+
+        return compact_sales_frame(df)
+
+class SQLiteConnectionPool:
+    """Fixed-size pool of SQLite connections shared across sessions"""
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self._connections = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(sqlite3.connect(path, check_same_thread=False))
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection, waiting if all of them are in use"""
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+class SQLiteStore:
+    """Base of the app's own SQLite databases: a pooled WAL database created from the class's ``schema``"""
+
+    schema = ''
+
+    def __init__(self, path, pool_size=4):
+        self.path = path
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self.pool = SQLiteConnectionPool(self.path, size=pool_size)
+
+        with self.pool.connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.schema)
+            self._migrate(conn)
+            conn.commit()
+
+    def _migrate(self, conn):
+        """Upgrade a database created by an earlier schema"""
+
+class SQLiteDataSource(DataSource):
+    """Tables ``sales``, ``inventory`` and ``country_requests`` in a SQLite database, read incrementally by rowid"""
+
+    def __init__(self, path, pool_size=4):
+        super().__init__()
+        self.path = path
+        self.pool = SQLiteConnectionPool(path, size=pool_size)
+
+    def _stamp(self, name):
+        with self.pool.connection() as conn:
+            max_rowid, count = conn.execute(f'SELECT MAX(rowid), COUNT(*) FROM "{name}"').fetchone()
+        return (max_rowid or 0, count)
+
+    def _query(self, name, after_rowid=0):
+        with self.pool.connection() as conn:
+            df = pd.read_sql_query(
+                f'SELECT * FROM "{name}" WHERE rowid > ? ORDER BY rowid', conn, params=(after_rowid,)
+            )
+
+        if name == 'sales':
+            df['date'] = pd.to_datetime(df['date'])
+            df = compact_sales_frame(df)
+
+        return df
+
+    def _read(self, name):
+        return self._query(name)
+
+    def _read_increment(self, name, old_stamp, new_stamp):
+        old_max, old_count = old_stamp
+        new_max, new_count = new_stamp
+        # Rows were only appended if every old row is still there
+        if new_max < old_max or new_count - old_count != self._rows_after(name, old_max):
+            return None
+        return self._query(name, after_rowid=old_max)
+
+    def _rows_after(self, name, rowid):
+        with self.pool.connection() as conn:
+            return conn.execute(f'SELECT COUNT(*) FROM "{name}" WHERE rowid > ?', (rowid,)).fetchone()[0]
+
+def create_data_source(config=None):
+    """Build a data source from a config string such as ``"parquet:/data"`` (default: ``STOCKQUEST_DATA_SOURCE``)"""
+    config = os.environ.get(DATA_SOURCE_ENV, 'mock') if config is None else config
+    kind, _, location = config.partition(':')
+
+    if kind == 'mock':
+        return MockDataSource(seed=int(location) if location else None)
+    if kind == 'csv':
+        return CSVDataSource(location)
+    if kind == 'parquet':
+        return ParquetDataSource(location)
+    if kind == 'sqlite':
+        return SQLiteDataSource(location)
+
+    raise ValueError(f"Unknown data source '{kind}', expected mock, csv, parquet or sqlite")
+
+@process_singleton
+def get_data_source():
+    """The process-wide data source shared by all sessions"""
+    return create_data_source()
+
+def set_data_source(source):
+    """Replace the process-wide data source (a DataSource or a config string)"""
+    get_data_source.replace(create_data_source(source) if isinstance(source, str) else source)
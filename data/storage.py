@@ -0,0 +1,175 @@
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from data.schema import compact_sales_frame, sales_dtype
+
+# Root directory for persisted datasets, caches and stores
+DEFAULT_DATA_DIR = os.environ.get(
+    'STOCKQUEST_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.stockquest')
+)
+
+# Marker written once a dataset has been completely written
+COMPLETE_MARKER = '_SUCCESS'
+
+# Columns stored in each sales file (country and month live in the partition path)
+SALES_FILE_SCHEMA = pa.schema([
+    ('date', pa.timestamp('ms')),
+    ('product', pa.dictionary(pa.int32(), pa.string())),
+    ('sales', pa.int32())
+])
+
+SALES_PARTITION_SCHEMA = pa.schema([
+    ('country', pa.string()),
+    ('year_month', pa.string())
+])
+
+FILE_FORMATS = {
+    'parquet': 'parquet',
+    'arrow': 'ipc'
+}
+
+def _file_format(format):
+    if format not in FILE_FORMATS:
+        raise ValueError(f"Unknown dataset format '{format}', expected one of {sorted(FILE_FORMATS)}")
+    return FILE_FORMATS[format]
+
+def _mmap_filesystem():
+    """Local filesystem that memory-maps files instead of reading them into buffers"""
+    return pafs.LocalFileSystem(use_mmap=True)
+
+def dataset_exists(root):
+    """Whether a dataset has been completely written under ``root``"""
+    return os.path.exists(os.path.join(root, COMPLETE_MARKER))
+
+def dataset_files(root):
+    """Data files of a dataset with their modification times, skipping markers and hidden files"""
+    files = []
+    for directory, subdirs, names in os.walk(root):
+        subdirs[:] = [d for d in subdirs if not d.startswith(('.', '_'))]
+        for name in names:
+            if not name.startswith(('.', '_')):
+                path = os.path.join(directory, name)
+                files.append((path, os.stat(path).st_mtime_ns))
+    return sorted(files)
+
+def _prepare_root(root):
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+    os.makedirs(root)
+
+def _mark_complete(root):
+    with open(os.path.join(root, COMPLETE_MARKER), 'w'):
+        pass
+
+def _sales_table(df):
+    """Convert a (wide or compact) sales frame to an Arrow table with partition keys"""
+    if not isinstance(df['country'].dtype, pd.CategoricalDtype):
+        df = compact_sales_frame(df)
+
+    table = pa.table({
+        'date': pa.array(df['date'].to_numpy()).cast(pa.timestamp('ms')),
+        'product': pa.array(df['product']),
+        'sales': pa.array(df['sales'].to_numpy()),
+        'country': pa.array(df['country'].astype(str).to_numpy()),
+        'year_month': pa.array(df['date'].dt.strftime('%Y-%m').to_numpy())
+    })
+
+    return table.cast(pa.schema(list(SALES_FILE_SCHEMA) + list(SALES_PARTITION_SCHEMA)))
+
+def write_sales_dataset(data, root, format='parquet', append=False):
+    """Persist a sales frame, or an iterable of chunks, partitioned by country and month"""
+    frames = [data] if isinstance(data, pd.DataFrame) else data
+    schema = pa.schema(list(SALES_FILE_SCHEMA) + list(SALES_PARTITION_SCHEMA))
+
+    # Chunks are written as they arrive, so the whole history never has to be in memory
+    def batches():
+        for frame in frames:
+            yield from _sales_table(frame).to_batches()
+
+    # Appending adds new files next to the existing ones instead of replacing the dataset
+    if not append:
+        _prepare_root(root)
+
+    ds.write_dataset(
+        batches(),
+        root,
+        schema=schema,
+        format=_file_format(format),
+        partitioning=ds.partitioning(SALES_PARTITION_SCHEMA, flavor='hive'),
+        basename_template=f'part-{uuid.uuid4().hex}-{{i}}.{format}',
+        existing_data_behavior='overwrite_or_ignore',
+        max_rows_per_group=1 << 20
+    )
+    _mark_complete(root)
+
+def sales_dataset(root, format='parquet'):
+    """Open a persisted sales dataset as a lazily scanned, memory-mapped Arrow dataset"""
+    return ds.dataset(
+        root,
+        schema=pa.schema(list(SALES_FILE_SCHEMA) + list(SALES_PARTITION_SCHEMA)),
+        format=_file_format(format),
+        partitioning=ds.partitioning(SALES_PARTITION_SCHEMA, flavor='hive'),
+        filesystem=_mmap_filesystem()
+    )
+
+def read_sales_dataset(root, columns=None, countries=None, start_month=None, end_month=None,
+                       format='parquet'):
+    """Load the compact sales frame, reading only the requested columns, countries and (inclusive) month range"""
+    dataset = sales_dataset(root, format=format)
+
+    columns = ['date', 'country', 'product', 'sales'] if columns is None else list(columns)
+
+    condition = None
+    if countries is not None:
+        condition = ds.field('country').isin(list(countries))
+    if start_month is not None:
+        start = ds.field('year_month') >= pd.Timestamp(start_month).strftime('%Y-%m')
+        condition = start if condition is None else condition & start
+    if end_month is not None:
+        end = ds.field('year_month') <= pd.Timestamp(end_month).strftime('%Y-%m')
+        condition = end if condition is None else condition & end
+
+    table = dataset.to_table(columns=columns, filter=condition)
+    df = table.to_pandas()
+
+    if 'country' in df.columns:
+        df['country'] = df['country'].astype('category')
+    if 'sales' in df.columns:
+        df['sales'] = df['sales'].astype(sales_dtype(df['sales'].to_numpy()))
+
+    return df
+
+def write_table_dataset(df, root, format='parquet'):
+    """Persist a small, unpartitioned frame (inventory, country requests) as a single file dataset"""
+    _prepare_root(root)
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        root,
+        format=_file_format(format),
+        existing_data_behavior='overwrite_or_ignore'
+    )
+    _mark_complete(root)
+
+def read_table_dataset(root, columns=None, condition=None, format='parquet'):
+    """Load a frame written by ``write_table_dataset``"""
+    dataset = ds.dataset(root, format=_file_format(format), filesystem=_mmap_filesystem())
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+def write_inventory_dataset(df, root, format='parquet'):
+    """Persist the inventory frame as a single file dataset"""
+    write_table_dataset(df, root, format=format)
+
+def read_inventory_dataset(root, columns=None, warehouses=None, format='parquet'):
+    """Load the persisted inventory frame, optionally only some columns and warehouses"""
+    condition = None
+    if warehouses is not None:
+        condition = ds.field('warehouse').isin(list(warehouses))
+
+    return read_table_dataset(root, columns=columns, condition=condition, format=format)
@@ -0,0 +1,13 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def seasonal_values():
+    """Four years of noisy monthly sales for 600 series with trends and seasonal patterns"""
+    rng = np.random.default_rng(0)
+    months = np.arange(48)
+    level = rng.uniform(500, 5000, (600, 1))
+    trend = rng.uniform(-5, 15, (600, 1))
+    season = rng.uniform(0.05, 0.3, (600, 1)) * level * np.sin(2 * np.pi * months / 12)
+    noise = rng.normal(0, 0.05, (600, 48)) * level
+    return np.maximum(level + trend * months + season + noise, 0)
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data.storage import COMPLETE_MARKER
+from utils.artifacts import ModelArtifactStore
+from utils.forecasting import fit_holt_winters
+
+def _fit(values):
+    index = pd.MultiIndex.from_product([['France', 'Spain'], ['Evian Water', 'Alpro Soya', 'Danone Greek']],
+                                       names=['country', 'product'])
+    return fit_holt_winters(values[:6], index=index, last_period=pd.Period('2025-12', freq='M'), workers=1)
+
+def _assert_same_fit(actual, expected):
+    pd.testing.assert_index_equal(actual.index, expected.index)
+    for name in ['level', 'trend', 'season', 'rmse']:
+        np.testing.assert_array_equal(getattr(actual, name), getattr(expected, name))
+    pd.testing.assert_frame_equal(actual.params, expected.params)
+    assert actual.last_period == expected.last_period
+    assert actual.n_steps == expected.n_steps
+
+def test_artifact_round_trip(tmp_path, seasonal_values):
+    fit = _fit(seasonal_values)
+    store = ModelArtifactStore(str(tmp_path), shard_size=4)
+    store.save('model', fit, '2025-12-abc', digest='abc')
+
+    artifact = store.open('model')
+
+    assert artifact.snapshot == '2025-12-abc'
+    assert artifact.digest == 'abc'
+    assert len(artifact) == 6
+    assert artifact.shards_loaded == 0
+    labels = [('Spain', 'Danone Greek'), ('France', 'Alpro Soya')]
+    _assert_same_fit(artifact.select(labels), fit.select(labels))
+    assert artifact.shards_loaded == 2
+    _assert_same_fit(artifact.load(), fit)
+    np.testing.assert_array_equal(artifact.periods(3), fit.periods(3))
+
+def test_open_without_snapshots(tmp_path):
+    assert ModelArtifactStore(str(tmp_path)).open('model') is None
+
+def test_prune_keeps_the_newest_snapshots(tmp_path, seasonal_values):
+    fit = _fit(seasonal_values)
+    store = ModelArtifactStore(str(tmp_path), keep=10)
+    names = [f'snapshot-{number}' for number in range(5)]
+    for number, name in enumerate(names):
+        path = store.save('model', fit, name)
+        # Distinct completion times, oldest first, whatever the filesystem's timestamp resolution
+        os.utime(os.path.join(path, COMPLETE_MARKER), ns=(number * 10 ** 9, number * 10 ** 9))
+
+    assert store.prune('model', keep=3) == names[:2]
+    assert store.snapshots('model') == names[2:]
+    assert store.latest('model') == names[-1]
+    assert sorted(os.listdir(tmp_path / 'model')) == ['LATEST'] + names[2:]
+
+def test_saving_prunes_to_the_store_limit(tmp_path, seasonal_values):
+    store = ModelArtifactStore(str(tmp_path), keep=3)
+    for number in range(5):
+        store.save('model', _fit(seasonal_values), f'snapshot-{number}')
+
+    assert len(store.snapshots('model')) == 3
+    assert store.latest('model') == 'snapshot-4'
+    assert store.open('model').snapshot == 'snapshot-4'
+
+def test_series_labels_keep_their_types(tmp_path, seasonal_values):
+    index = pd.MultiIndex.from_arrays([
+        pd.Categorical(['France', 'France', 'Spain', 'Spain']),
+        np.array([101, 205, 101, 205], dtype=np.int64)
+    ], names=['country', 'sku'])
+    fit = fit_holt_winters(seasonal_values[:4], index=index, workers=1)
+    store = ModelArtifactStore(str(tmp_path))
+    store.save('model', fit, 'typed')
+
+    artifact = store.open('model')
+
+    pd.testing.assert_index_equal(artifact.index, index, exact=True)
+    np.testing.assert_array_equal(artifact.select([('Spain', 205)]).level, fit.level[[3]])
+
+def test_flat_numeric_labels_round_trip(tmp_path, seasonal_values):
+    fit = fit_holt_winters(seasonal_values[:3], index=pd.Index([7, 8, 9], name='store'), workers=1)
+    store = ModelArtifactStore(str(tmp_path))
+    store.save('model', fit, 'numeric')
+
+    artifact = store.open('model')
+
+    pd.testing.assert_index_equal(artifact.index, fit.index, exact=True)
+    np.testing.assert_array_equal(artifact.select([8]).trend, fit.trend[[1]])
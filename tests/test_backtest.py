@@ -0,0 +1,58 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.backtest import BacktestStore, backtest, rolling_origins
+from utils.forecasting import fit_holt_winters
+from utils.metrics import FORECAST_METRICS, calculate_forecast_metrics
+
+def test_rolling_origins_leave_a_horizon_to_score():
+    assert rolling_origins(48, folds=6, horizon=3) == [40, 41, 42, 43, 44, 45]
+    # The earliest origin still needs more than a season of history
+    assert rolling_origins(18, folds=6, horizon=3) == [13, 14, 15]
+
+def test_rolling_origins_need_enough_history():
+    with pytest.raises(ValueError):
+        rolling_origins(15, horizon=3)
+
+def test_backtest_scores_every_fold(seasonal_values):
+    values = seasonal_values[:4]
+    origins = rolling_origins(48, folds=3, horizon=2)
+
+    results = backtest(values, folds=3, horizon=2, max_workers=1)
+
+    predicted = np.concatenate([fit_holt_winters(values[:, :o], workers=1).forecast(2) for o in origins], axis=1)
+    actual = np.concatenate([values[:, o:o + 2] for o in origins], axis=1)
+    assert list(results.columns) == FORECAST_METRICS
+    pd.testing.assert_frame_equal(results, calculate_forecast_metrics(predicted, actual, index=pd.RangeIndex(4)))
+    pd.testing.assert_frame_equal(backtest(values, folds=3, horizon=2, max_workers=2), results)
+
+def _results(accuracy):
+    return pd.DataFrame({'accuracy': [accuracy, accuracy], 'mape': [5.0, 7.0], 'bias': [1.0, -1.0],
+                         'rmse': [10.0, 20.0]}, index=['Evian Water', 'Volvic Water'])
+
+def test_store_filters_runs_by_history_digest(tmp_path):
+    store = BacktestStore(str(tmp_path / 'backtest.db'))
+    first = store.save_run(_results(90.0), 'product', '2025-11', 'aaa', 6, 3)
+    second = store.save_run(_results(92.0), 'product', '2025-12', 'bbb', 6, 3)
+    store.save_run(_results(80.0), 'country', '2025-12', 'bbb', 6, 3)
+
+    assert store.runs(level='product')['run_id'].tolist() == [second, first]
+    assert store.runs(level='product', history_digest='aaa')['run_id'].tolist() == [first]
+    assert store.runs(history_digest='bbb', limit=1)['level'].tolist() == ['country']
+    assert store.results(second)['accuracy'].tolist() == [92.0, 92.0]
+
+def test_store_adds_the_digest_column_to_old_databases(tmp_path):
+    path = str(tmp_path / 'backtest.db')
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE backtest_runs (run_id INTEGER PRIMARY KEY, level TEXT NOT NULL, '
+                     'history_end TEXT NOT NULL, folds INTEGER NOT NULL, horizon INTEGER NOT NULL, '
+                     'series INTEGER NOT NULL, accuracy REAL, mape REAL, bias REAL, rmse REAL, '
+                     'created_at TEXT NOT NULL)')
+
+    store = BacktestStore(path)
+    run_id = store.save_run(_results(88.0), 'product', '2025-12', 'ccc', 6, 3)
+
+    assert store.runs(history_digest='ccc')['run_id'].tolist() == [run_id]
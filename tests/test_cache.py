@@ -0,0 +1,229 @@
+import sys
+import threading
+import time
+
+import plotly.graph_objects as go
+import pytest
+
+import utils.cache
+from utils.cache import FigureCache, SingleFlight, cached, cached_figure, get_figure_cache
+
+THREADS = 8
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.001)
+
+def _run_together(target, count=THREADS):
+    """Start ``count`` threads on ``target`` at once; returns what each returned or raised"""
+    barrier = threading.Barrier(count)
+    outcomes = [None] * count
+
+    def run(position):
+        barrier.wait()
+        try:
+            outcomes[position] = target()
+        except Exception as error:
+            outcomes[position] = error
+
+    threads = [threading.Thread(target=run, args=(position,)) for position in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return outcomes
+
+@pytest.fixture
+def figure_cache():
+    cache = FigureCache(10 * 1024 * 1024)
+    get_figure_cache.replace(cache)
+    yield cache
+    get_figure_cache.replace()
+
+def test_single_flight_runs_once_for_concurrent_callers():
+    flights = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        # Hold the flight open until every other caller has joined it
+        _wait_for(lambda: flights.shared == THREADS - 1)
+        return 'result'
+
+    outcomes = _run_together(lambda: flights.do('key', compute))
+
+    assert outcomes == ['result'] * THREADS
+    assert len(calls) == 1
+
+def test_single_flight_raises_in_every_waiter():
+    flights = SingleFlight()
+
+    def compute():
+        _wait_for(lambda: flights.shared == THREADS - 1)
+        raise ValueError('failed')
+
+    outcomes = _run_together(lambda: flights.do('key', compute))
+
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    # The failed flight is over: the next call computes again
+    assert flights.do('key', lambda: 'retried') == 'retried'
+
+def test_cached_runs_once_for_concurrent_callers():
+    calls = []
+
+    @cached(versioned=False)
+    def double(value):
+        calls.append(value)
+        _wait_for(lambda: double.cache_info()['shared'] == THREADS - 1)
+        return value * 2
+
+    outcomes = _run_together(lambda: double(21))
+
+    assert outcomes == [42] * THREADS
+    assert calls == [21]
+    assert double(21) == 42
+    assert double.cache_info()['hits'] == 1
+
+def test_cached_raises_in_every_waiter_and_stores_nothing():
+    calls = []
+
+    @cached(versioned=False)
+    def fail(value):
+        calls.append(value)
+        _wait_for(lambda: fail.cache_info()['shared'] == THREADS - 1)
+        raise ValueError('failed')
+
+    outcomes = _run_together(lambda: fail(1))
+
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert len(calls) == 1
+    assert fail.cache_info()['size'] == 0
+
+def test_cached_caller_joining_after_the_flight_reuses_its_result(monkeypatch):
+    leader_done = threading.Event()
+
+    class LateFlight(SingleFlight):
+        def do(self, key, compute):
+            # The late caller has missed the cache but reaches the flight only after the leader left it
+            if threading.current_thread().name == 'late':
+                leader_done.wait(timeout=5)
+            return super().do(key, compute)
+
+    monkeypatch.setattr(utils.cache, 'SingleFlight', LateFlight)
+    calls = []
+
+    @cached(versioned=False)
+    def square(value):
+        calls.append(value)
+        return value ** 2
+
+    late_result = []
+    late = threading.Thread(target=lambda: late_result.append(square(3)), name='late')
+    late.start()
+    _wait_for(lambda: square.cache_info()['misses'] == 1)
+    assert square(3) == 9
+    leader_done.set()
+    late.join(timeout=5)
+
+    assert late_result == [9]
+    assert calls == [3]
+
+def _bar_chart(values):
+    return go.Figure(go.Bar(y=list(values)))
+
+def test_cached_figure_builds_once_for_concurrent_callers(figure_cache):
+    calls = []
+
+    @cached_figure(versioned=False)
+    def chart(values):
+        calls.append(values)
+        # Built only once every caller has missed the figure cache
+        _wait_for(lambda: figure_cache.stats()['misses'] == THREADS)
+        return _bar_chart(values)
+
+    outcomes = _run_together(lambda: chart((1, 2, 3)))
+
+    assert len(calls) == 1
+    assert all(isinstance(outcome, go.Figure) for outcome in outcomes)
+    assert len({id(outcome) for outcome in outcomes}) == THREADS
+    assert all(list(outcome.data[0].y) == [1, 2, 3] for outcome in outcomes)
+
+def test_cached_figure_raises_in_every_waiter(figure_cache):
+    @cached_figure(versioned=False)
+    def chart(values):
+        _wait_for(lambda: figure_cache.stats()['misses'] == THREADS)
+        raise ValueError('failed')
+
+    outcomes = _run_together(lambda: chart((1, 2, 3)))
+
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert figure_cache.stats()['entries'] == 0
+
+def test_figure_cache_evicts_least_recently_used_within_its_budget():
+    size = sys.getsizeof(FigureCache(10 ** 6).put('probe', _bar_chart([1, 2, 3])))
+    cache = FigureCache(int(size * 2.5))
+
+    cache.put('a', _bar_chart([1, 2, 3]))
+    cache.put('b', _bar_chart([4, 5, 6]))
+    assert cache.get('a') is not None
+    cache.put('c', _bar_chart([7, 8, 9]))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['evictions'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+
+def test_figure_cache_skips_figures_over_its_budget():
+    cache = FigureCache(100)
+
+    spec = cache.put('big', _bar_chart(range(100)))
+
+    assert spec.startswith('{')
+    assert cache.get('big') is None
+    assert cache.stats()['bytes'] == 0
+
+def test_figure_cache_expires_entries_after_their_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(utils.cache.time, 'monotonic', lambda: clock[0])
+    cache = FigureCache(10 ** 6)
+
+    cache.put('short', _bar_chart([1]), ttl=10)
+    cache.put('forever', _bar_chart([2]))
+    clock[0] += 9
+    assert cache.get('short') is not None
+    clock[0] += 1
+
+    assert cache.get('short') is None
+    assert cache.get('forever') is not None
+    assert cache.stats()['entries'] == 1
+
+def test_figure_cache_counts_hits_and_misses():
+    cache = FigureCache(10 ** 6)
+
+    assert cache.get('chart') is None
+    cache.put('chart', _bar_chart([1, 2]))
+    cache.get('chart')
+    cache.get('chart')
+    cache.get_json('other', count=False)
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (2, 1, 0)
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
+    cache.clear()
+    assert cache.stats()['hits'] == cache.stats()['misses'] == cache.stats()['entries'] == 0
+
+def test_figure_cache_hits_return_distinct_figures():
+    cache = FigureCache(10 ** 6)
+    cache.put('chart', _bar_chart([1, 2]))
+
+    first, second = cache.get('chart'), cache.get('chart')
+    first.update_layout(title='changed')
+
+    assert first is not second
+    assert second.layout.title.text is None
+    assert list(second.data[0].y) == [1, 2]
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.forecasting import fit_holt_winters
+
+def test_fit_continues_noiseless_trend_and_season():
+    months = np.arange(60)
+    pattern = np.array([5, 3, 0, -2, -4, -6, -5, -2, 1, 3, 4, 3], dtype=np.float64)
+    values = np.stack([100 + 2 * months + pattern[months % 12], 80 - 0.5 * months + 3 * pattern[months % 12]])
+
+    fit = fit_holt_winters(values, workers=1)
+
+    future = np.arange(60, 72)
+    expected = np.stack([100 + 2 * future + pattern[future % 12], 80 - 0.5 * future + 3 * pattern[future % 12]])
+    np.testing.assert_allclose(fit.forecast(12), expected, atol=1e-6)
+    np.testing.assert_allclose(fit.rmse, 0, atol=1e-6)
+
+def test_series_are_fitted_independently(seasonal_values):
+    index = pd.Index([f'series {i}' for i in range(len(seasonal_values))], name='series')
+    fit = fit_holt_winters(seasonal_values, index=index, workers=1)
+    rows = [3, 250, 599]
+    alone = fit_holt_winters(seasonal_values[rows], index=index[rows], workers=1)
+    selected = fit.select(index[rows])
+
+    np.testing.assert_allclose(selected.forecast(12), alone.forecast(12))
+    np.testing.assert_allclose(selected.rmse, alone.rmse)
+    pd.testing.assert_frame_equal(selected.params, alone.params)
+
+def test_forecasts_are_floored_at_zero():
+    values = np.maximum(200 - 10 * np.arange(36, dtype=np.float64), 0)[None]
+
+    assert (fit_holt_winters(values, workers=1).forecast(24) >= 0).all()
+
+def test_fit_needs_more_than_one_season():
+    with pytest.raises(ValueError):
+        fit_holt_winters(np.ones((2, 12)), workers=1)
+
+def test_parallel_fit_matches_serial_fit(seasonal_values):
+    index = pd.RangeIndex(len(seasonal_values), name='series')
+    period = pd.Period('2025-12', freq='M')
+    serial = fit_holt_winters(seasonal_values, index=index, last_period=period, workers=1)
+    parallel = fit_holt_winters(seasonal_values, index=index, last_period=period, workers=2)
+
+    np.testing.assert_array_equal(parallel.level, serial.level)
+    np.testing.assert_array_equal(parallel.trend, serial.trend)
+    np.testing.assert_array_equal(parallel.season, serial.season)
+    np.testing.assert_array_equal(parallel.rmse, serial.rmse)
+    pd.testing.assert_frame_equal(parallel.params, serial.params)
+    assert parallel.last_period == serial.last_period
+    assert parallel.n_steps == serial.n_steps
+
+def test_advance_matches_a_refit_with_the_same_parameters(seasonal_values):
+    values = seasonal_values[:5]
+    fit = fit_holt_winters(values[:, :36], last_period=pd.Period('2024-12', freq='M'), workers=1)
+
+    advanced = fit.advance(values[:, 36:])
+
+    assert advanced.last_period == pd.Period('2025-12', freq='M')
+    assert advanced.n_steps == 36
+    for row, (alpha, beta, gamma) in enumerate(fit.params.itertuples(index=False)):
+        refit = fit_holt_winters(values[row], alphas=[alpha], betas=[beta], gammas=[gamma], workers=1)
+        np.testing.assert_allclose(advanced.level[row], refit.level[0])
+        np.testing.assert_allclose(advanced.trend[row], refit.trend[0])
+        np.testing.assert_allclose(advanced.season[row], refit.season[0])
+        np.testing.assert_allclose(advanced.rmse[row], refit.rmse[0])
+        np.testing.assert_allclose(advanced.forecast(12)[row], refit.forecast(12)[0])
+
+def test_advance_one_period_at_a_time(seasonal_values):
+    fit = fit_holt_winters(seasonal_values[:, :40], workers=1)
+
+    stepped = fit
+    for t in range(40, 48):
+        stepped = stepped.advance(seasonal_values[:, t])
+
+    np.testing.assert_allclose(stepped.forecast(12), fit.advance(seasonal_values[:, 40:]).forecast(12))
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.cubes import build_sales_cubes
+from utils.metrics import (FORECAST_METRICS, PRIORITY_CRITERIA, calculate_forecast_metrics, calculate_priority_score,
+                           calculate_priority_scores, calculate_stock_turnover)
+
+def test_metrics_of_one_series():
+    metrics = calculate_forecast_metrics([110, 90, 100, 120], [100, 100, 100, 100]).iloc[0]
+
+    assert metrics['mape'] == pytest.approx(10.0)
+    assert metrics['accuracy'] == pytest.approx(90.0)
+    assert metrics['wape'] == pytest.approx(10.0)
+    assert metrics['bias'] == pytest.approx(5.0)
+    assert metrics['rmse'] == pytest.approx(np.sqrt(150))
+    assert metrics['smape'] == pytest.approx(np.mean([20 / 210, 20 / 190, 0, 40 / 220]) * 100)
+
+def test_zero_actuals_are_safe():
+    predicted = np.array([[0, 0, 0], [10, 0, 5], [10, 20, 30]], dtype=np.float64)
+    actual = np.array([[0, 0, 0], [0, 0, 10], [0, 10, 30]], dtype=np.float64)
+
+    with np.errstate(all='raise'):
+        metrics = calculate_forecast_metrics(predicted, actual)
+
+    assert list(metrics.columns) == FORECAST_METRICS
+    # No nonzero actuals: MAPE, accuracy and WAPE are undefined, the rest are zero
+    assert metrics.loc[0, ['mape', 'accuracy', 'wape']].isna().all()
+    assert (metrics.loc[0, ['smape', 'bias', 'rmse']] == 0).all()
+    # MAPE averages over the nonzero actuals only, WAPE over the total
+    assert metrics.loc[1, 'mape'] == pytest.approx(50.0)
+    assert metrics.loc[1, 'wape'] == pytest.approx(150.0)
+    assert metrics.loc[2, 'mape'] == pytest.approx(50.0)
+    assert metrics.loc[2:, FORECAST_METRICS].notna().all().all()
+    assert np.isfinite(metrics[['smape', 'bias', 'rmse']].to_numpy()).all()
+
+def test_group_metrics_pool_their_series():
+    predicted = np.array([[110, 90], [200, 220], [50, 50]], dtype=np.float64)
+    actual = np.array([[100, 100], [200, 200], [40, 60]], dtype=np.float64)
+
+    per_series, per_group = calculate_forecast_metrics(
+        predicted, actual, groups=['dairy', 'dairy', 'water'], index=pd.Index(['a', 'b', 'c']))
+
+    pooled = calculate_forecast_metrics(predicted[:2].ravel(), actual[:2].ravel()).iloc[0]
+    pd.testing.assert_series_equal(per_group.loc['dairy'], pooled, check_names=False)
+    pd.testing.assert_series_equal(per_group.loc['water'], per_series.loc['c'], check_names=False)
+
+def test_shapes_must_match():
+    with pytest.raises(ValueError):
+        calculate_forecast_metrics(np.ones((2, 3)), np.ones((2, 4)))
+
+def _daily_sales(days, first_year_units, second_year_units):
+    dates = pd.date_range(end='2025-12-31', periods=days)
+    recent = np.arange(days) >= days - 365
+    units = np.where(recent, second_year_units, first_year_units)
+    return pd.DataFrame({
+        'date': np.tile(dates, 2),
+        'country': np.repeat(['France', 'Spain'], days),
+        'product': 'Evian Water',
+        'sales': np.tile(units, 2)
+    })
+
+def test_stock_turnover_uses_the_last_year_of_sales_and_frames_match_cubes():
+    sales_df = _daily_sales(3 * 365, 4, 5)
+    inventory_df = pd.DataFrame({'current_stock': [365, 365]})
+
+    from_frame = calculate_stock_turnover(sales_df, inventory_df)
+    from_cubes = calculate_stock_turnover(build_sales_cubes(sales_df), inventory_df)
+
+    # 2 countries x 365 days x 5 units over 730 units of stock; 25% more than the year before
+    assert from_frame == from_cubes == {'turnover': 5.0, 'change_pct': 25.0}
+
+def test_stock_turnover_change_needs_a_previous_year():
+    sales_df = _daily_sales(400, 4, 5)
+    inventory_df = pd.DataFrame({'current_stock': [730]})
+
+    assert calculate_stock_turnover(sales_df, inventory_df)['change_pct'] is None
+    assert calculate_stock_turnover(build_sales_cubes(sales_df), inventory_df)['change_pct'] is None
+
+def _reference_priority_score(request):
+    """The per-request scoring the batch version replaced"""
+    values = {name: request.get(name, default) for name, default in PRIORITY_CRITERIA.items()}
+    score = (values['market_size'] * 2 + values['growth_potential'] * 3 + values['technical_feasibility'] * 1.5 +
+             values['strategic_alignment'] * 2.5 - values['cost_estimate'] * 1.5)
+    score = max(0, min(100, int(score / 0.19)))
+    return {'score': score, 'level': 1 if score >= 70 else 2 if score >= 40 else 3}
+
+def test_batch_priority_scores_match_the_per_request_score():
+    rng = np.random.default_rng(0)
+    criteria = pd.DataFrame(rng.integers(0, 11, (2_000, len(PRIORITY_CRITERIA))), columns=list(PRIORITY_CRITERIA))
+    # Extremes that clip to 0 and 100
+    criteria.iloc[0] = [0, 0, 0, 0, 10]
+    criteria.iloc[1] = [10, 10, 10, 10, 0]
+
+    scores = calculate_priority_scores(criteria)
+
+    expected = [_reference_priority_score(row) for row in criteria.to_dict('records')]
+    assert scores.to_dict('records') == expected
+    assert scores['score'].tolist()[:2] == [0, 100]
+    assert set(scores['level']) == {1, 2, 3}
+
+def test_priority_score_defaults_missing_criteria():
+    request = {'market_size': 9, 'growth_potential': 8}
+
+    assert calculate_priority_score(request) == _reference_priority_score(request)
+    assert calculate_priority_score({}) == _reference_priority_score({})
+    assert calculate_priority_scores(pd.DataFrame({'market_size': [9, 2]})).to_dict('records') == [
+        _reference_priority_score({'market_size': 9}), _reference_priority_score({'market_size': 2})]
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.reconciliation import RECONCILIATION_METHODS, build_hierarchy, historical_proportions, reconcile
+
+COUNTRIES = ['France', 'Germany', 'Spain']
+PRODUCTS = ['Activia Yogurt', 'Evian Water', 'Alpro Soya', 'Volvic Water']
+
+@pytest.fixture
+def hierarchy():
+    return build_hierarchy(COUNTRIES, PRODUCTS)
+
+@pytest.fixture
+def base_forecasts(hierarchy):
+    return np.random.default_rng(0).uniform(100, 1000, (len(hierarchy.index), 6))
+
+def _incoherence(hierarchy, values):
+    return np.abs(values - hierarchy.aggregate(values[hierarchy.n_aggregates:])).max()
+
+def test_hierarchy_sums_bottom_series(hierarchy):
+    bottom = np.arange(len(COUNTRIES) * len(PRODUCTS), dtype=np.float64)
+    values = pd.Series(hierarchy.aggregate(bottom), index=hierarchy.index)
+
+    assert hierarchy.n_bottom == 12
+    assert values[('total', 'Total')] == bottom.sum()
+    assert values[('country', 'Germany')] == bottom[4:8].sum()
+    assert values[('product', 'Evian Water')] == bottom[[1, 5, 9]].sum()
+
+@pytest.mark.parametrize('method', RECONCILIATION_METHODS)
+def test_reconciled_forecasts_are_coherent(hierarchy, base_forecasts, method):
+    variances = np.random.default_rng(1).uniform(1, 50, len(hierarchy.index))
+    proportions = historical_proportions(np.random.default_rng(2).uniform(0, 10, (hierarchy.n_bottom, 24)))
+
+    reconciled = reconcile(hierarchy, base_forecasts, method=method, variances=variances, proportions=proportions)
+
+    assert _incoherence(hierarchy, base_forecasts) > 1
+    assert _incoherence(hierarchy, reconciled) < 1e-6
+
+def test_mint_with_equal_variances_is_the_least_squares_projection(hierarchy, base_forecasts):
+    summing = hierarchy.summing.toarray()
+    projection = summing @ np.linalg.solve(summing.T @ summing, summing.T @ base_forecasts)
+
+    np.testing.assert_allclose(reconcile(hierarchy, base_forecasts, method='mint'), projection)
+
+def test_mint_keeps_coherent_forecasts(hierarchy):
+    coherent = hierarchy.aggregate(np.random.default_rng(3).uniform(0, 100, (hierarchy.n_bottom, 4)))
+    variances = np.random.default_rng(4).uniform(1, 50, len(hierarchy.index))
+
+    np.testing.assert_allclose(reconcile(hierarchy, coherent, method='mint', variances=variances), coherent)
+
+def test_frames_keep_their_labels(hierarchy, base_forecasts):
+    frame = pd.DataFrame(base_forecasts, index=hierarchy.index, columns=pd.period_range('2026-01', periods=6, freq='M'))
+
+    reconciled = reconcile(hierarchy, frame, method='bottom_up')
+
+    pd.testing.assert_index_equal(reconciled.index, frame.index)
+    pd.testing.assert_index_equal(reconciled.columns, frame.columns)
+
+def test_top_down_needs_proportions(hierarchy, base_forecasts):
+    with pytest.raises(ValueError):
+        reconcile(hierarchy, base_forecasts, method='top_down')
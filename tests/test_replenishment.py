@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.forecasting import HoltWintersFit
+from utils.replenishment import calculate_replenishment_levels, product_demand_rates, service_factor
+
+def test_service_factor_is_the_normal_quantile():
+    np.testing.assert_allclose(service_factor([0.5, 0.95, 0.99]), [0.0, 1.6448536, 2.3263479], atol=1e-6)
+    with pytest.raises(ValueError):
+        service_factor(1.0)
+
+def test_replenishment_levels_follow_the_formulas():
+    inventory_df = pd.DataFrame({
+        'current_stock': [30, 500],
+        'max_capacity': [100, 1000],
+        'restock_days': [4, 9]
+    })
+
+    levels = calculate_replenishment_levels(inventory_df, [10.0, 2.5], [4.0, 0.0], service_level=0.95, review_days=7)
+
+    # z = 1.645: safety stock = ceil(z * 4 * sqrt(4)) = ceil(13.16)
+    assert levels['safety_stock'].tolist() == [14, 0]
+    # Demand over the lead time (rounded up) plus the safety stock
+    assert levels['reorder_point'].tolist() == [54, 23]
+    # ceil(10 * 11 + z * 4 * sqrt(11)) = ceil(131.82), and 2.5 * 16
+    assert levels['order_up_to'].tolist() == [132, 40]
+    # The first row is filled up to its capacity, the second has enough stock
+    assert levels['order_quantity'].tolist() == [70, 0]
+    assert levels['reorder'].tolist() == [True, False]
+
+def _product_fit():
+    return HoltWintersFit(
+        level=np.array([3000.0, 600.0]),
+        trend=np.array([100.0, 20.0]),
+        season=np.zeros((2, 12)),
+        params=pd.DataFrame({'alpha': [0.3, 0.3], 'beta': [0.1, 0.1], 'gamma': [0.1, 0.1]}),
+        rmse=np.array([310.0, 62.0]),
+        index=pd.Index(['Evian Water', 'Alpro Soya'], name='product'),
+        last_period=pd.Period('2025-12', freq='M'),
+        n_steps=24
+    )
+
+def test_demand_is_split_across_the_stocking_warehouses():
+    inventory_df = pd.DataFrame({
+        'warehouse': ['Paris', 'Lyon', 'Paris', 'Lyon'],
+        'product': ['Evian Water', 'Evian Water', 'Alpro Soya', 'Unknown Product']
+    })
+
+    demand, sigma = product_demand_rates(inventory_df, _product_fit())
+
+    # January forecasts of 3100 and 620 units over 31 days; errors independent from day to day
+    # and across warehouses, so each of the two Evian warehouses gets half the variance
+    np.testing.assert_allclose(demand[:3], [50.0, 50.0, 20.0])
+    np.testing.assert_allclose(sigma[:3], [310 / np.sqrt(31) / np.sqrt(2)] * 2 + [62 / np.sqrt(31)])
+    assert np.isnan(demand[3]) and np.isnan(sigma[3])
+
+def test_demand_can_come_from_other_forecasts():
+    inventory_df = pd.DataFrame({'warehouse': ['Paris', 'Lyon'], 'product': ['Evian Water', 'Alpro Soya']})
+    forecasts = pd.Series({'Alpro Soya': 310.0, 'Evian Water': 1240.0})
+
+    demand, sigma = product_demand_rates(inventory_df, _product_fit(), forecasts=forecasts)
+
+    np.testing.assert_allclose(demand, [40.0, 10.0])
+    np.testing.assert_allclose(sigma, [310 / np.sqrt(31), 62 / np.sqrt(31)])
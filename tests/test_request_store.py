@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from data.request_store import RequestStore
+from utils.metrics import calculate_priority_scores
+
+def _requests():
+    return pd.DataFrame({
+        'country': ['France', 'Spain', 'France', 'Italy', 'Spain'],
+        'request_type': ['Packaging', 'Flavour', 'Pricing', 'Packaging', 'Pricing'],
+        'market_size': [3, 1, 2, 1, 4],
+        'growth_potential': [2, 1, 1, 1, 3],
+        'technical_feasibility': [2, 1, 2, 2, 2],
+        'strategic_alignment': [1, 1, 1, 1, 2],
+        'cost_estimate': [4, 5, 3, 2, 2],
+        'submission_date': pd.to_datetime(['2025-01-10', '2025-02-01', '2025-02-15', '2025-03-01', '2025-03-20']),
+        'status': ['Pending', 'Approved', 'Pending', 'Pending', 'Under Review']
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    store = RequestStore(str(tmp_path / 'requests.db'), pool_size=1)
+    store.add_requests(_requests())
+    return store
+
+def test_added_requests_are_scored(store):
+    requests = store.requests()
+
+    expected = calculate_priority_scores(_requests())
+    assert store.count() == 5
+    assert sorted(requests['priority_score']) == sorted(expected['score'])
+    assert sorted(requests['priority']) == sorted(expected['level'])
+
+def test_top_requests_are_ordered_by_priority_score(store):
+    top = store.top_requests(3)
+
+    assert top['priority_score'].tolist() == [100, 60, 42]
+    assert top['country'].tolist() == ['Spain', 'France', 'France']
+
+def test_top_requests_filter_by_country_and_status(store):
+    france = store.top_requests(5, country='France')
+    pending = store.top_requests(5, status='Pending')
+
+    assert france['request_type'].tolist() == ['Packaging', 'Pricing']
+    assert set(pending['country']) == {'France', 'Italy'}
+    assert pending['priority_score'].is_monotonic_decreasing
+    assert store.top_requests(5, country='France', status='Approved').empty
+
+def test_requests_filter_by_submission_date(store):
+    assert store.requests(since='2025-03-01')['country'].tolist() == ['Spain', 'Italy']
+
+def test_count_by_groups_in_value_order(store):
+    counts = store.count_by('country')
+
+    assert counts.index.tolist() == ['France', 'Italy', 'Spain']
+    assert counts.tolist() == [2, 1, 2]
+    assert store.count_by('status').to_dict() == {'Approved': 1, 'Pending': 3, 'Under Review': 1}
+
+def test_count_by_rejects_other_columns(store):
+    with pytest.raises(ValueError):
+        store.count_by('request_id; DROP TABLE country_requests')
+
+def test_update_status(store):
+    request_id = store.top_requests(1)['request_id'].iloc[0]
+
+    store.update_status(request_id, 'Approved')
+
+    assert store.count_by('status').to_dict() == {'Approved': 2, 'Pending': 3}
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from data.sample_data import create_mock_sales_data, iter_mock_sales_data
+
+COUNTRIES = ['France', 'Spain', 'Germany']
+PRODUCTS = ['Evian Water', 'Alpro Soya', 'Danone Greek']
+
+def _sales(days, end_date, seed=0, compact=False):
+    return create_mock_sales_data(days=days, end_date=end_date, countries=COUNTRIES, products=PRODUCTS,
+                                  seed=seed, compact=compact)
+
+def _rows_in(df, start_date, end_date):
+    return df[df['date'].between(start_date, end_date)].reset_index(drop=True)
+
+def test_same_seed_gives_the_same_history():
+    pd.testing.assert_frame_equal(_sales(120, '2025-06-30'), _sales(120, '2025-06-30'))
+
+def test_different_seeds_give_different_histories():
+    assert not _sales(120, '2025-06-30', seed=0)['sales'].equals(_sales(120, '2025-06-30', seed=1)['sales'])
+
+def test_a_day_does_not_depend_on_the_date_range():
+    short = _sales(60, '2025-04-30')
+    long = _sales(365, '2025-12-31')
+
+    pd.testing.assert_frame_equal(_rows_in(long, '2025-03-01', '2025-04-30'),
+                                  _rows_in(short, '2025-03-01', '2025-04-30'))
+
+def test_streamed_chunks_match_the_whole_frame():
+    expected = _sales(120, '2025-06-30')
+
+    for chunk_rows in [None, 100, 1_000]:
+        chunks = list(iter_mock_sales_data('2025-03-02', '2025-06-30', seed=0, chunk_rows=chunk_rows,
+                                           countries=COUNTRIES, products=PRODUCTS))
+        streamed = pd.concat(chunks, ignore_index=True)
+
+        pd.testing.assert_frame_equal(streamed, expected)
+        if chunk_rows is not None:
+            assert all(len(chunk) == chunk_rows for chunk in chunks[:-1])
+
+def test_streamed_compact_chunks_match_the_compact_frame():
+    chunks = iter_mock_sales_data('2025-03-02', '2025-06-30', seed=0, chunk_rows=500,
+                                  countries=COUNTRIES, products=PRODUCTS, compact=True)
+
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), _sales(120, '2025-06-30', compact=True))
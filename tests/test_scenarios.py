@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from utils.forecasting import fit_holt_winters
+from utils.scenarios import (
+    MARKET_TRENDS, PROMOTION_STEPS, QUANTILES, SEASONALITY_STEPS,
+    forecast_bands, scenario_bands, seasonality_scale, sensitivity_grid, simulate_demand_paths
+)
+
+def _fit(values):
+    index = pd.Index([f'product {i}' for i in range(3)], name='product')
+    return fit_holt_winters(values[:3], index=index, last_period=pd.Period('2025-12', freq='M'), workers=1)
+
+def test_simulation_is_reproducible_with_a_seed(seasonal_values):
+    fit = _fit(seasonal_values)
+
+    paths = simulate_demand_paths(fit, horizon=6, n_paths=500, seed=7)
+
+    assert paths.shape == (3, 500, 6)
+    assert paths.dtype == np.float32
+    assert (paths >= 0).all()
+    np.testing.assert_array_equal(paths, simulate_demand_paths(fit, horizon=6, n_paths=500, seed=7))
+    assert not np.array_equal(paths, simulate_demand_paths(fit, horizon=6, n_paths=500, seed=8))
+
+def test_bands_are_ordered_percentiles():
+    paths = np.random.default_rng(0).gamma(2.0, 100.0, (2, 1000, 4))
+
+    bands = scenario_bands(paths, index=['a', 'b'])
+
+    assert list(bands.columns) == [f'p{q}' for q in QUANTILES]
+    assert bands.index.tolist() == [(s, p) for s in ['a', 'b'] for p in range(1, 5)]
+    assert (bands.diff(axis=1).iloc[:, 1:] >= 0).all().all()
+    np.testing.assert_allclose(bands.loc[('b', 3), 'p50'], np.median(paths[1, :, 2]))
+
+def test_forecast_bands_follow_the_fitted_months(seasonal_values):
+    bands = forecast_bands(_fit(seasonal_values), horizon=12, n_paths=200)
+
+    months = bands.loc['product 1'].index
+    assert months[0] == pd.Timestamp('2026-01-01')
+    assert len(months) == 12
+
+def test_sensitivity_grid_matches_simulated_paths(seasonal_values):
+    fit = _fit(seasonal_values)
+    promotion, strength = 30, 8
+
+    grid = {metric: sensitivity_grid(fit, trend='increasing', metric=metric, n_paths=400, quantile=95, seed=3)
+            for metric in ('total', 'peak')}
+    paths = simulate_demand_paths(fit, n_paths=400, trend_growth=MARKET_TRENDS['increasing'],
+                                  promotion_lift=promotion / 100, seasonality=seasonality_scale(strength), seed=3)
+
+    assert grid['peak'].shape == (3 * len(PROMOTION_STEPS), len(SEASONALITY_STEPS))
+    np.testing.assert_allclose(grid['peak'].loc[('product 2', promotion), strength],
+                               np.percentile(paths[2].max(axis=1), 95), rtol=1e-5)
+    # Totals skip the flooring at zero, which the simulated demand here never reaches
+    np.testing.assert_allclose(grid['total'].loc[('product 2', promotion), strength],
+                               np.percentile(paths[2].sum(axis=1), 95), rtol=1e-5)
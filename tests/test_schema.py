@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.schema import SALES_CALENDAR_COLUMNS, categorical_codes, compact_sales_frame, sales_dtype
+
+def _wide_sales():
+    dates = pd.to_datetime(['2025-01-30', '2025-01-31', '2025-02-01'])
+    return pd.DataFrame({
+        'date': np.repeat(dates, 2),
+        'country': ['France', 'Spain'] * 3,
+        'product': ['Evian Water'] * 6,
+        'sales': [120, 80, 95, 60, 110, 70],
+        'year': np.repeat(dates.year, 2),
+        'month': np.repeat(dates.month, 2)
+    })
+
+def test_compact_frame_drops_calendar_columns_and_shrinks_dtypes():
+    df = compact_sales_frame(_wide_sales())
+
+    assert list(df.columns) == ['date', 'country', 'product', 'sales']
+    assert list(df['country'].cat.categories) == ['France', 'Spain']
+    assert isinstance(df['product'].dtype, pd.CategoricalDtype)
+    assert df['sales'].dtype == np.uint16
+    assert df['sales'].tolist() == [120, 80, 95, 60, 110, 70]
+
+def test_compact_chunks_with_the_same_categories_concatenate():
+    wide = _wide_sales()
+    chunks = [compact_sales_frame(wide.iloc[i:i + 2], countries=['France', 'Spain'], products=['Evian Water'])
+              for i in range(0, len(wide), 2)]
+
+    df = pd.concat(chunks, ignore_index=True)
+
+    assert isinstance(df['country'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(df, compact_sales_frame(wide))
+
+def test_sales_dtype_widens_out_of_uint16_range():
+    assert sales_dtype([0, 65_535]) == np.uint16
+    assert sales_dtype([0, 65_536]) == np.int32
+    assert sales_dtype([-1, 10]) == np.int32
+    assert sales_dtype([]) == np.uint16
+
+def test_categorical_codes_fit_the_category_count():
+    assert categorical_codes(100) == np.int8
+    assert categorical_codes(1_000) == np.int16
+    assert categorical_codes(0) == np.int8
+
+def test_calendar_accessor_derives_columns_from_the_date():
+    df = compact_sales_frame(_wide_sales())
+
+    assert df.calendar.year.dtype == np.uint16
+    assert df.calendar['day'].tolist() == [30, 30, 31, 31, 1, 1]
+    assert df.calendar.dayofweek.tolist() == [3, 3, 4, 4, 5, 5]
+    assert df.calendar.month is df.calendar.month
+    assert list(df.columns) == ['date', 'country', 'product', 'sales']
+
+def test_calendar_accessor_prefers_stored_columns():
+    df = _wide_sales()
+
+    pd.testing.assert_series_equal(df.calendar['month'], df['month'])
+    assert df.calendar.year.dtype == df['year'].dtype != np.uint16
+
+def test_calendar_frame():
+    frame = compact_sales_frame(_wide_sales()).calendar.frame()
+
+    assert list(frame.columns) == SALES_CALENDAR_COLUMNS
+    assert frame['month'].tolist() == [1, 1, 1, 1, 2, 2]
+
+def test_calendar_accessor_rejects_other_columns():
+    df = compact_sales_frame(_wide_sales())
+
+    with pytest.raises(KeyError):
+        df.calendar['week']
+    with pytest.raises(AttributeError):
+        df.calendar.week
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from data.sample_data import create_mock_sales_data
+from data.sources import CSVDataSource, ParquetDataSource, SQLiteDataSource
+from data.storage import write_sales_dataset
+
+def _sales():
+    sales = create_mock_sales_data(days=89, end_date='2025-03-31', countries=['France', 'Spain'],
+                                   products=['Evian Water', 'Alpro Soya'], seed=0)
+    return sales[['date', 'country', 'product', 'sales']]
+
+def _rows(df):
+    rows = pd.DataFrame({
+        'date': df['date'].to_numpy().astype('datetime64[ns]'),
+        'country': df['country'].astype(str).to_numpy(),
+        'product': df['product'].astype(str).to_numpy(),
+        'sales': df['sales'].astype(int).to_numpy()
+    })
+    return rows.sort_values(['date', 'country', 'product']).reset_index(drop=True)
+
+def _csv_source(root):
+    (root / 'sales').mkdir()
+
+    def append(df, part):
+        df.to_csv(root / 'sales' / f'part-{part}.csv', index=False)
+
+    return CSVDataSource(str(root)), append
+
+def _parquet_source(root):
+    def append(df, part):
+        write_sales_dataset(df, str(root / 'sales'), append=part > 0)
+
+    return ParquetDataSource(str(root)), append
+
+def _sqlite_source(root):
+    path = str(root / 'stockquest.db')
+
+    def append(df, part):
+        with sqlite3.connect(path) as conn:
+            df.assign(date=df['date'].dt.strftime('%Y-%m-%d')).to_sql('sales', conn, if_exists='append', index=False)
+
+    # The table must exist before the source's pool opens the database
+    append(_sales().iloc[:0], 0)
+    return SQLiteDataSource(path, pool_size=1), append
+
+@pytest.mark.parametrize('make_source', [_csv_source, _parquet_source, _sqlite_source])
+def test_refresh_reads_only_the_appended_rows(tmp_path, make_source):
+    sales = _sales()
+    first, second = sales[sales['date'] < '2025-03-01'], sales[sales['date'] >= '2025-03-01']
+    source, append = make_source(tmp_path)
+    append(first, 0)
+    pd.testing.assert_frame_equal(_rows(source.load_sales()), _rows(first))
+    version = source.dataset_version('sales')
+
+    append(second, 1)
+
+    def full_read(name):
+        raise AssertionError(f'{name} was re-read in full')
+
+    source._read = full_read
+    assert source.refresh() == ['sales']
+    pd.testing.assert_frame_equal(_rows(source.load_sales()), _rows(sales))
+    assert source.dataset_version('sales') == version + 1
+
+@pytest.mark.parametrize('make_source', [_csv_source, _parquet_source, _sqlite_source])
+def test_refresh_without_changes(tmp_path, make_source):
+    source, append = make_source(tmp_path)
+    append(_sales(), 0)
+    sales = source.load_sales()
+
+    assert source.refresh() == []
+    assert source.load_sales() is sales
+    assert source.dataset_version('sales') == 1
+
+def test_refresh_rereads_a_rewritten_extract(tmp_path):
+    sales = _sales()
+    source, append = _csv_source(tmp_path)
+    append(sales, 0)
+    source.load_sales()
+
+    (tmp_path / 'sales' / 'part-0.csv').unlink()
+    append(sales[sales['country'] == 'Spain'], 1)
+
+    assert source.refresh() == ['sales']
+    pd.testing.assert_frame_equal(_rows(source.load_sales()), _rows(sales[sales['country'] == 'Spain']))
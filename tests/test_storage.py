@@ -0,0 +1,76 @@
+import pandas as pd
+
+from data.sample_data import create_mock_sales_data, iter_mock_sales_data
+from data.storage import read_sales_dataset, write_sales_dataset
+
+COUNTRIES = ['France', 'Spain', 'Germany']
+PRODUCTS = ['Evian Water', 'Alpro Soya']
+
+def _sales(start_date, end_date):
+    return create_mock_sales_data(days=(pd.Timestamp(end_date) - pd.Timestamp(start_date)).days, end_date=end_date,
+                                  countries=COUNTRIES, products=PRODUCTS, seed=0, compact=True)
+
+def _rows(df):
+    """Sales rows as plain values, in a fixed order"""
+    rows = pd.DataFrame({
+        'date': df['date'].to_numpy().astype('datetime64[ns]'),
+        'country': df['country'].astype(str).to_numpy(),
+        'product': df['product'].astype(str).to_numpy(),
+        'sales': df['sales'].astype(int).to_numpy()
+    })
+    return rows.sort_values(['date', 'country', 'product']).reset_index(drop=True)
+
+def test_sales_round_trip(tmp_path):
+    sales = _sales('2025-01-01', '2025-03-31')
+    write_sales_dataset(sales, str(tmp_path / 'sales'))
+
+    df = read_sales_dataset(str(tmp_path / 'sales'))
+
+    pd.testing.assert_frame_equal(_rows(df), _rows(sales))
+    assert isinstance(df['country'].dtype, pd.CategoricalDtype)
+    assert df['sales'].dtype == 'uint16'
+
+def test_sales_round_trip_from_chunks(tmp_path):
+    chunks = iter_mock_sales_data('2025-01-01', '2025-03-31', seed=0, chunk_rows=100,
+                                  countries=COUNTRIES, products=PRODUCTS, compact=True)
+    write_sales_dataset(chunks, str(tmp_path / 'sales'))
+
+    df = read_sales_dataset(str(tmp_path / 'sales'))
+
+    pd.testing.assert_frame_equal(_rows(df), _rows(_sales('2025-01-01', '2025-03-31')))
+
+def test_read_filters_countries_and_months(tmp_path):
+    sales = _sales('2025-01-01', '2025-04-30')
+    write_sales_dataset(sales, str(tmp_path / 'sales'))
+
+    df = read_sales_dataset(str(tmp_path / 'sales'), countries=['Spain'], start_month='2025-02', end_month='2025-03')
+
+    expected = sales[(sales['country'] == 'Spain') & sales['date'].between('2025-02-01', '2025-03-31')]
+    pd.testing.assert_frame_equal(_rows(df), _rows(expected))
+
+def test_read_only_requested_columns(tmp_path):
+    write_sales_dataset(_sales('2025-01-01', '2025-01-31'), str(tmp_path / 'sales'))
+
+    df = read_sales_dataset(str(tmp_path / 'sales'), columns=['date', 'sales'])
+
+    assert list(df.columns) == ['date', 'sales']
+
+def test_append_adds_to_the_dataset(tmp_path):
+    sales = _sales('2025-01-01', '2025-03-31')
+    first, second = sales[sales['date'] < '2025-03-01'], sales[sales['date'] >= '2025-03-01']
+    write_sales_dataset(first, str(tmp_path / 'sales'))
+    write_sales_dataset(second, str(tmp_path / 'sales'), append=True)
+
+    df = read_sales_dataset(str(tmp_path / 'sales'))
+
+    pd.testing.assert_frame_equal(_rows(df), _rows(sales))
+
+def test_write_without_append_replaces_the_dataset(tmp_path):
+    sales = _sales('2025-01-01', '2025-03-31')
+    write_sales_dataset(sales, str(tmp_path / 'sales'))
+    march = sales[sales['date'] >= '2025-03-01']
+    write_sales_dataset(march, str(tmp_path / 'sales'))
+
+    df = read_sales_dataset(str(tmp_path / 'sales'))
+
+    pd.testing.assert_frame_equal(_rows(df), _rows(march))
@@ -0,0 +1,232 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from data.storage import COMPLETE_MARKER, DEFAULT_DATA_DIR
+from utils.cache import process_singleton
+from utils.forecasting import HoltWintersFit
+
+# Root directory of the persisted model artifacts
+DEFAULT_ARTIFACT_DIR = os.environ.get('STOCKQUEST_ARTIFACT_DIR', os.path.join(DEFAULT_DATA_DIR, 'models'))
+
+# Series per shard file; a lookup loads only the shards of the series it asks for
+DEFAULT_SHARD_SIZE = 4096
+
+# Snapshots kept per model when a new one is saved
+DEFAULT_KEEP_SNAPSHOTS = 3
+
+# Per-series state arrays stored in every shard
+STATE_ARRAYS = ['level', 'trend', 'season', 'params', 'rmse']
+
+class ModelArtifact:
+    """One saved snapshot of a fitted model, whose index and shards are read on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as file:
+            self.meta = json.load(file)
+        self.snapshot = self.meta['snapshot']
+        self.digest = self.meta['digest']
+        self.n_steps = self.meta['n_steps']
+        self.last_period = (pd.Period(self.meta['last_period'], freq=self.meta['freq'])
+                            if self.meta['last_period'] else None)
+        self._index = None
+        # Loaded shards are kept, so later lookups are served from memory
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.meta['series']
+
+    @property
+    def index(self):
+        """Series labels, read from the Arrow index file on first use"""
+        with self._lock:
+            if self._index is None:
+                with pa.memory_map(os.path.join(self.path, 'series.arrow')) as source:
+                    labels = pa.ipc.open_file(source).read_all().to_pandas()
+                names = self.meta['index_names']
+                if len(names) > 1:
+                    self._index = pd.MultiIndex.from_frame(labels, names=names)
+                else:
+                    self._index = pd.Index(labels.iloc[:, 0], name=names[0])
+            return self._index
+
+    @property
+    def shards_loaded(self):
+        return len(self._shards)
+
+    def periods(self, horizon):
+        """Labels of the next ``horizon`` periods (None without a fitted last period)"""
+        if self.last_period is None:
+            return None
+        return pd.period_range(self.last_period + 1, periods=horizon, freq=self.last_period.freq)
+
+    def _shard(self, number):
+        with self._lock:
+            if number not in self._shards:
+                with np.load(os.path.join(self.path, f'shard-{number:05d}.npz'), allow_pickle=False) as arrays:
+                    self._shards[number] = {name: arrays[name] for name in STATE_ARRAYS}
+            return self._shards[number]
+
+    def _fit(self, positions, index):
+        shard_size = self.meta['shard_size']
+        shards, rows = np.divmod(positions, shard_size)
+        state = {name: [] for name in STATE_ARRAYS}
+        order = []
+
+        # Gather shard by shard, then restore the requested order
+        for number in np.unique(shards):
+            selected = np.flatnonzero(shards == number)
+            arrays = self._shard(int(number))
+            for name in STATE_ARRAYS:
+                state[name].append(arrays[name][rows[selected]])
+            order.append(selected)
+
+        restore = np.argsort(np.concatenate(order)) if order else np.array([], dtype=int)
+        state = {name: np.concatenate(parts)[restore] if parts else np.empty(0) for name, parts in state.items()}
+
+        return HoltWintersFit(
+            level=state['level'],
+            trend=state['trend'],
+            season=state['season'].reshape(len(positions), self.meta['season_length']),
+            params=pd.DataFrame(state['params'].reshape(len(positions), 3), index=index,
+                                columns=['alpha', 'beta', 'gamma']),
+            rmse=state['rmse'],
+            index=index,
+            last_period=self.last_period,
+            n_steps=self.n_steps
+        )
+
+    def select(self, labels):
+        """The fit of only the series in ``labels``, loading just the shards that hold them"""
+        positions = self.index.get_indexer(labels)
+        if (positions < 0).any():
+            raise KeyError(f"Unknown series: {[l for l, p in zip(labels, positions) if p < 0]}")
+        return self._fit(positions, self.index[positions])
+
+    def load(self):
+        """The fit of every series"""
+        return self._fit(np.arange(len(self)), self.index)
+
+class ModelArtifactStore:
+    """Fitted models persisted as versioned snapshots under ``root``"""
+
+    def __init__(self, root=None, shard_size=DEFAULT_SHARD_SIZE, keep=DEFAULT_KEEP_SNAPSHOTS):
+        self.root = DEFAULT_ARTIFACT_DIR if root is None else root
+        self.shard_size = shard_size
+        self.keep = keep
+
+    # Snapshots live in <root>/<name>/<snapshot>/ (meta.json, series.arrow and .npz state shards),
+    # with LATEST naming the newest
+    def _model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def save(self, name, fit, snapshot, digest=None):
+        """Write ``fit`` as snapshot ``snapshot`` of model ``name`` and make it the latest. Returns its path."""
+        path = os.path.join(self._model_dir(name), snapshot)
+        if not os.path.exists(os.path.join(path, COMPLETE_MARKER)):
+            # Written aside, marked complete and renamed into place, so readers never see a partial snapshot
+            temporary = os.path.join(self._model_dir(name), f'.{snapshot}-{uuid.uuid4().hex}')
+            os.makedirs(temporary)
+            try:
+                self._write(temporary, fit, snapshot, digest)
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                os.replace(temporary, path)
+            finally:
+                shutil.rmtree(temporary, ignore_errors=True)
+
+        self._set_latest(name, snapshot)
+        self.prune(name)
+        return path
+
+    def _write(self, path, fit, snapshot, digest):
+        labels = fit.index.to_frame(index=False)
+        labels.columns = [str(column) for column in labels.columns]
+        with pa.OSFile(os.path.join(path, 'series.arrow'), 'wb') as sink:
+            # Native column types, with pandas metadata so categoricals and numbers come back as they were
+            table = pa.Table.from_pandas(labels, preserve_index=False)
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        state = {
+            'level': fit.level,
+            'trend': fit.trend,
+            'season': fit.season,
+            'params': fit.params.to_numpy(),
+            'rmse': fit.rmse
+        }
+        for number, start in enumerate(range(0, max(len(fit.level), 1), self.shard_size)):
+            with open(os.path.join(path, f'shard-{number:05d}.npz'), 'wb') as file:
+                np.savez(file, **{name: values[start:start + self.shard_size] for name, values in state.items()})
+
+        meta = {
+            'snapshot': snapshot,
+            'digest': digest,
+            'series': len(fit.level),
+            'shard_size': self.shard_size,
+            'season_length': fit.season_length,
+            'n_steps': int(fit.n_steps),
+            'index_names': list(fit.index.names),
+            'last_period': '' if fit.last_period is None else str(fit.last_period),
+            'freq': '' if fit.last_period is None else fit.last_period.freqstr
+        }
+        with open(os.path.join(path, 'meta.json'), 'w') as file:
+            json.dump(meta, file)
+
+        with open(os.path.join(path, COMPLETE_MARKER), 'w'):
+            pass
+
+    def _set_latest(self, name, snapshot):
+        pointer = os.path.join(self._model_dir(name), 'LATEST')
+        temporary = f'{pointer}.{uuid.uuid4().hex}'
+        with open(temporary, 'w') as file:
+            file.write(snapshot)
+        os.replace(temporary, pointer)
+
+    def snapshots(self, name):
+        """Complete snapshots of a model, oldest first"""
+        root = self._model_dir(name)
+        if not os.path.isdir(root):
+            return []
+        complete = [entry for entry in os.listdir(root)
+                    if not entry.startswith('.') and os.path.exists(os.path.join(root, entry, COMPLETE_MARKER))]
+        return sorted(complete, key=lambda entry: os.stat(os.path.join(root, entry, COMPLETE_MARKER)).st_mtime_ns)
+
+    def latest(self, name):
+        """The newest snapshot name of a model, or None"""
+        try:
+            with open(os.path.join(self._model_dir(name), 'LATEST')) as file:
+                snapshot = file.read().strip()
+        except FileNotFoundError:
+            return None
+        return snapshot if os.path.exists(os.path.join(self._model_dir(name), snapshot, COMPLETE_MARKER)) else None
+
+    def open(self, name, snapshot=None):
+        """A lazily loaded snapshot (the latest by default), or None when there is none"""
+        snapshot = self.latest(name) if snapshot is None else snapshot
+        if snapshot is None:
+            return None
+        return ModelArtifact(os.path.join(self._model_dir(name), snapshot))
+
+    def prune(self, name, keep=None):
+        """Delete all but the newest ``keep`` snapshots (never the latest). Returns the deleted names."""
+        keep = self.keep if keep is None else keep
+        latest = self.latest(name)
+        stale = [snapshot for snapshot in self.snapshots(name) if snapshot != latest]
+        stale = stale[:max(len(stale) - max(keep - 1, 0), 0)]
+        for snapshot in stale:
+            shutil.rmtree(os.path.join(self._model_dir(name), snapshot), ignore_errors=True)
+        return stale
+
+@process_singleton
+def get_artifact_store():
+    """The process-wide model artifact store under ``STOCKQUEST_ARTIFACT_DIR``"""
+    return ModelArtifactStore()
@@ -0,0 +1,252 @@
+import argparse
+import concurrent.futures
+import datetime
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data.sources import SQLiteStore, get_data_source
+from data.scale_tiers import add_tier_argument, tier_data_source
+from data.storage import DEFAULT_DATA_DIR
+from utils.cache import cached, process_singleton
+from utils.forecasting import FORECAST_LEVELS, _history_digest, _level_values, fit_holt_winters
+from utils.metrics import calculate_forecast_metrics
+
+# SQLite database holding backtest runs and their per-series results
+DEFAULT_BACKTEST_DB = os.environ.get('STOCKQUEST_BACKTEST_DB', os.path.join(DEFAULT_DATA_DIR, 'backtest.db'))
+
+# Rolling origins evaluated, and periods forecast from each
+DEFAULT_FOLDS = 6
+DEFAULT_HORIZON = 3
+
+METRIC_COLUMNS = ['accuracy', 'mape', 'bias', 'rmse']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backtest_runs (
+    run_id INTEGER PRIMARY KEY,
+    level TEXT NOT NULL,
+    history_end TEXT NOT NULL,
+    history_digest TEXT,
+    folds INTEGER NOT NULL,
+    horizon INTEGER NOT NULL,
+    series INTEGER NOT NULL,
+    accuracy REAL,
+    mape REAL,
+    bias REAL,
+    rmse REAL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_backtest_runs_level
+    ON backtest_runs (level, run_id DESC);
+CREATE TABLE IF NOT EXISTS backtest_results (
+    run_id INTEGER NOT NULL REFERENCES backtest_runs (run_id),
+    series TEXT NOT NULL,
+    accuracy REAL,
+    mape REAL,
+    bias REAL,
+    rmse REAL,
+    PRIMARY KEY (run_id, series)
+);
+"""
+
+def rolling_origins(n_periods, folds=DEFAULT_FOLDS, horizon=DEFAULT_HORIZON, season_length=12):
+    """Forecast origins of the folds: the last ``folds`` positions that leave ``horizon`` periods to score"""
+    # Each fold trains on the periods before its origin, so the earliest needs more than a season of history
+    last = n_periods - horizon
+    origins = list(range(max(last - folds + 1, season_length + 1), last + 1))
+    if not origins:
+        raise ValueError(f"Need more than {season_length + horizon} periods to backtest, got {n_periods}")
+    return origins
+
+def _fold_forecast(history, horizon, season_length):
+    """Forecast ``horizon`` periods past a fold's training history (runs in a worker process)"""
+    return fit_holt_winters(history, season_length=season_length, workers=1).forecast(horizon)
+
+def backtest(values, index=None, folds=DEFAULT_FOLDS, horizon=DEFAULT_HORIZON, season_length=12,
+             max_workers=None):
+    """Evaluate Holt-Winters forecasts of every series over rolling origins. Returns the metrics per series."""
+    values = np.asarray(values, dtype=np.float64)
+    origins = rolling_origins(values.shape[1], folds, horizon, season_length)
+
+    # Each fold refits every series on the history before its origin; one process per fold by default
+    if max_workers is None:
+        max_workers = min(len(origins), os.cpu_count() or 1)
+
+    if max_workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+            forecasts = list(pool.map(
+                _fold_forecast,
+                [values[:, :origin] for origin in origins],
+                [horizon] * len(origins),
+                [season_length] * len(origins)
+            ))
+    else:
+        forecasts = [_fold_forecast(values[:, :origin], horizon, season_length) for origin in origins]
+
+    # (series, folds * horizon) forecasts next to the actuals they predicted, scored in one pass
+    predicted = np.concatenate(forecasts, axis=1)
+    actual = np.concatenate([values[:, origin:origin + horizon] for origin in origins], axis=1)
+
+    return calculate_forecast_metrics(
+        predicted, actual, index=pd.RangeIndex(len(values)) if index is None else index)
+
+def _complete_history(cubes, level, grain):
+    """Complete-period values of one level of the sales cubes, with their index and periods"""
+    values, index = _level_values(cubes, level, grain)
+    complete = np.asarray(cubes.complete_periods(grain))
+    return values[:, complete], index, cubes.periods[grain][complete]
+
+def backtest_sales_cubes(cubes, level='product', grain='monthly', folds=DEFAULT_FOLDS, horizon=DEFAULT_HORIZON,
+                         max_workers=None):
+    """Backtest the complete periods of the sales cubes at one level. Returns the results, last period and digest."""
+    values, index, periods = _complete_history(cubes, level, grain)
+
+    results = backtest(values, index=index, folds=folds, horizon=horizon, max_workers=max_workers)
+
+    return results, periods[-1], _history_digest(values)
+
+def _series_label(label):
+    return ' / '.join(map(str, label)) if isinstance(label, tuple) else str(label)
+
+class BacktestStore(SQLiteStore):
+    """Backtest runs and their per-series metrics in a SQLite database"""
+
+    schema = SCHEMA
+
+    def __init__(self, path=None, pool_size=2):
+        super().__init__(DEFAULT_BACKTEST_DB if path is None else path, pool_size=pool_size)
+
+    def _migrate(self, conn):
+        # Databases created before runs recorded their history digest
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(backtest_runs)')]
+        if 'history_digest' not in columns:
+            conn.execute('ALTER TABLE backtest_runs ADD COLUMN history_digest TEXT')
+
+    def save_run(self, results, level, history_end, history_digest, folds, horizon):
+        """Store one run's per-series results and their averages. Returns the run id."""
+        summary = results[METRIC_COLUMNS].mean()
+        rows = zip(
+            map(_series_label, results.index),
+            *(results[column].astype(float) for column in METRIC_COLUMNS)
+        )
+
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO backtest_runs (level, history_end, history_digest, folds, horizon, series, '
+                'accuracy, mape, bias, rmse, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (level, str(history_end), history_digest, int(folds), int(horizon), len(results),
+                 *(float(summary[column]) for column in METRIC_COLUMNS),
+                 datetime.datetime.now().isoformat(timespec='seconds'))
+            )
+            run_id = cursor.lastrowid
+            conn.executemany(
+                'INSERT INTO backtest_results (run_id, series, accuracy, mape, bias, rmse) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                ((run_id, *row) for row in rows)
+            )
+            conn.commit()
+
+        return run_id
+
+    def runs(self, level=None, history_digest=None, limit=None):
+        """Stored runs, newest first, optionally only those of one level and history"""
+        sql = 'SELECT * FROM backtest_runs'
+        conditions, params = [], []
+        if level is not None:
+            conditions.append('level = ?')
+            params.append(level)
+        if history_digest is not None:
+            conditions.append('history_digest = ?')
+            params.append(history_digest)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY run_id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+
+        with self.pool.connection() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def results(self, run_id):
+        """Per-series metrics of one run"""
+        with self.pool.connection() as conn:
+            return pd.read_sql_query(
+                f"SELECT series, {', '.join(METRIC_COLUMNS)} FROM backtest_results WHERE run_id = ? ORDER BY series",
+                conn, params=(int(run_id),), index_col='series'
+            )
+
+@process_singleton
+def get_backtest_store():
+    """The process-wide backtest store"""
+    return BacktestStore()
+
+def run_backtest(level='product', folds=DEFAULT_FOLDS, horizon=DEFAULT_HORIZON, store=None, max_workers=None):
+    """Backtest the current sales history and store the results. Returns the run id."""
+    store = get_backtest_store() if store is None else store
+    results, history_end, history_digest = backtest_sales_cubes(
+        get_data_source().load_sales_cubes(), level=level, folds=folds, horizon=horizon, max_workers=max_workers)
+
+    return store.save_run(results, level, history_end, history_digest, folds, horizon)
+
+@cached(maxsize=4)
+def _accuracy_kpi(level):
+    # Raises LookupError, which is not cached, until a run of the current history is stored
+    store = get_backtest_store()
+    values, _, periods = _complete_history(get_data_source().load_sales_cubes(), level, 'monthly')
+    history_digest = _history_digest(values)
+
+    current = store.runs(level=level, history_digest=history_digest, limit=1)
+    if current.empty:
+        raise LookupError(f'no stored {level} backtest of the current sales history')
+
+    accuracy = float(current['accuracy'].iloc[0])
+
+    # Runs are matched on the digest of their history, so other datasets are never compared;
+    # the previous run is the latest one over a shorter prefix of this history
+    change = None
+    positions = {str(period): position for position, period in enumerate(periods[:-1])}
+    for run in store.runs(level=level).itertuples():
+        position = positions.get(run.history_end)
+        if position is not None and _history_digest(values[:, :position + 1]) == run.history_digest:
+            change = round(accuracy - float(run.accuracy), 1)
+            break
+
+    return {'accuracy': round(accuracy, 1), 'change': change, 'run_id': int(current['run_id'].iloc[0])}
+
+def forecast_accuracy_kpi(level='product'):
+    """Average backtest accuracy (%) of the current sales history and its change, or None until a run of it is stored"""
+    try:
+        return _accuracy_kpi(level)
+    except LookupError:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the Holt-Winters sales model over rolling origins")
+    add_tier_argument(parser, 'backtest')
+    parser.add_argument('--level', default='product', choices=FORECAST_LEVELS, help="Series grouping")
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS, help="Rolling origins to evaluate")
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON, help="Periods forecast from each origin")
+    parser.add_argument('--workers', type=int, default=None, help="Processes running folds")
+    parser.add_argument('--db', default=None, help="Database to store the run in (default: not stored)")
+    args = parser.parse_args(argv)
+
+    source = tier_data_source(args.tier)
+
+    start = time.perf_counter()
+    results, history_end, history_digest = backtest_sales_cubes(
+        source.load_sales_cubes(), level=args.level, folds=args.folds, horizon=args.horizon,
+        max_workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    if args.db is not None:
+        run_id = BacktestStore(args.db).save_run(
+            results, args.level, history_end, history_digest, args.folds, args.horizon)
+        print(f"Stored as run {run_id} in {args.db}")
+    print(f"{len(results):,} series x {args.folds} folds backtested in {elapsed:.2f}s, "
+          f"mean accuracy {results['accuracy'].mean():.1f}%, median MAPE {results['mape'].median():.1f}%")
+
+if __name__ == '__main__':
+    main()
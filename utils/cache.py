@@ -0,0 +1,299 @@
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Memory budget of the shared figure cache, in megabytes
+FIGURE_CACHE_ENV = 'STOCKQUEST_FIGURE_CACHE_MB'
+DEFAULT_FIGURE_CACHE_MB = 64
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _freeze(value):
+    """Hashable stand-in for an argument value, keying frames and arrays by a digest of their content"""
+    if isinstance(value, (np.random.Generator, np.random.BitGenerator, np.random.SeedSequence)):
+        raise TypeError('random state is not a cacheable argument')
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        labels = tuple(value.columns) if isinstance(value, pd.DataFrame) else (value.name,)
+        hashes = pd.util.hash_pandas_object(value, index=not isinstance(value, pd.Index))
+        return (type(value).__name__, value.shape, labels, _digest(hashes.to_numpy().tobytes()))
+    if isinstance(value, np.ndarray):
+        return ('ndarray', value.dtype.str, value.shape, _digest(np.ascontiguousarray(value).tobytes()))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((key, _freeze(item)) for key, item in value.items())))
+    if isinstance(value, set):
+        return ('set', tuple(sorted(_freeze(item) for item in value)))
+    hash(value)
+    return value
+
+def _data_version(dataset=None):
+    # Imported here: the data layer builds on this module
+    from data.sources import get_data_source
+    source = get_data_source()
+    return source.version if dataset is None else (dataset, source.dataset_version(dataset))
+
+def _call_key(signature, args, kwargs, versioned):
+    """Cache key of a call: its bound arguments, plus the data version (or one named dataset's) when ``versioned``"""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    key = tuple((name, _freeze(value)) for name, value in bound.arguments.items())
+    if not versioned:
+        return key
+    return (key, _data_version(None if versioned is True else versioned))
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one computation"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.shared = 0
+
+    def do(self, key, compute):
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = concurrent.futures.Future()
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(compute())
+        except BaseException as error:
+            future.set_exception(error)
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+        return future.result()
+
+def cached(ttl=None, maxsize=128, versioned=True):
+    """Memoize a function on its arguments and the data source version, with optional TTL and LRU eviction"""
+    # Cached results are shared between callers and must be treated as read-only
+    def decorator(func):
+        signature = inspect.signature(func)
+        entries = collections.OrderedDict()
+        lock = threading.Lock()
+        flights = SingleFlight()
+        stats = {'hits': 0, 'misses': 0}
+
+        def cache_key(*args, **kwargs):
+            return _call_key(signature, args, kwargs, versioned)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                key = cache_key(*args, **kwargs)
+            except TypeError:
+                # Unhashable arguments and random generators cannot be keyed: run uncached
+                return func(*args, **kwargs)
+            now = time.monotonic()
+
+            def lookup():
+                entry = entries.get(key)
+                if entry is not None and (ttl is None or now - entry[1] < ttl):
+                    entries.move_to_end(key)
+                    return entry
+                return None
+
+            with lock:
+                entry = lookup()
+                if entry is not None:
+                    stats['hits'] += 1
+                    return entry[0]
+                stats['misses'] += 1
+
+            def compute():
+                # A flight may have stored the result between the lookup above and this one starting
+                with lock:
+                    entry = lookup()
+                if entry is not None:
+                    return entry[0]
+
+                result = func(*args, **kwargs)
+                with lock:
+                    entries[key] = (result, now)
+                    entries.move_to_end(key)
+                    while len(entries) > maxsize:
+                        entries.popitem(last=False)
+                return result
+
+            return flights.do(key, compute)
+
+        def cache_info():
+            with lock:
+                return {**stats, 'shared': flights.shared, 'size': len(entries),
+                        'maxsize': maxsize, 'ttl': ttl}
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+                stats['hits'] = stats['misses'] = 0
+
+        wrapper.cache_key = cache_key
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+
+        return wrapper
+
+    return decorator
+
+def process_singleton(factory):
+    """Turn ``factory`` into a thread-safe getter of one lazily created, process-wide instance"""
+    instances = []
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def getter():
+        with lock:
+            if not instances:
+                instances.append(factory())
+            return instances[0]
+
+    def replace(instance=None):
+        # None makes the next call create a new instance
+        with lock:
+            instances[:] = [] if instance is None else [instance]
+
+    getter.replace = replace
+
+    return getter
+
+def figure_from_json(spec):
+    """Rebuild a figure from ``fig.to_json()`` output without re-validating it"""
+    return go.Figure(json.loads(spec), _validate=False)
+
+class FigureCache:
+    """Process-wide store of serialized Plotly figures under a memory budget"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """The cached figure for ``key``, or None"""
+        spec = self.get_json(key)
+        return None if spec is None else figure_from_json(spec)
+
+    def get_json(self, key, count=True):
+        """The cached JSON of the figure for ``key``, or None (without counting a hit or miss unless ``count``)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and now >= entry[2]:
+                self._discard(key)
+                entry = None
+            if entry is None:
+                self.misses += count
+                return None
+            self._entries.move_to_end(key)
+            self.hits += count
+            return entry[0]
+
+    def put(self, key, fig, ttl=None):
+        """Store a figure, expiring it after ``ttl`` seconds when given. Returns its JSON."""
+        spec = fig.to_json()
+        size = sys.getsizeof(spec)
+        expires = None if ttl is None else time.monotonic() + ttl
+
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            if size > self.max_bytes:
+                return spec
+            self._entries[key] = (spec, size, expires)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+        return spec
+
+    def _discard(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self):
+        """Hit, miss and eviction counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+@process_singleton
+def get_figure_cache():
+    """The process-wide figure cache, sized by ``STOCKQUEST_FIGURE_CACHE_MB``"""
+    megabytes = float(os.environ.get(FIGURE_CACHE_ENV, DEFAULT_FIGURE_CACHE_MB))
+    return FigureCache(int(megabytes * 1024 * 1024))
+
+def cached_figure(ttl=None, versioned=True):
+    """Serve a chart builder's figures from the shared figure cache"""
+    def decorator(func):
+        signature = inspect.signature(func)
+        name = f'{func.__module__}.{func.__qualname__}'
+        flights = SingleFlight()
+
+        def cache_key(*args, **kwargs):
+            return (name, _call_key(signature, args, kwargs, versioned))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                key = cache_key(*args, **kwargs)
+            except TypeError:
+                return func(*args, **kwargs)
+
+            figure_cache = get_figure_cache()
+            fig = figure_cache.get(key)
+            if fig is not None:
+                return fig
+
+            def compute():
+                # A flight may have stored the figure between the lookup above and this one starting
+                spec = figure_cache.get_json(key, count=False)
+                return figure_cache.put(key, func(*args, **kwargs), ttl=ttl) if spec is None else spec
+
+            # Waiting sessions each get their own figure from the shared JSON
+            spec = flights.do(key, compute)
+            return figure_from_json(spec)
+
+        wrapper.cache_key = cache_key
+
+        return wrapper
+
+    return decorator
@@ -1,9 +1,13 @@
 import plotly.graph_objects as go
-import plotly.express as px
 import datetime
 import random
 import numpy as np
+import pandas as pd
 
+from utils.cache import cached_figure
+from utils.scenarios import DEFAULT_SEASONALITY_STRENGTH, PROMOTION_PROBABILITY, seasonality_scale
+
+@cached_figure(versioned=False)
 def create_waste_reduction_chart():
     """Create a waste reduction simulation chart"""
     # Create monthly data points for a year
@@ -145,31 +149,35 @@ def create_score_breakdown(country, request_type):
     
     return fig
 
-def create_forecast_scenario(product, trend=None):
-    """Create a forecast scenario chart with multiple scenarios"""
+def forecast_scenarios(product, trend=None, history=None, promotion_impact=0,
+                       seasonality_strength=DEFAULT_SEASONALITY_STRENGTH):
+    """Monthly baseline, optimistic and pessimistic forecasts for the next 12 months"""
     # Create date range for future 12 months
     start_date = datetime.datetime.now().date()
     future_date = start_date + datetime.timedelta(days=365)
     date_range = pd.date_range(start=start_date, end=future_date, freq='MS')  # Monthly
+    months = date_range.month.to_numpy()
+    steps = np.arange(len(date_range))
     
     # Set baseline based on product
     if 'Water' in product:
         baseline = 15000
-        seasonality = 'summer'
+        # Peak in summer (June-August)
+        seasonal_shape = 0.3 * np.sin(np.pi * (months - 3) / 6)
     elif 'Yogurt' in product or 'Greek' in product:
         baseline = 12000
-        seasonality = 'winter'
+        # Peak in winter (December-February)
+        seasonal_shape = 0.3 * np.sin(np.pi * (months - 9) / 6)
     else:
         baseline = 10000
-        seasonality = 'balanced'
+        # Milder seasonality
+        seasonal_shape = 0.15 * np.sin(np.pi * months / 6)
     
-    # Create three scenarios
-    baseline_data = []
-    optimistic_data = []
-    pessimistic_data = []
+    # The product's own monthly sales, when given, set the level instead of the family default
+    if history is not None and len(history):
+        baseline = float(np.mean(history[-12:]))
     
     # Apply trends if specified
-    trend_factor = 1.0
     if trend == 'increasing':
         trend_growth = 0.03  # 3% monthly growth
     elif trend == 'decreasing':
@@ -177,32 +185,29 @@ def create_forecast_scenario(product, trend=None):
     else:
         trend_growth = 0.005  # 0.5% growth (slight growth)
     
-    for i, date in enumerate(date_range):
-        month = date.month
-        
-        # Apply seasonality
-        if seasonality == 'summer':
-            # Peak in summer (June-August)
-            seasonal_factor = 1 + 0.3 * np.sin(np.pi * (month - 3) / 6)
-        elif seasonality == 'winter':
-            # Peak in winter (December-February)
-            seasonal_factor = 1 + 0.3 * np.sin(np.pi * (month - 9) / 6)
-        else:
-            # Milder seasonality
-            seasonal_factor = 1 + 0.15 * np.sin(np.pi * month / 6)
-        
-        # Apply trend
-        trend_factor *= (1 + trend_growth)
-        
-        # Calculate values for each scenario
-        baseline_value = int(baseline * seasonal_factor * trend_factor)
-        optimistic_value = int(baseline_value * (1 + 0.1 + 0.01 * i))  # Increasingly optimistic
-        pessimistic_value = int(baseline_value * (1 - 0.08 - 0.005 * i))  # Increasingly pessimistic
-        
-        # Add to data lists
-        baseline_data.append(baseline_value)
-        optimistic_data.append(optimistic_value)
-        pessimistic_data.append(pessimistic_value)
+    seasonal_factor = 1 + seasonality_scale(seasonality_strength) * seasonal_shape
+    trend_factor = (1 + trend_growth) ** (steps + 1)
+    promotion_factor = 1 + PROMOTION_PROBABILITY * promotion_impact / 100
+    
+    # Calculate values for each scenario
+    baseline_data = (baseline * seasonal_factor * trend_factor * promotion_factor).astype(int)
+    optimistic_data = (baseline_data * (1 + 0.1 + 0.01 * steps)).astype(int)  # Increasingly optimistic
+    pessimistic_data = (baseline_data * (1 - 0.08 - 0.005 * steps)).astype(int)  # Increasingly pessimistic
+    
+    return pd.DataFrame({
+        'baseline': baseline_data,
+        'optimistic': optimistic_data,
+        'pessimistic': pessimistic_data
+    }, index=date_range)
+
+# Forecasts start from today, so entries expire after an hour
+@cached_figure(ttl=3600, versioned=False)
+def create_forecast_scenario(product, trend=None, history=None, promotion_impact=0,
+                             seasonality_strength=DEFAULT_SEASONALITY_STRENGTH):
+    """Create a forecast scenario chart with multiple scenarios"""
+    forecast_df = forecast_scenarios(product, trend, history=history, promotion_impact=promotion_impact,
+                                     seasonality_strength=seasonality_strength)
+    date_range = forecast_df.index
     
     # Create plot
     fig = go.Figure()
@@ -210,7 +215,7 @@ def create_forecast_scenario(product, trend=None):
     # Add trace for each scenario
     fig.add_trace(go.Scatter(
         x=date_range, 
-        y=baseline_data,
+        y=forecast_df['baseline'],
         mode='lines+markers',
         name='Baseline Forecast',
         line=dict(color='#0056a3', width=3),
@@ -219,7 +224,7 @@ def create_forecast_scenario(product, trend=None):
     
     fig.add_trace(go.Scatter(
         x=date_range, 
-        y=optimistic_data,
+        y=forecast_df['optimistic'],
         mode='lines+markers',
         name='Optimistic Scenario',
         line=dict(color='#00AA00', width=2, dash='dot'),
@@ -228,7 +233,7 @@ def create_forecast_scenario(product, trend=None):
     
     fig.add_trace(go.Scatter(
         x=date_range, 
-        y=pessimistic_data,
+        y=forecast_df['pessimistic'],
         mode='lines+markers',
         name='Pessimistic Scenario',
         line=dict(color='#AA0000', width=2, dash='dot'),
@@ -270,8 +275,133 @@ def create_forecast_scenario(product, trend=None):
     
     return fig
 
-def create_heatmap_data():
-    """Create a heatmap of country x product demand"""
+@cached_figure(versioned=False)
+def create_forecast_fan_chart(product, bands):
+    """Create a fan chart of simulated demand percentiles"""
+    # One product's slice of utils.scenarios.forecast_bands: months with 'p5' ... 'p95' columns
+    dates = bands.index
+    
+    # Create plot
+    fig = go.Figure()
+    
+    # Each band is an invisible upper edge filled down to its lower edge
+    for upper, lower, name, fillcolor in [
+        ('p95', 'p5', 'P5-P95 Range', 'rgba(0, 86, 163, 0.15)'),
+        ('p75', 'p25', 'P25-P75 Range', 'rgba(0, 86, 163, 0.35)')
+    ]:
+        fig.add_trace(go.Scatter(
+            x=dates,
+            y=bands[upper],
+            mode='lines',
+            line=dict(width=0),
+            showlegend=False,
+            hoverinfo='skip'
+        ))
+        
+        fig.add_trace(go.Scatter(
+            x=dates,
+            y=bands[lower],
+            mode='lines',
+            line=dict(width=0),
+            fill='tonexty',
+            fillcolor=fillcolor,
+            name=name
+        ))
+    
+    fig.add_trace(go.Scatter(
+        x=dates,
+        y=bands['p50'],
+        mode='lines+markers',
+        name='Median Forecast',
+        line=dict(color='#0056a3', width=3),
+        marker=dict(size=8)
+    ))
+    
+    # Customize layout
+    fig.update_layout(
+        title=f"{product} - 12 Month Forecast",
+        title_font=dict(family="VT323, monospace", size=24),
+        xaxis_title="Month",
+        yaxis_title="Projected Sales Units",
+        legend=dict(
+            font=dict(family="Space Mono, monospace", size=10),
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        height=400,
+        margin=dict(l=20, r=20, t=70, b=40),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(
+            family="Space Mono, monospace",
+            size=12,
+            color="#000000"
+        ),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(0,0,0,0.1)'
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(0,0,0,0.1)'
+        )
+    )
+    
+    return fig
+
+@cached_figure(versioned=False)
+def create_sensitivity_surface(product, surface, current=None, value_label="Peak Monthly Demand"):
+    """Create a 3D surface of demand over the promotion x seasonality slider grid"""
+    # One product's slice of utils.scenarios.sensitivity_grid: promotion impacts x seasonality strengths
+    fig = go.Figure()
+    
+    fig.add_trace(go.Surface(
+        x=surface.columns,
+        y=surface.index,
+        z=surface.values,
+        colorscale=[[0, '#FFFFFF'], [0.5, '#66A3D9'], [1, '#0056a3']],
+        colorbar=dict(title="Units", thickness=15),
+        hovertemplate='Promotion: %{y}%<br>Seasonality: %{x}<br>Demand: %{z:,.0f}<extra></extra>'
+    ))
+    
+    # Marker at the selected (promotion impact, seasonality strength)
+    if current is not None:
+        promotion, seasonality = current
+        fig.add_trace(go.Scatter3d(
+            x=[seasonality],
+            y=[promotion],
+            z=[surface.loc[promotion, seasonality]],
+            mode='markers',
+            marker=dict(size=6, color='#AA0000', symbol='diamond'),
+            name='Current Settings'
+        ))
+    
+    fig.update_layout(
+        title=f"{product} - Scenario Sensitivity",
+        title_font=dict(family="VT323, monospace", size=24),
+        scene=dict(
+            xaxis_title="Seasonality Strength",
+            yaxis_title="Promotion Impact (%)",
+            zaxis_title=value_label
+        ),
+        showlegend=False,
+        height=450,
+        margin=dict(l=0, r=0, t=60, b=0),
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(
+            family="Space Mono, monospace",
+            size=11,
+            color="#000000"
+        )
+    )
+    
+    return fig
+
+def _sample_demand_values():
+    """Random country x product demand values with regional preferences"""
     # Create a sample heatmap of country x product demand
     countries = [
         'France', 'Germany', 'UK', 'Spain', 'Italy', 
@@ -302,6 +432,18 @@ def create_heatmap_data():
             country_values.append(base_value)
         demand_values.append(country_values)
     
+    return countries, products, demand_values
+
+@cached_figure()
+def create_heatmap_data(demand_index=None):
+    """Create a heatmap of country x product demand (0-100 values, e.g. ``SalesCubes.demand_index()``)"""
+    if demand_index is not None:
+        countries = demand_index.index.tolist()
+        products = demand_index.columns.tolist()
+        demand_values = demand_index.to_numpy().tolist()
+    else:
+        countries, products, demand_values = _sample_demand_values()
+    
     # Create heatmap using plotly
     fig = go.Figure(data=go.Heatmap(
         z=demand_values,
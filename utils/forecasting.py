@@ -0,0 +1,417 @@
+import argparse
+import concurrent.futures
+import hashlib
+import itertools
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from data.sources import get_data_source
+from data.scale_tiers import add_tier_argument, tier_data_source
+from utils.cache import cached
+
+# Smoothing parameters searched for each series
+DEFAULT_ALPHAS = [0.1, 0.3, 0.5, 0.7, 0.9]
+DEFAULT_BETAS = [0.01, 0.05, 0.1, 0.2]
+DEFAULT_GAMMAS = [0.05, 0.1, 0.3]
+
+# Series groupings fit_sales_cubes() can forecast
+FORECAST_LEVELS = ['total', 'country', 'product', 'country_product']
+
+# Number of worker processes fitting series in parallel (1 fits in-process)
+FORECAST_WORKERS_ENV = 'STOCKQUEST_FORECAST_WORKERS'
+
+# Fewer series than this per worker are not worth a process pool
+MIN_SERIES_PER_WORKER = 256
+
+_forecast_workers = None
+
+def set_forecast_workers(workers):
+    """Set the default number of fitting processes (None falls back to the environment)"""
+    global _forecast_workers
+    _forecast_workers = None if workers is None else max(int(workers), 1)
+
+def forecast_workers():
+    """Default number of fitting processes: ``set_forecast_workers``, then ``STOCKQUEST_FORECAST_WORKERS``, then 1"""
+    if _forecast_workers is not None:
+        return _forecast_workers
+    return max(int(os.environ.get(FORECAST_WORKERS_ENV, 1)), 1)
+
+class HoltWintersFit:
+    """Fitted additive Holt-Winters state of many series"""
+
+    def __init__(self, level, trend, season, params, rmse, index=None, last_period=None, n_steps=0):
+        self.level = level
+        self.trend = trend
+        # Rotated so that column 0 belongs to the first period after the fitted history
+        self.season = season
+        self.params = params
+        self.rmse = rmse
+        self.index = pd.RangeIndex(len(level)) if index is None else index
+        self.last_period = last_period
+        self.n_steps = n_steps
+
+    @property
+    def season_length(self):
+        return self.season.shape[1]
+
+    def periods(self, horizon):
+        """Labels of the next ``horizon`` periods (None without a fitted last period)"""
+        if self.last_period is None:
+            return None
+        return pd.period_range(self.last_period + 1, periods=horizon, freq=self.last_period.freq)
+
+    def select(self, labels):
+        """The fit of only the series in ``labels``"""
+        positions = self.index.get_indexer(labels)
+        if (positions < 0).any():
+            raise KeyError(f"Unknown series: {[l for l, p in zip(labels, positions) if p < 0]}")
+
+        return HoltWintersFit(
+            level=self.level[positions],
+            trend=self.trend[positions],
+            season=self.season[positions],
+            params=self.params.iloc[positions],
+            rmse=self.rmse[positions],
+            index=self.index[positions],
+            last_period=self.last_period,
+            n_steps=self.n_steps
+        )
+
+    def advance(self, values):
+        """The fit after observing the next periods of every series, without refitting"""
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+        if values.shape[0] != len(self.level):
+            raise ValueError(f"Expected values for {len(self.level)} series, got {values.shape[0]}")
+
+        alpha, beta, gamma = (self.params[name].to_numpy() for name in ('alpha', 'beta', 'gamma'))
+        level, trend = self.level.copy(), self.trend.copy()
+        season = self.season.copy()
+        sse = self.rmse ** 2 * self.n_steps
+        n_periods = values.shape[1]
+
+        # One recursion step per period under the chosen parameters, so the cost does not grow with
+        # the history; the errors are folded into rmse, the parameters are not re-searched
+        for t in range(n_periods):
+            y = values[:, t]
+            # Column 0 holds the slot of the first new period
+            slot = t % self.season_length
+            previous_season = season[:, slot]
+
+            error = y - (level + trend + previous_season)
+            sse = sse + error ** 2
+
+            new_level = alpha * (y - previous_season) + (1 - alpha) * (level + trend)
+            trend = beta * (new_level - level) + (1 - beta) * trend
+            season[:, slot] = gamma * (y - new_level) + (1 - gamma) * previous_season
+            level = new_level
+
+        n_steps = self.n_steps + n_periods
+
+        return HoltWintersFit(
+            level=level,
+            trend=trend,
+            season=np.roll(season, -n_periods, axis=1),
+            params=self.params,
+            rmse=np.sqrt(sse / n_steps) if n_steps else self.rmse,
+            index=self.index,
+            last_period=None if self.last_period is None else self.last_period + n_periods,
+            n_steps=n_steps
+        )
+
+    def forecast(self, horizon=12):
+        """Point forecasts of shape (series, horizon), floored at zero"""
+        steps = np.arange(1, horizon + 1)
+        seasonal = self.season[:, (steps - 1) % self.season_length]
+        values = self.level[:, None] + self.trend[:, None] * steps + seasonal
+        return np.maximum(values, 0)
+
+    def forecast_frame(self, horizon=12):
+        """Forecasts as a series x period DataFrame"""
+        periods = self.periods(horizon)
+        columns = periods.to_timestamp() if periods is not None else pd.RangeIndex(1, horizon + 1)
+        return pd.DataFrame(self.forecast(horizon), index=self.index, columns=columns)
+
+def _initial_state(values, season_length):
+    """Level and trend at the end of the first season, and its detrended seasonal pattern"""
+    first = values[:, :season_length]
+    first_mean = first.mean(axis=1)
+
+    if values.shape[1] >= 2 * season_length:
+        second_mean = values[:, season_length:2 * season_length].mean(axis=1)
+        trend = (second_mean - first_mean) / season_length
+    else:
+        trend = np.zeros(len(values))
+
+    # The first season's mean sits at its midpoint
+    offsets = np.arange(season_length) - (season_length - 1) / 2
+    season = first - (first_mean[:, None] + trend[:, None] * offsets)
+    level = first_mean + trend * offsets[-1]
+
+    return level, trend, season
+
+def _pool_size(workers, n_series):
+    """Processes actually used for ``n_series`` series (1 means fit in-process)"""
+    workers = forecast_workers() if workers is None else workers
+    return max(min(workers, n_series // MIN_SERIES_PER_WORKER), 1)
+
+def fit_holt_winters(values, season_length=12, alphas=None, betas=None, gammas=None,
+                     index=None, last_period=None, workers=None):
+    """Fit additive Holt-Winters models to every row of ``values`` at once"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[None]
+    n_series, n_periods = values.shape
+    if n_periods <= season_length:
+        raise ValueError(f"Need more than {season_length} periods of history, got {n_periods}")
+
+    # Enough series and more than one worker shard the rows across a process pool
+    workers = _pool_size(workers, n_series)
+    if workers > 1:
+        return _fit_parallel(values, workers, season_length, alphas, betas, gammas, index, last_period)
+
+    grid = np.array(list(itertools.product(
+        DEFAULT_ALPHAS if alphas is None else alphas,
+        DEFAULT_BETAS if betas is None else betas,
+        DEFAULT_GAMMAS if gammas is None else gammas
+    )))
+    alpha, beta, gamma = (grid[:, i, None] for i in range(3))
+
+    # State per (candidate, series), so every candidate is smoothed at once; the season buffer is
+    # indexed by t % season_length on its first axis so each step touches one slab
+    level0, trend0, season0 = _initial_state(values, season_length)
+    level = np.broadcast_to(level0, (len(grid), n_series)).copy()
+    trend = np.broadcast_to(trend0, (len(grid), n_series)).copy()
+    season = np.broadcast_to(season0.T[:, None], (season_length, len(grid), n_series)).copy()
+    sse = np.zeros((len(grid), n_series))
+    observations = np.ascontiguousarray(values.T)
+
+    for t in range(season_length, n_periods):
+        y = observations[t]
+        previous_season = season[t % season_length]
+
+        error = y - (level + trend + previous_season)
+        sse += error ** 2
+
+        new_level = alpha * (y - previous_season) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        previous_season *= 1 - gamma
+        previous_season += gamma * (y - new_level)
+        level = new_level
+
+    # Each series keeps the candidate with the lowest one-step-ahead squared error
+    best = sse.argmin(axis=0)
+    series = np.arange(n_series)
+
+    # Rotate each season so column 0 is the slot of the first forecast period
+    order = (n_periods + np.arange(season_length)) % season_length
+
+    return HoltWintersFit(
+        level=level[best, series],
+        trend=trend[best, series],
+        season=season[:, best, series].T[:, order],
+        params=pd.DataFrame(grid[best], index=index, columns=['alpha', 'beta', 'gamma']),
+        rmse=np.sqrt(sse[best, series] / (n_periods - season_length)),
+        index=index,
+        last_period=last_period,
+        n_steps=n_periods - season_length
+    )
+
+def _fit_shard(shm_name, shape, start, stop, season_length, alphas, betas, gammas):
+    """Fit rows ``start:stop`` of the shared history array (runs in a worker process)"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)[start:stop]
+        fit = fit_holt_winters(values, season_length, alphas, betas, gammas, workers=1)
+        del values
+    finally:
+        shm.close()
+
+    return fit.level, fit.trend, fit.season, fit.params.to_numpy(), fit.rmse
+
+def _fit_parallel(values, workers, season_length, alphas, betas, gammas, index, last_period):
+    """Fit contiguous shards of series in a process pool, sharing the history through shared memory"""
+    shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    try:
+        shared = np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = values
+        del shared
+
+        # Workers attach to the block by name: only shard bounds go out and only fitted state comes back
+        bounds = np.linspace(0, len(values), workers + 1).astype(int)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(
+                _fit_shard,
+                *zip(*[(shm.name, values.shape, start, stop, season_length, alphas, betas, gammas)
+                       for start, stop in zip(bounds[:-1], bounds[1:])])
+            ))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    level, trend, season, params, rmse = (np.concatenate(parts) for parts in zip(*shards))
+
+    return HoltWintersFit(
+        level=level,
+        trend=trend,
+        season=season,
+        params=pd.DataFrame(params, index=index, columns=['alpha', 'beta', 'gamma']),
+        rmse=rmse,
+        index=index,
+        last_period=last_period,
+        n_steps=values.shape[1] - season_length
+    )
+
+def _level_values(cubes, level, grain):
+    """Series values and index of one aggregation level of the sales cubes"""
+    cube = cubes.cube(grain)
+
+    if level == 'total':
+        return cube.sum(axis=(0, 1))[None], pd.Index(['Total'], name='total')
+    if level == 'country':
+        return cube.sum(axis=1), pd.Index(cubes.countries, name='country')
+    if level == 'product':
+        return cube.sum(axis=0), pd.Index(cubes.products, name='product')
+    if level == 'country_product':
+        index = pd.MultiIndex.from_product([cubes.countries, cubes.products], names=['country', 'product'])
+        return cube.reshape(-1, cube.shape[2]), index
+
+    raise ValueError(f"Unknown forecast level '{level}', expected one of {FORECAST_LEVELS}")
+
+def fit_sales_cubes(cubes, level='product', grain='monthly', season_length=12, workers=None):
+    """Fit Holt-Winters models to the complete periods of the sales cubes at one level"""
+    values, index = _level_values(cubes, level, grain)
+    complete = np.asarray(cubes.complete_periods(grain))
+    periods = cubes.periods[grain][complete]
+
+    return fit_holt_winters(
+        values[:, complete],
+        season_length=season_length,
+        index=index,
+        last_period=periods[-1],
+        workers=workers
+    )
+
+def _history_digest(values):
+    return hashlib.blake2b(np.ascontiguousarray(values, dtype=np.int64).tobytes(), digest_size=16).hexdigest()
+
+class OnlineForecaster:
+    """Holt-Winters state of one series level, kept current as sales arrive"""
+
+    def __init__(self, level='product', grain='monthly', store=None):
+        self.level = level
+        self.grain = grain
+        self.store = store
+        self.fit = None
+        self.digest = None
+        self.refits = 0
+        self.updates = 0
+        self._lock = threading.Lock()
+
+        # A new process starts from the latest snapshot, read only when a series is looked up or updated
+        if store is not None:
+            try:
+                artifact = store.open(self.name)
+            except (OSError, KeyError, ValueError):
+                # An unreadable snapshot is replaced by a refit on the next sync
+                artifact = None
+            if artifact is not None:
+                self.fit, self.digest = artifact, artifact.digest
+
+    @property
+    def name(self):
+        """Model name in the artifact store"""
+        return f'holt_winters_{self.level}_{self.grain}'
+
+    def _save(self):
+        if self.store is not None:
+            snapshot = f'{self.fit.last_period}-{self.digest[:12]}'
+            self.store.save(self.name, self.fit, snapshot, digest=self.digest)
+
+    def _absorbed(self, index, periods):
+        """Number of complete periods the current state covers, or None when it must be refitted"""
+        if self.fit is None or self.fit.last_period is None or not self.fit.index.equals(index):
+            return None
+        if self.fit.last_period.freqstr != periods.freqstr or self.fit.last_period not in periods:
+            return None
+        return periods.get_loc(self.fit.last_period) + 1
+
+    def sync(self, cubes):
+        """Absorb the complete periods of ``cubes`` not yet in the state. Returns the current fit."""
+        with self._lock:
+            values, index = _level_values(cubes, self.level, self.grain)
+            complete = np.asarray(cubes.complete_periods(self.grain))
+            values, periods = values[:, complete], cubes.periods[self.grain][complete]
+
+            # Refitted only without a state or when the history it absorbed changed (a backfill, a new source)
+            absorbed = self._absorbed(index, periods)
+            if absorbed is not None and _history_digest(values[:, :absorbed]) != self.digest:
+                absorbed = None
+
+            if absorbed is None:
+                self.fit = fit_sales_cubes(cubes, level=self.level, grain=self.grain)
+                self.refits += 1
+            elif absorbed < len(periods):
+                fit = self.fit if isinstance(self.fit, HoltWintersFit) else self.fit.load()
+                self.fit = fit.advance(values[:, absorbed:])
+                self.updates += len(periods) - absorbed
+            else:
+                # Possibly the still unloaded snapshot, which offers the same select
+                return self.fit
+
+            self.digest = _history_digest(values)
+            self._save()
+            return self.fit
+
+_online_forecasters = {}
+_online_forecasters_lock = threading.Lock()
+
+def get_online_forecaster(level='product'):
+    """The process-wide online forecaster of one series level, persisted in the artifact store"""
+    # Imported here: the artifact store builds on HoltWintersFit
+    from utils.artifacts import get_artifact_store
+
+    with _online_forecasters_lock:
+        if level not in _online_forecasters:
+            _online_forecasters[level] = OnlineForecaster(level=level, store=get_artifact_store())
+        return _online_forecasters[level]
+
+@cached(maxsize=8)
+def sales_forecast_model(level='product'):
+    """Holt-Winters fit of the current sales history (possibly a lazily loaded artifact), updated online"""
+    # ``select`` gives the fitted state of just the series needed
+    return get_online_forecaster(level).sync(get_data_source().load_sales_cubes())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the Holt-Winters sales model and report throughput")
+    add_tier_argument(parser, 'fit')
+    parser.add_argument('--level', default='country_product', choices=FORECAST_LEVELS, help="Series grouping")
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f"Fitting processes (default: ${FORECAST_WORKERS_ENV} or 1)")
+    args = parser.parse_args(argv)
+
+    source = tier_data_source(args.tier)
+    cubes = source.load_sales_cubes()
+
+    start = time.perf_counter()
+    fit = fit_sales_cubes(cubes, level=args.level, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    workers = _pool_size(args.workers, len(fit.level))
+    print(f"{len(fit.level):,} series fitted with {workers} worker(s) in {elapsed:.2f}s "
+          f"({len(fit.level) / elapsed:,.0f} series/s), median RMSE {np.median(fit.rmse):,.1f}")
+
+    # What a newly completed period costs the online forecaster instead of a refit
+    start = time.perf_counter()
+    fit.advance(fit.forecast(1))
+    elapsed = time.perf_counter() - start
+    print(f"Online update of one new period: {elapsed * 1000:.2f}ms")
+
+if __name__ == '__main__':
+    main()
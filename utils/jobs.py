@@ -0,0 +1,202 @@
+import collections
+import concurrent.futures
+import hashlib
+import inspect
+import os
+import threading
+import time
+
+from utils.backtest import run_backtest
+from utils.cache import _call_key, process_singleton
+from utils.charts import create_forecast_fan_chart, create_forecast_scenario, forecast_scenarios
+from utils.metrics import calculate_forecast_summary
+from utils.forecasting import sales_forecast_model
+from utils.replenishment import product_safety_stock
+from utils.scenarios import forecast_bands, sensitivity_grid
+
+# Number of worker threads running jobs
+JOB_WORKERS_ENV = 'STOCKQUEST_JOB_WORKERS'
+
+# Dataset the simulator jobs are computed from; their keys follow only its version,
+# so reloading inventory or requests does not orphan finished forecasts
+SIMULATOR_DATASET = 'sales'
+
+# Seconds between refreshes of a page section waiting on running jobs
+JOB_POLL_SECONDS = 0.5
+
+# Job states; DONE and FAILED are final
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+class Job:
+    """A submitted computation with its status, progress and outcome"""
+
+    def __init__(self, key, name):
+        self.key = key
+        self.name = name
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = 'Queued'
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED)
+
+    def report(self, progress, message=None):
+        """Record progress (0-1) from inside the running job"""
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def wait(self, timeout=None):
+        """Block until the job has finished or ``timeout`` seconds passed. Returns whether it finished."""
+        return self._done.wait(timeout)
+
+    def _finish(self, status, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.status = status
+        self.finished = time.time()
+        if status == DONE:
+            self.report(1.0, 'Done')
+        self._done.set()
+
+class JobRunner:
+    """Runs jobs on a thread pool, keyed by a hash of their parameters"""
+
+    def __init__(self, max_workers=None, max_jobs=4096):
+        if max_workers is None:
+            max_workers = int(os.environ.get(JOB_WORKERS_ENV, min(4, os.cpu_count() or 1)))
+        self.max_jobs = max_jobs
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='stockquest-job')
+        self._jobs = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def job_key(self, func, params, versioned=True):
+        """Hash of a job's function and parameters (and the data version, or a named dataset's, when ``versioned``)"""
+        signature = inspect.signature(func)
+        key = _call_key(signature, (None,), params, versioned)
+        name = f'{func.__module__}.{func.__qualname__}'
+        return hashlib.blake2b(repr((name, key)).encode(), digest_size=16).hexdigest()
+
+    def submit(self, func, versioned=True, ttl=None, **params):
+        """Queue ``func(job, **params)`` unless an equivalent job exists. Returns the Job."""
+        key = self.job_key(func, params, versioned=versioned)
+
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != FAILED and not self._expired(job, ttl):
+                self._jobs.move_to_end(key)
+                return job
+
+            job = self._jobs[key] = Job(key, func.__name__)
+            self._evict()
+
+        self._executor.submit(self._run, job, func, params)
+        return job
+
+    def prime(self, func, result, versioned=True, **params):
+        """Store ``result`` as the finished job for ``func`` and ``params``. Returns the Job."""
+        key = self.job_key(func, params, versioned=versioned)
+        job = Job(key, func.__name__)
+        job._finish(DONE, result=result)
+
+        with self._lock:
+            self._jobs[key] = job
+            self._evict()
+
+        return job
+
+    def get(self, key):
+        """The job with ``key``, or None"""
+        with self._lock:
+            return self._jobs.get(key)
+
+    def jobs(self, status=None):
+        """Known jobs, optionally only those in one state"""
+        with self._lock:
+            return [job for job in self._jobs.values() if status is None or job.status == status]
+
+    @staticmethod
+    def _expired(job, ttl):
+        return ttl is not None and job.done and time.time() - job.finished >= ttl
+
+    def _evict(self):
+        finished = [key for key, job in self._jobs.items() if job.done]
+        for key in finished[:max(len(self._jobs) - self.max_jobs, 0)]:
+            del self._jobs[key]
+
+    def _run(self, job, func, params):
+        job.status = RUNNING
+        job.report(0.0, 'Running')
+        try:
+            result = func(job, **params)
+        except Exception as error:
+            job._finish(FAILED, error=error)
+        else:
+            job._finish(DONE, result=result)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+@process_singleton
+def get_job_runner():
+    """The process-wide job runner shared by all sessions"""
+    return JobRunner()
+
+def forecast_result(product, trend, promotion=20, seasonality=5, fit=None):
+    """Forecast chart JSON and summary metrics for one simulator parameter set"""
+    # Without a fitted model, the fixed three-scenario chart is shown
+    if fit is None:
+        forecast_df = forecast_scenarios(product, trend, promotion_impact=promotion,
+                                         seasonality_strength=seasonality)
+        return {
+            'figure': create_forecast_scenario(product, trend, promotion_impact=promotion,
+                                               seasonality_strength=seasonality).to_json(),
+            'summary': calculate_forecast_summary(forecast_df)
+        }
+
+    bands = forecast_bands(fit.select([product]), trend=trend, promotion_impact=promotion,
+                           seasonality_strength=seasonality).loc[product]
+
+    return {
+        'figure': create_forecast_fan_chart(product, bands).to_json(),
+        'summary': calculate_forecast_summary(bands, column='p50')
+    }
+
+def forecast_job(job, product, trend, promotion=20, seasonality=5):
+    """Simulate a product's 12-month demand around the fitted sales model; see ``forecast_result``"""
+    job.report(0.1, 'Fitting forecast model')
+    fit = sales_forecast_model('product')
+
+    job.report(0.4, 'Simulating demand scenarios')
+    return forecast_result(product, trend, promotion=promotion, seasonality=seasonality, fit=fit)
+
+def sensitivity_result(product, trend, fit):
+    """P95 peak monthly demand of a product over every promotion x seasonality slider setting"""
+    # The whole slider grid at once, so moving the sliders only moves the chart's marker
+    return sensitivity_grid(fit.select([product]), trend=trend, metric='peak', quantile=95).loc[product]
+
+def sensitivity_job(job, product, trend):
+    """Simulate a product's slider sensitivity surface; see ``sensitivity_result``"""
+    job.report(0.1, 'Fitting forecast model')
+    fit = sales_forecast_model('product')
+
+    job.report(0.4, 'Simulating slider grid')
+    return sensitivity_result(product, trend, fit)
+
+def safety_stock_job(job, product):
+    """Total safety stock of a product across the network, from the replenishment plan"""
+    job.report(0.1, 'Planning replenishment')
+    return product_safety_stock(product)
+
+def backtest_job(job, level='product'):
+    """Backtest the current sales history and store the run the forecast accuracy KPI reads. Returns its id."""
+    job.report(0.1, 'Backtesting forecast model')
+    # In-process: a job thread must not start a process pool inside the server
+    return run_backtest(level=level, max_workers=1)
@@ -2,26 +2,106 @@ import pandas as pd
 import numpy as np
 import random
 
+from data.cubes import SalesCubes
+
+# Columns of calculate_forecast_metrics(); percentages except bias and RMSE (units)
+FORECAST_METRICS = ['accuracy', 'mape', 'wape', 'smape', 'bias', 'rmse']
+
+def _metrics_from_sums(sums, points):
+    """Forecast metrics from per-row error sums over ``points`` forecast points each"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mape = np.where(sums['nonzero'] > 0, sums['ape'] / sums['nonzero'] * 100, np.nan)
+        wape = np.where(sums['abs_actual'] > 0, sums['abs_error'] / sums['abs_actual'] * 100, np.nan)
+        smape = sums['sape'] / points * 100
+        bias = sums['error'] / points
+        rmse = np.sqrt(sums['squared_error'] / points)
+    
+    return {
+        # Accuracy is the inverse of MAPE
+        'accuracy': np.maximum(100 - mape, 0),
+        'mape': mape,
+        'wape': wape,
+        'smape': smape,
+        'bias': bias,
+        'rmse': rmse
+    }
+
+def calculate_forecast_metrics(predicted_values, actual_values, groups=None, index=None):
+    """Calculate forecast accuracy metrics for many series (and optionally groups of them) at once"""
+    predicted = np.asarray(predicted_values, dtype=np.float64)
+    actual = np.asarray(actual_values, dtype=np.float64)
+    if predicted.shape != actual.shape:
+        raise ValueError("Predicted and actual values must have the same shape")
+    if predicted.ndim == 1:
+        predicted, actual = predicted[None], actual[None]
+    
+    error = predicted - actual
+    abs_error = np.abs(error)
+    abs_actual = np.abs(actual)
+    # Zero actuals are safe: MAPE averages over the nonzero actuals only (NaN when there are none)
+    # and WAPE divides total absolute error by total actuals
+    nonzero = abs_actual > 0
+    
+    # One scratch buffer for the per-point ratios keeps memory traffic down on large inputs
+    ratio = np.zeros_like(abs_error)
+    np.divide(abs_error, abs_actual, out=ratio, where=nonzero)
+    ape = ratio.sum(axis=1)
+    
+    # Symmetric denominator; a point with a zero forecast and actual has no error
+    scale = np.abs(predicted)
+    scale += abs_actual
+    ratio[:] = 0
+    np.divide(abs_error, scale, out=ratio, where=scale > 0)
+    
+    sums = {
+        'abs_error': abs_error.sum(axis=1),
+        'abs_actual': abs_actual.sum(axis=1),
+        'ape': ape,
+        'nonzero': nonzero.sum(axis=1),
+        'sape': 2 * ratio.sum(axis=1),
+        'error': error.sum(axis=1),
+        'squared_error': np.einsum('ij,ij->i', error, error)
+    }
+    horizon = predicted.shape[1]
+    
+    per_series = pd.DataFrame(_metrics_from_sums(sums, horizon), index=index, columns=FORECAST_METRICS)
+    if groups is None:
+        return per_series
+    
+    # Group metrics pool all points of their series, from the same per-series sums
+    codes, labels = pd.factorize(np.asarray(groups), sort=True)
+    if len(codes) != len(predicted):
+        raise ValueError("Expected one group label per series")
+    group_sums = {
+        name: np.bincount(codes, weights=values, minlength=len(labels))
+        for name, values in sums.items()
+    }
+    points = np.bincount(codes, minlength=len(labels)) * horizon
+    
+    per_group = pd.DataFrame(
+        _metrics_from_sums(group_sums, points),
+        index=pd.Index(labels, name='group'),
+        columns=FORECAST_METRICS
+    )
+    return per_series, per_group
+
 def calculate_forecast_accuracy(predicted_values, actual_values):
     """Calculate forecast accuracy metrics"""
     if len(predicted_values) != len(actual_values):
         raise ValueError("Predicted and actual values must have the same length")
     
-    # Mean Absolute Percentage Error (MAPE)
-    mape = np.mean(np.abs((np.array(actual_values) - np.array(predicted_values)) / np.array(actual_values))) * 100
-    
-    # Accuracy is the inverse of MAPE
-    accuracy = max(0, 100 - mape)
+    metrics = calculate_forecast_metrics(predicted_values, actual_values).iloc[0]
     
-    # Calculate other metrics
-    bias = np.mean(np.array(predicted_values) - np.array(actual_values))
-    rmse = np.sqrt(np.mean((np.array(predicted_values) - np.array(actual_values))**2))
+    return {name: round(float(metrics[name]), 1) for name in FORECAST_METRICS}
+
+def calculate_forecast_summary(forecast_df, column='baseline'):
+    """Total units, peak month and lowest month of a monthly forecast"""
+    values = forecast_df[column]
     
     return {
-        'accuracy': round(accuracy, 1),
-        'mape': round(mape, 1),
-        'bias': round(bias, 1),
-        'rmse': round(rmse, 1)
+        'total': int(values.sum()),
+        'peak_month': values.idxmax().strftime('%B'),
+        'lowest_month': values.idxmin().strftime('%B')
     }
 
 def calculate_on_shelf_availability(inventory_df):
@@ -38,6 +118,29 @@ def calculate_on_shelf_availability(inventory_df):
     
     return round(osa, 1)
 
+def calculate_warehouse_utilization(inventory_df):
+    """Sum stock and capacity per warehouse and compute utilization percentage"""
+    warehouse_summary = inventory_df.groupby('warehouse', observed=True, sort=False).agg({
+        'current_stock': 'sum',
+        'max_capacity': 'sum'
+    }).reset_index()
+    
+    warehouse_summary['utilization'] = (warehouse_summary['current_stock'] / 
+                                        warehouse_summary['max_capacity'] * 100).round(1)
+    
+    return warehouse_summary
+
+def calculate_expiry_risk(inventory_df, threshold=30, top_n=5):
+    """Count items above the expiry risk threshold and return the top_n riskiest"""
+    at_risk = inventory_df['expiry_risk'].to_numpy() > threshold
+    
+    top_risk = inventory_df[at_risk].nlargest(top_n, 'expiry_risk')
+    
+    return {
+        'count': int(at_risk.sum()),
+        'top_items': top_risk
+    }
+
 def calculate_waste_reduction(baseline_df, optimized_df):
     """Calculate waste reduction percentage between baseline and optimized"""
     # In a real implementation, this would use actual waste data
@@ -66,36 +169,64 @@ def calculate_waste_reduction(baseline_df, optimized_df):
     }
 
 def calculate_stock_turnover(sales_df, inventory_df):
-    """Calculate stock turnover ratio"""
-    # In a real implementation, this would use actual sales and inventory data
-    # For demo purposes, we'll simulate it
-    
-    # Calculate average inventory
-    avg_inventory = inventory_df['current_stock'].mean()
+    """Calculate stock turnover ratio from the sales frame or its cubes"""
+    # Inventory on hand across the network (a single snapshot stands in
+    # for the average over the year)
+    avg_inventory = inventory_df['current_stock'].sum()
     
-    # Calculate annual sales (simplified)
-    annual_sales = sales_df['sales'].sum()
+    # Sales over the last 365 days and, when the history covers it, the 365 days before
+    if isinstance(sales_df, SalesCubes):
+        annual_sales = sales_df.total_sales(last_days=365)
+        previous_sales = None
+        if len(sales_df.periods['daily']) >= 730:
+            previous_sales = sales_df.total_sales(last_days=730) - annual_sales
+    else:
+        dates = pd.DatetimeIndex(sales_df['date'])
+        sales = sales_df['sales'].to_numpy()
+        age = (dates.max() - dates).days
+        annual_sales = int(sales[age < 365].sum())
+        previous_sales = None
+        if age.max() >= 729:
+            previous_sales = int(sales[(age >= 365) & (age < 730)].sum())
     
     # Stock turnover = Annual sales / Average inventory
     turnover = annual_sales / avg_inventory
     
-    # Simulate change from previous period
-    previous_turnover = turnover * random.uniform(0.9, 1.1)
-    change_pct = 100 * (turnover - previous_turnover) / previous_turnover
+    # Change from the previous year at the same inventory (None without a previous year)
+    change_pct = None
+    if previous_sales:
+        change_pct = round(100 * (annual_sales - previous_sales) / previous_sales, 1)
     
     return {
         'turnover': round(turnover, 1),
-        'change_pct': round(change_pct, 1)
+        'change_pct': change_pct
     }
 
-def calculate_priority_score(request_data):
-    """Calculate priority score for country requests"""
-    # Extract criteria values
-    market_size = request_data.get('market_size', 5)
-    growth_potential = request_data.get('growth_potential', 5)
-    technical_feasibility = request_data.get('technical_feasibility', 5)
-    strategic_alignment = request_data.get('strategic_alignment', 5)
-    cost_estimate = request_data.get('cost_estimate', 5)
+# Criteria used to score country requests, with the value assumed when missing
+PRIORITY_CRITERIA = {
+    'market_size': 5,
+    'growth_potential': 5,
+    'technical_feasibility': 5,
+    'strategic_alignment': 5,
+    'cost_estimate': 5
+}
+
+def _criterion_values(criteria, name):
+    """Values of one scoring criterion from a DataFrame, structured array or mapping"""
+    if isinstance(criteria, pd.DataFrame):
+        present = name in criteria.columns
+    elif isinstance(criteria, np.ndarray):
+        present = criteria.dtype.names is not None and name in criteria.dtype.names
+    else:
+        present = name in criteria
+    
+    return np.asarray(criteria[name] if present else PRIORITY_CRITERIA[name])
+
+def calculate_priority_scores(criteria):
+    """Calculate priority scores and levels for many country requests at once"""
+    market_size, growth_potential, technical_feasibility, strategic_alignment, cost_estimate = (
+        np.broadcast_arrays(*[_criterion_values(criteria, name) for name in PRIORITY_CRITERIA])
+    )
     
     # Calculate weighted score
     priority_score = (market_size * 2 + 
@@ -105,17 +236,25 @@ def calculate_priority_score(request_data):
                       cost_estimate * 1.5)
     
     # Normalize to 0-100 scale
-    priority_score = max(0, min(100, int(priority_score / 0.19)))
+    priority_score = np.clip(np.trunc(priority_score / 0.19), 0, 100).astype(np.int64)
     
     # Determine priority level
-    if priority_score >= 70:
-        priority_level = 1  # High
-    elif priority_score >= 40:
-        priority_level = 2  # Medium
-    else:
-        priority_level = 3  # Low
+    priority_level = np.select(
+        [priority_score >= 70, priority_score >= 40],
+        [1, 2],  # High, Medium
+        default=3  # Low
+    )
+    
+    return pd.DataFrame(
+        {'score': np.atleast_1d(priority_score), 'level': np.atleast_1d(priority_level)},
+        index=criteria.index if isinstance(criteria, pd.DataFrame) else None
+    )
+
+def calculate_priority_score(request_data):
+    """Calculate priority score for country requests"""
+    result = calculate_priority_scores(request_data).iloc[0]
     
     return {
-        'score': priority_score,
-        'level': priority_level
+        'score': int(result['score']),
+        'level': int(result['level'])
     }
\ No newline at end of file
@@ -0,0 +1,212 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from data.sample_data import product_family
+from data.sources import get_data_source
+from data.scale_tiers import add_tier_argument, tier_data_source
+from utils.cache import cached
+from utils.forecasting import fit_holt_winters
+
+# Aggregation levels of the hierarchy; the bottom level is always country_product
+HIERARCHY_LEVELS = ['total', 'country', 'family', 'product', 'country_product']
+
+RECONCILIATION_METHODS = ['bottom_up', 'top_down', 'mint']
+
+class Hierarchy:
+    """Summing structure of the country x product series and their aggregates"""
+
+    def __init__(self, index, summing, countries, products):
+        # (level, series) of every node, aggregates first and the country x product series last
+        self.index = index
+        # Sparse (nodes, bottom series) 0/1 matrix: ``summing @ bottom`` gives every node's values
+        self.summing = summing
+        self.countries = countries
+        self.products = products
+
+    @property
+    def n_bottom(self):
+        return self.summing.shape[1]
+
+    @property
+    def n_aggregates(self):
+        return self.summing.shape[0] - self.n_bottom
+
+    @property
+    def levels(self):
+        return list(self.index.unique(level='level'))
+
+    def aggregate(self, bottom):
+        """Values of every node from (bottom series, ...) values"""
+        return self.summing @ np.asarray(bottom, dtype=np.float64)
+
+    def nodes(self, level):
+        """Row positions of one level's nodes"""
+        return np.flatnonzero(self.index.get_level_values('level') == level)
+
+def build_hierarchy(countries, products, levels=None):
+    """Hierarchy over every country x product series, with the aggregate ``levels`` above them"""
+    levels = HIERARCHY_LEVELS if levels is None else levels
+    unknown = set(levels) - set(HIERARCHY_LEVELS)
+    if unknown:
+        raise ValueError(f"Unknown hierarchy levels {sorted(unknown)}, expected some of {HIERARCHY_LEVELS}")
+
+    n_countries, n_products = len(countries), len(products)
+    n_bottom = n_countries * n_products
+    country_codes = np.repeat(np.arange(n_countries), n_products)
+    product_codes = np.tile(np.arange(n_products), n_countries)
+    family_codes, families = pd.factorize(product_family(products))
+
+    # Node code of every bottom series, and the node labels, per aggregate level
+    groupings = {
+        'total': (np.zeros(n_bottom, dtype=np.int64), ['Total']),
+        'country': (country_codes, list(countries)),
+        'family': (family_codes[product_codes], list(families)),
+        'product': (product_codes, list(products))
+    }
+
+    blocks, labels = [], []
+    for level in HIERARCHY_LEVELS[:-1]:
+        if level not in levels:
+            continue
+        codes, names = groupings[level]
+        blocks.append(sparse.csr_matrix(
+            (np.ones(n_bottom), (codes, np.arange(n_bottom))), shape=(len(names), n_bottom)))
+        labels.extend((level, name) for name in names)
+
+    blocks.append(sparse.identity(n_bottom, format='csr'))
+    labels.extend(('country_product', f'{country} / {product}')
+                  for country in countries for product in products)
+
+    return Hierarchy(
+        index=pd.MultiIndex.from_tuples(labels, names=['level', 'series']),
+        summing=sparse.vstack(blocks, format='csr'),
+        countries=list(countries),
+        products=list(products)
+    )
+
+def hierarchy_history(cubes, hierarchy=None, grain='monthly'):
+    """Complete-period sales of every hierarchy node, as a (nodes, periods) array, and the periods"""
+    hierarchy = build_hierarchy(cubes.countries, cubes.products) if hierarchy is None else hierarchy
+    complete = np.asarray(cubes.complete_periods(grain))
+    cube = cubes.cube(grain)[:, :, complete]
+
+    return hierarchy.aggregate(cube.reshape(-1, cube.shape[2])), cubes.periods[grain][complete]
+
+def historical_proportions(bottom_history):
+    """Each bottom series' share of the total over the history (top-down disaggregation weights)"""
+    totals = np.asarray(bottom_history, dtype=np.float64).sum(axis=1)
+    grand_total = totals.sum()
+    if grand_total <= 0:
+        return np.full(len(totals), 1 / len(totals))
+    return totals / grand_total
+
+def reconcile(hierarchy, forecasts, method='mint', variances=None, proportions=None):
+    """Make base forecasts of every node add up across the hierarchy"""
+    # One row per node in ``hierarchy.index`` order, as an array or a DataFrame (returned in the same form)
+    frame = forecasts if isinstance(forecasts, pd.DataFrame) else None
+    values = np.asarray(forecasts, dtype=np.float64)
+    squeeze = values.ndim == 1
+    if squeeze:
+        values = values[:, None]
+    if len(values) != len(hierarchy.index):
+        raise ValueError(f"Expected forecasts for {len(hierarchy.index)} nodes, got {len(values)}")
+
+    n_aggregates = hierarchy.n_aggregates
+
+    if method == 'bottom_up':
+        reconciled = hierarchy.aggregate(values[n_aggregates:])
+    elif method == 'top_down':
+        if proportions is None:
+            raise ValueError("Top-down reconciliation needs the bottom series' proportions")
+        total = values[hierarchy.nodes('total')]
+        if len(total) != 1:
+            raise ValueError("Top-down reconciliation needs a 'total' level in the hierarchy")
+        reconciled = hierarchy.aggregate(np.asarray(proportions)[:, None] * total)
+    elif method == 'mint':
+        # Minimum trace under a diagonal error covariance of ``variances``, in its constraint form:
+        # with C = [I, -S_aggregates], one sparse solve of the (aggregates x aggregates) system C W C'
+        # gives the correction, so the cost grows with the aggregates, not with all bottom series
+        weights = np.ones(len(values)) if variances is None else np.asarray(variances, dtype=np.float64)
+        # Nodes without error would make the system singular
+        weights = np.maximum(weights, 1e-8 * max(weights.max(), 1.0))
+
+        constraints = sparse.hstack([
+            sparse.identity(n_aggregates, format='csr'),
+            -hierarchy.summing[:n_aggregates]
+        ], format='csr')
+        covariance = sparse.diags(weights)
+        system = (constraints @ covariance @ constraints.T).tocsc()
+
+        correction = spsolve(system, constraints @ values)
+        if correction.ndim == 1:
+            correction = correction[:, None]
+        reconciled = values - covariance @ (constraints.T @ correction)
+    else:
+        raise ValueError(f"Unknown reconciliation method '{method}', expected one of {RECONCILIATION_METHODS}")
+
+    if squeeze:
+        reconciled = reconciled[:, 0]
+    if frame is not None:
+        return pd.DataFrame(reconciled, index=frame.index, columns=frame.columns)
+    return reconciled
+
+def fit_hierarchy(cubes, grain='monthly', levels=None, workers=None):
+    """Build the hierarchy of the sales cubes and fit a Holt-Winters model to every node at once"""
+    hierarchy = build_hierarchy(cubes.countries, cubes.products, levels=levels)
+    history, periods = hierarchy_history(cubes, hierarchy, grain=grain)
+
+    fit = fit_holt_winters(history, index=hierarchy.index, last_period=periods[-1], workers=workers)
+
+    return hierarchy, fit, history
+
+def reconciled_forecasts(cubes, method='mint', horizon=12, grain='monthly', levels=None, workers=None):
+    """Coherent forecasts of every hierarchy node: a (level, series) x period DataFrame"""
+    hierarchy, fit, history = fit_hierarchy(cubes, grain=grain, levels=levels, workers=workers)
+
+    return reconcile(
+        hierarchy,
+        fit.forecast_frame(horizon),
+        method=method,
+        variances=fit.rmse ** 2,
+        proportions=historical_proportions(history[hierarchy.n_aggregates:])
+    )
+
+@cached(maxsize=8)
+def reconciled_sales_forecast(method='mint', horizon=12):
+    """Coherent forecasts of the current sales history, recomputed when the data changes"""
+    return reconciled_forecasts(get_data_source().load_sales_cubes(), method=method, horizon=horizon)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile Holt-Winters forecasts across the sales hierarchy")
+    add_tier_argument(parser, 'reconcile')
+    parser.add_argument('--horizon', type=int, default=12, help="Periods to forecast")
+    parser.add_argument('--workers', type=int, default=None, help="Fitting processes")
+    args = parser.parse_args(argv)
+
+    source = tier_data_source(args.tier)
+    cubes = source.load_sales_cubes()
+
+    start = time.perf_counter()
+    hierarchy, fit, history = fit_hierarchy(cubes, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{len(hierarchy.index):,} nodes ({hierarchy.n_bottom:,} bottom series) fitted in {elapsed:.2f}s")
+
+    forecasts = fit.forecast(args.horizon)
+    proportions = historical_proportions(history[hierarchy.n_aggregates:])
+    incoherence = np.abs(forecasts - hierarchy.aggregate(forecasts[hierarchy.n_aggregates:])).max()
+    print(f"Base forecasts: largest incoherence {incoherence:,.0f} units")
+
+    for method in RECONCILIATION_METHODS:
+        start = time.perf_counter()
+        reconciled = reconcile(hierarchy, forecasts, method=method, variances=fit.rmse ** 2, proportions=proportions)
+        elapsed = time.perf_counter() - start
+        incoherence = np.abs(reconciled - hierarchy.aggregate(reconciled[hierarchy.n_aggregates:])).max()
+        print(f"{method:>9}: {elapsed * 1000:8.1f}ms, largest incoherence {incoherence:,.2g} units")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import argparse
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from data.sources import get_data_source
+from data.scale_tiers import add_tier_argument, tier_data_source
+from utils.cache import cached
+from utils.forecasting import sales_forecast_model
+from utils.reconciliation import reconciled_sales_forecast
+
+# Target probability of not running out of stock before a replenishment arrives
+DEFAULT_SERVICE_LEVEL = 0.95
+
+# Days between two orders of the same row; the order-up-to level covers the lead time plus this
+DEFAULT_REVIEW_DAYS = 7
+
+# Output columns of calculate_replenishment_levels()
+REPLENISHMENT_COLUMNS = [
+    'daily_demand', 'safety_stock', 'reorder_point', 'order_up_to', 'order_quantity', 'reorder'
+]
+
+def service_factor(service_level):
+    """Standard normal quantile (z) of one or many service levels"""
+    levels = np.asarray(service_level, dtype=np.float64)
+    if ((levels <= 0) | (levels >= 1)).any():
+        raise ValueError("Service levels must be between 0 and 1")
+
+    # Few distinct levels in practice: look each one up once and broadcast back
+    unique, inverse = np.unique(levels, return_inverse=True)
+    factors = np.array([NormalDist().inv_cdf(level) for level in unique])
+    return factors[inverse].reshape(levels.shape)
+
+def calculate_replenishment_levels(inventory_df, daily_demand, daily_sigma, service_level=DEFAULT_SERVICE_LEVEL,
+                                   review_days=DEFAULT_REVIEW_DAYS):
+    """Calculate safety stock, reorder point and order-up-to level for every inventory row at once"""
+    demand = np.asarray(daily_demand, dtype=np.float64)
+    sigma = np.asarray(daily_sigma, dtype=np.float64)
+    lead_time = inventory_df['restock_days'].to_numpy(dtype=np.float64)
+    current_stock = inventory_df['current_stock'].to_numpy(dtype=np.float64)
+    z = service_factor(service_level)
+
+    # Per row, with the restock days as lead time and units rounded up:
+    #   safety stock = z * sigma * sqrt(lead time)
+    #   reorder point = demand * lead time + safety stock
+    #   order-up-to level = demand * (lead time + review) + z * sigma * sqrt(lead time + review)
+    safety_stock = np.ceil(z * sigma * np.sqrt(lead_time))
+    reorder_point = np.ceil(demand * lead_time) + safety_stock
+
+    cover = lead_time + review_days
+    order_up_to = np.ceil(demand * cover + z * sigma * np.sqrt(cover))
+    # Orders fill a row up to its order-up-to level, capped by its capacity
+    target = order_up_to
+    if 'max_capacity' in inventory_df.columns:
+        target = np.minimum(target, inventory_df['max_capacity'].to_numpy(dtype=np.float64))
+
+    return pd.DataFrame({
+        'daily_demand': demand,
+        'safety_stock': safety_stock,
+        'reorder_point': reorder_point,
+        'order_up_to': order_up_to,
+        'order_quantity': np.maximum(target - current_stock, 0),
+        'reorder': current_stock <= reorder_point
+    }, index=inventory_df.index, columns=REPLENISHMENT_COLUMNS)
+
+def product_demand_rates(inventory_df, fit, forecasts=None):
+    """Daily demand and forecast error standard deviation of every inventory row from a product-level fit"""
+    products = inventory_df['product']
+    if isinstance(products.dtype, pd.CategoricalDtype):
+        codes, labels = products.cat.codes.to_numpy(), products.cat.categories
+    else:
+        codes, labels = pd.factorize(products)
+
+    known = pd.Index(labels).isin(fit.index)
+    known_labels = list(pd.Index(labels)[known])
+    product_fit = fit.select(known_labels)
+    period = product_fit.periods(1)
+    # Days in the forecast month of the (monthly) fit
+    days = period[0].days_in_month if period is not None else 30.4
+
+    demand = np.full(len(labels), np.nan)
+    sigma = np.full(len(labels), np.nan)
+    # Next-period forecast of each product, from ``forecasts`` (a Series by product) when given
+    next_period = product_fit.forecast(1)[:, 0] if forecasts is None else forecasts.reindex(known_labels).to_numpy()
+    # Unknown products get NaN; errors are assumed independent from day to day
+    demand[known] = next_period / days
+    sigma[known] = product_fit.rmse / np.sqrt(days)
+
+    # Share of each product's demand handled by one warehouse; with warehouse errors assumed
+    # independent, each also gets that share of the error variance
+    share = 1 / np.maximum(np.bincount(codes, minlength=len(labels)), 1)
+
+    return demand[codes] * share[codes], sigma[codes] * np.sqrt(share[codes])
+
+def replenishment_plan(inventory_df, fit, forecasts=None, service_level=DEFAULT_SERVICE_LEVEL,
+                       review_days=DEFAULT_REVIEW_DAYS):
+    """Warehouse, product and current stock of every inventory row with its replenishment levels"""
+    daily_demand, daily_sigma = product_demand_rates(inventory_df, fit, forecasts=forecasts)
+    levels = calculate_replenishment_levels(
+        inventory_df, daily_demand, daily_sigma, service_level=service_level, review_days=review_days)
+
+    return pd.concat([inventory_df[['warehouse', 'product', 'current_stock', 'restock_days']], levels], axis=1)
+
+@cached(maxsize=8)
+def network_replenishment_plan(service_level=DEFAULT_SERVICE_LEVEL, review_days=DEFAULT_REVIEW_DAYS):
+    """Replenishment levels of the whole current inventory, recomputed when the data or forecast changes"""
+    # Product demand from the forecast reconciled across the hierarchy, so the plan adds up to the
+    # country and total forecasts; the product fit still sizes the forecast error
+    reconciled = reconciled_sales_forecast().loc['product']
+    return replenishment_plan(
+        get_data_source().load_inventory(),
+        sales_forecast_model('product'),
+        forecasts=reconciled.iloc[:, 0],
+        service_level=service_level,
+        review_days=review_days
+    )
+
+def product_safety_stock(product, service_level=DEFAULT_SERVICE_LEVEL):
+    """Total safety stock of one product across the network (0 when it is not stocked)"""
+    plan = network_replenishment_plan(service_level=service_level)
+    total = plan.loc[plan['product'] == product, 'safety_stock'].sum()
+    return int(total) if np.isfinite(total) else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the replenishment levels of every warehouse x product row. Daily demand and "
+                    "its standard deviation are synthetic (gamma-distributed), not taken from the forecast.")
+    add_tier_argument(parser, 'plan')
+    parser.add_argument('--warehouses', type=int, default=None, help="Warehouses in a generated network")
+    parser.add_argument('--products', type=int, default=None, help="Products in a generated network")
+    parser.add_argument('--service-level', type=float, default=DEFAULT_SERVICE_LEVEL, help="Target service level")
+    args = parser.parse_args(argv)
+
+    if args.warehouses is not None or args.products is not None:
+        from data.sample_data import create_mock_inventory_data
+        inventory_df = create_mock_inventory_data(args.warehouses, args.products, seed=0)
+    else:
+        inventory_df = tier_data_source(args.tier).load_inventory()
+
+    # Synthetic demand, so the benchmark does not depend on fitting a forecast
+    rng = np.random.default_rng(0)
+    daily_demand = rng.gamma(2.0, 50.0, len(inventory_df))
+    daily_sigma = daily_demand * rng.uniform(0.1, 0.5, len(inventory_df))
+
+    start = time.perf_counter()
+    levels = calculate_replenishment_levels(
+        inventory_df, daily_demand, daily_sigma, service_level=args.service_level)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(levels):,} rows in {elapsed * 1000:.1f}ms, {int(levels['reorder'].sum()):,} to reorder, "
+          f"total safety stock {levels['safety_stock'].sum():,.0f} units")
+
+if __name__ == '__main__':
+    main()
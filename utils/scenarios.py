@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+# Percentiles reported for the simulated demand paths
+QUANTILES = [5, 25, 50, 75, 95]
+
+# Mean monthly growth applied on top of the fitted model for each market trend
+MARKET_TRENDS = {
+    'increasing': 0.03,
+    'steady': 0.0,
+    'decreasing': -0.02
+}
+
+# Products offered by the simulator's product selector (and warmed up for it)
+SIMULATOR_PRODUCTS = [
+    'Activia Yogurt', 'Alpro Soya', 'Danone Greek',
+    'Evian Water', 'Actimel Probiotic', 'Volvic Water'
+]
+
+# Simulator slider values: promotion impact (%) and seasonality strength
+PROMOTION_STEPS = list(range(0, 55, 5))
+SEASONALITY_STEPS = list(range(1, 11))
+DEFAULT_SEASONALITY_STRENGTH = 5
+
+# Chance that a given month carries a promotion
+PROMOTION_PROBABILITY = 0.1
+
+# Standard deviation of each path's monthly growth around the market trend
+TREND_UNCERTAINTY = 0.01
+
+def seasonality_scale(strength):
+    """Multiplier of the seasonal pattern for a seasonality slider value (5 keeps it as fitted)"""
+    return np.asarray(strength, dtype=np.float32) / DEFAULT_SEASONALITY_STRENGTH
+
+def _draw_components(fit, horizon, n_paths, trend_growth, trend_uncertainty, promotion_probability, seed):
+    """Random parts of the demand paths, kept separate so the controls can be applied afterwards"""
+    rng = np.random.default_rng(seed)
+    steps = np.arange(1, horizon + 1, dtype=np.float32)
+    n_series = len(fit.level)
+    shape = (n_series, n_paths, horizon)
+
+    level = (fit.level[:, None] + fit.trend[:, None] * steps).astype(np.float32)
+    season = fit.season[:, (np.arange(horizon)) % fit.season_length].astype(np.float32)
+
+    growth = rng.normal(trend_growth, trend_uncertainty, (n_series, n_paths, 1)).astype(np.float32)
+    growth = (1 + growth) ** steps
+
+    base = level[:, None, :] * growth
+    sigma = np.asarray(fit.rmse, dtype=np.float32)[:, None, None]
+    alpha = fit.params['alpha'].to_numpy(dtype=np.float32)[:, None, None]
+    base += np.cumsum(rng.standard_normal(shape, dtype=np.float32), axis=2) * (alpha * sigma)
+    base += rng.standard_normal(shape, dtype=np.float32) * sigma
+
+    seasonal = season[:, None, :] * growth
+
+    if promotion_probability > 0:
+        # One uniform draw decides both whether a month is promoted and,
+        # rescaled to [0, 1), how strong the promotion is
+        draws = rng.random(shape, dtype=np.float32)
+        lift = np.where(draws < promotion_probability, 0.5 + draws / promotion_probability, np.float32(0))
+    else:
+        lift = np.zeros(shape, dtype=np.float32)
+
+    # (series, paths, horizon) float32 arrays: demand without its seasonal part, the seasonal part
+    # under the same growth, and each month's lift per unit of promotion impact
+    return base, seasonal, lift
+
+def simulate_demand_paths(fit, horizon=12, n_paths=10000, trend_growth=0.0, trend_uncertainty=TREND_UNCERTAINTY,
+                          promotion_probability=PROMOTION_PROBABILITY, promotion_lift=0.2,
+                          seasonality=1.0, seed=None):
+    """Draw Monte Carlo demand paths around a Holt-Winters fit"""
+    base, seasonal, lift = _draw_components(
+        fit, horizon, n_paths, trend_growth, trend_uncertainty, promotion_probability, seed)
+
+    paths = base + np.float32(seasonality) * seasonal
+    # Promoted months are lifted by 50-150% of ``promotion_lift``
+    paths *= 1 + np.float32(promotion_lift) * lift
+
+    return np.maximum(paths, 0, out=paths)
+
+def sensitivity_grid(fit, promotion_impacts=None, seasonality_strengths=None, trend='steady',
+                     metric='total', horizon=12, n_paths=10000, quantile=50, seed=0):
+    """Demand under every promotion impact x seasonality strength combination"""
+    promotion_impacts = PROMOTION_STEPS if promotion_impacts is None else promotion_impacts
+    seasonality_strengths = SEASONALITY_STEPS if seasonality_strengths is None else seasonality_strengths
+
+    # Every grid point reuses the same draws as forecast_bands
+    base, seasonal, lift = _draw_components(
+        fit, horizon, n_paths, MARKET_TRENDS.get(trend, 0.0), TREND_UNCERTAINTY, PROMOTION_PROBABILITY, seed)
+
+    lifts = np.asarray(promotion_impacts, dtype=np.float32) / 100
+    scales = seasonality_scale(seasonality_strengths)
+
+    if metric == 'total':
+        # Totals are linear in s and l, so per-path sums of (base + s * seasonal) * (1 + l * lift),
+        # grouped by s and l, give the whole grid (monthly values are not floored at zero here)
+        sums = [part.sum(axis=2) for part in (base, seasonal, base * lift, seasonal * lift)]
+        base_sum, seasonal_sum, base_lift_sum, seasonal_lift_sum = (part[:, None, None, :] for part in sums)
+        totals = ((base_sum + scales[:, None] * seasonal_sum) +
+                  lifts[:, None, None] * (base_lift_sum + scales[:, None] * seasonal_lift_sum))
+        values = np.percentile(totals, quantile, axis=3)
+    elif metric == 'peak':
+        # (series, strengths, paths, horizon) demand for one promotion step at a time
+        unpromoted = base[:, None] + scales[None, :, None, None] * seasonal[:, None]
+        values = np.stack([
+            np.percentile(np.maximum(unpromoted * (1 + l * lift[:, None]), 0).max(axis=3), quantile, axis=2)
+            for l in lifts
+        ], axis=1)
+    else:
+        raise ValueError(f"Unknown sensitivity metric '{metric}', expected 'total' or 'peak'")
+
+    index = pd.MultiIndex.from_product(
+        [fit.index.tolist(), list(promotion_impacts)],
+        names=[fit.index.name or 'series', 'promotion_impact']
+    )
+    return pd.DataFrame(
+        values.reshape(-1, len(seasonality_strengths)),
+        index=index,
+        columns=pd.Index(list(seasonality_strengths), name='seasonality_strength')
+    )
+
+def scenario_bands(paths, index=None, periods=None, quantiles=None):
+    """Reduce (series, paths, horizon) paths to percentile bands"""
+    quantiles = QUANTILES if quantiles is None else quantiles
+    n_series, _, horizon = paths.shape
+
+    values = np.percentile(paths, quantiles, axis=1)
+
+    if index is None:
+        index = pd.RangeIndex(n_series, name='series')
+    elif not isinstance(index, pd.Index):
+        index = pd.Index(index)
+    periods = pd.RangeIndex(1, horizon + 1) if periods is None else pd.Index(periods)
+
+    # Series labels (one or more levels) repeated per period, then the period level
+    labels = index.to_frame(index=False).iloc[np.repeat(np.arange(n_series), horizon)]
+    labels = labels.rename(columns={0: 'series'}).reset_index(drop=True)
+    labels['period'] = np.tile(periods, n_series)
+
+    # Indexed by (series, period), one column per percentile
+    return pd.DataFrame(
+        values.reshape(len(quantiles), -1).T,
+        index=pd.MultiIndex.from_frame(labels),
+        columns=[f'p{q}' for q in quantiles]
+    )
+
+def forecast_bands(fit, horizon=12, trend='steady', promotion_impact=20,
+                   seasonality_strength=DEFAULT_SEASONALITY_STRENGTH, seed=0, **kwargs):
+    """Percentile bands of simulated demand for every series of a fit, under the simulator controls"""
+    paths = simulate_demand_paths(
+        fit,
+        horizon=horizon,
+        trend_growth=MARKET_TRENDS.get(trend, 0.0),
+        promotion_lift=promotion_impact / 100,
+        seasonality=seasonality_scale(seasonality_strength),
+        seed=seed,
+        **kwargs
+    )
+    periods = fit.periods(horizon)
+
+    return scenario_bands(
+        paths,
+        index=fit.index,
+        periods=periods.to_timestamp() if periods is not None else None
+    )
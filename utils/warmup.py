@@ -0,0 +1,110 @@
+import concurrent.futures
+import inspect
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+
+from utils.forecasting import sales_forecast_model
+from utils.jobs import (FAILED, SIMULATOR_DATASET, forecast_job, forecast_result, get_job_runner,
+                        sensitivity_job, sensitivity_result)
+from utils.scenarios import MARKET_TRENDS, PROMOTION_STEPS, SEASONALITY_STEPS, SIMULATOR_PRODUCTS
+
+logger = logging.getLogger(__name__)
+
+# Set to 1 to precompute every simulator result when the server starts
+WARMUP_ENV = 'STOCKQUEST_WARMUP'
+
+# Number of worker processes used by the warm-up
+WARMUP_WORKERS_ENV = 'STOCKQUEST_WARMUP_WORKERS'
+
+# Function computing each warmed job's result from the product's fit, in a worker process
+WARMUP_TASKS = {
+    forecast_job: forecast_result,
+    sensitivity_job: sensitivity_result
+}
+
+def simulator_grid():
+    """Every combination of the simulator controls"""
+    for product, trend, promotion, seasonality in itertools.product(
+            SIMULATOR_PRODUCTS, MARKET_TRENDS, PROMOTION_STEPS, SEASONALITY_STEPS):
+        yield {'product': product, 'trend': trend, 'promotion': promotion, 'seasonality': seasonality}
+
+def job_params(controls, job):
+    """The subset of simulator controls a job takes"""
+    accepted = inspect.signature(job).parameters
+    return {name: value for name, value in controls.items() if name in accepted}
+
+def warm_forecasts(max_workers=None, runner=None):
+    """Precompute the forecast and sensitivity results of every simulator combination. Returns the number computed."""
+    runner = get_job_runner() if runner is None else runner
+    if max_workers is None and os.environ.get(WARMUP_WORKERS_ENV):
+        max_workers = int(os.environ[WARMUP_WORKERS_ENV])
+
+    # Fitted first, so the sales version in the keys below is the one the results are computed from
+    fit = sales_forecast_model('product')
+
+    # Collapsed by job key, so controls a job does not take cost nothing; finished jobs are skipped
+    pending = {}
+    for controls in simulator_grid():
+        for job_func in WARMUP_TASKS:
+            params = job_params(controls, job_func)
+            key = runner.job_key(job_func, params, versioned=SIMULATOR_DATASET)
+            job = runner.get(key)
+            if key not in pending and (job is None or job.status == FAILED):
+                pending[key] = (job_func, params)
+
+    if not pending:
+        return 0
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+        # Each worker receives only its product's fitted state
+        futures = {}
+        for job_func, params in pending.values():
+            try:
+                product_fit = fit.select([params['product']])
+            except KeyError:
+                logger.exception("Warm-up of %s%s failed", job_func.__name__, params)
+                continue
+            futures[pool.submit(WARMUP_TASKS[job_func], fit=product_fit, **params)] = (job_func, params)
+
+        computed = 0
+        for future in concurrent.futures.as_completed(futures):
+            job_func, params = futures[future]
+            try:
+                result = future.result()
+            except Exception:
+                # One failing combination must not stop the others; the session computes it on demand
+                logger.exception("Warm-up of %s%s failed", job_func.__name__, params)
+                continue
+            runner.prime(job_func, result, versioned=SIMULATOR_DATASET, **params)
+            computed += 1
+
+    return computed
+
+def _run_warmup():
+    try:
+        computed = warm_forecasts()
+    except Exception:
+        logger.exception("Simulator warm-up failed")
+    else:
+        logger.info("Simulator warm-up computed %d results", computed)
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+def start_warmup():
+    """Run ``warm_forecasts`` once per process in the background when ``STOCKQUEST_WARMUP`` is set"""
+    global _warmup_thread
+    if os.environ.get(WARMUP_ENV, '0').lower() in ('', '0', 'false', 'no'):
+        return None
+    # Worker processes of the pools never warm up themselves
+    if multiprocessing.parent_process() is not None:
+        return None
+
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_run_warmup, name='stockquest-warmup', daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread